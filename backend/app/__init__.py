@@ -1,8 +1,7 @@
-from flask import Flask, send_from_directory, request, make_response
+from flask import Flask, request, make_response
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
-import os
 from flask_cors import CORS
 
 db = SQLAlchemy()
@@ -14,20 +13,11 @@ def create_app():
     
     app.config.from_object('config.Config')
     
-    # Configure upload folder
-    app.config['UPLOAD_FOLDER'] = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'uploads')
-    
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
     
-    # Serve uploaded files route
-    @app.route('/uploads/<path:folder>/<path:filename>')
-    def uploaded_file(folder, filename):
-        upload_path = os.path.join(app.config['UPLOAD_FOLDER'], folder)
-        return send_from_directory(upload_path, filename)
-    
     # Health check route
     @app.route('/')
     def index():
@@ -49,7 +39,7 @@ def create_app():
         if origin in ALLOWED_ORIGINS:
             response.headers['Access-Control-Allow-Origin'] = origin
         
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,Content-Range,X-Chunk-SHA256,Range'
         response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE,OPTIONS'
         response.headers['Access-Control-Allow-Credentials'] = 'true'
         return response
@@ -62,14 +52,14 @@ def create_app():
             origin = request.headers.get('Origin', '')
             if origin in ALLOWED_ORIGINS:
                 response.headers['Access-Control-Allow-Origin'] = origin
-            response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type,Authorization,Content-Range,X-Chunk-SHA256,Range'
             response.headers['Access-Control-Allow-Methods'] = 'GET,PUT,POST,DELETE,OPTIONS'
             response.headers['Access-Control-Allow-Credentials'] = 'true'
             return response
     
     # Register blueprints
     with app.app_context():
-        from app.routes import auth, campaigns, investors, wallet, artist, comment, payment
+        from app.routes import auth, campaigns, investors, wallet, artist, comment, payment, uploads, media
         app.register_blueprint(artist.bp) 
         app.register_blueprint(wallet.bp)
         app.register_blueprint(auth.bp)
@@ -77,7 +67,13 @@ def create_app():
         app.register_blueprint(investors.bp)
         app.register_blueprint(comment.bp)
         app.register_blueprint(payment.bp)
+        app.register_blueprint(uploads.bp)
+        app.register_blueprint(media.bp)
         
         db.create_all()
+
+    # CLI commands (flask <command>)
+    from app.commands import register_commands
+    register_commands(app)
     
     return app
\ No newline at end of file
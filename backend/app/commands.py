@@ -0,0 +1,181 @@
+import click
+from app import db
+
+
+def register_commands(app):
+    """Attach maintenance commands to `flask ...`"""
+
+    @app.cli.command('sweep-reservations')
+    def sweep_reservations():
+        """Expire checkout holds past their TTL and restock the partitions."""
+        from app.services.inventory import sweep_expired
+
+        restocked = sweep_expired()
+        db.session.commit()
+        click.echo(f'Returned {restocked} partitions to inventory')
+
+    @app.cli.command('sweep-uploads')
+    def sweep_uploads():
+        """Delete resumable uploads nobody has touched within their TTL."""
+        from app.services.uploads import sweep_expired_uploads
+
+        expired = sweep_expired_uploads()
+        db.session.commit()
+        click.echo(f'Expired {expired} upload sessions')
+
+    @app.cli.command('reconcile-wallets')
+    @click.option('--full', is_flag=True, help='Rebuild the ledger checkpoints from scratch.')
+    def reconcile_wallets_command(full):
+        """Check every wallet's totals against the WalletTransaction ledger."""
+        from app.services.reconciliation import reconcile_wallets
+
+        run = reconcile_wallets(full=full)
+        click.echo(
+            f'{run.mode} run #{run.id}: {run.wallets_checked} wallets, '
+            f'{run.ledger_rows_scanned} ledger rows, {run.discrepancy_count} discrepancies'
+        )
+
+    @app.cli.command('rebuild-positions')
+    @click.option('--investor', type=int, default=None, help='Only rebuild this investor\'s positions.')
+    def rebuild_positions_command(investor):
+        """Recompute portfolio positions from holdings, partitions and transactions."""
+        from app.services.positions import rebuild_positions
+
+        rows = rebuild_positions(investor_id=investor)
+        db.session.commit()
+        click.echo(f'Rebuilt {rows} portfolio positions')
+
+    @app.cli.command('check-positions')
+    @click.option('--investor', type=int, default=None, help='Only check this investor\'s positions.')
+    @click.option('--fix', is_flag=True, help='Rebuild the positions of investors that drifted.')
+    @click.option('--limit', type=int, default=20, show_default=True, help='How many differences to print.')
+    def check_positions_command(investor, fix, limit):
+        """Compare portfolio positions with the raw tables."""
+        from app.services.positions import check_positions, rebuild_positions
+
+        problems = check_positions(investor_id=investor)
+        for p in problems[:limit]:
+            click.echo(
+                f"investor {p['investor_id']} campaign {p['campaign_id']}: "
+                f"{p['field']} expected={p['expected']} actual={p['actual']}"
+            )
+        investors = sorted({p['investor_id'] for p in problems})
+        click.echo(f'{len(problems)} differences across {len(investors)} investors')
+
+        if fix and investors:
+            for investor_id in investors:
+                rebuild_positions(investor_id=investor_id)
+            db.session.commit()
+            click.echo(f'Rebuilt positions for {len(investors)} investors')
+
+    @app.cli.command('rollup-portfolios')
+    @click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Last day to roll up (default: yesterday, UTC).')
+    def rollup_portfolios_command(until):
+        """Write daily portfolio totals for every day not rolled up yet (run nightly)."""
+        from app.services.rollups import rollup_portfolios
+
+        runs = rollup_portfolios(until=until.date() if until else None)
+        if not runs:
+            click.echo('Nothing to roll up')
+            return
+        click.echo(
+            f'Rolled up {len(runs)} days ({runs[0].day} .. {runs[-1].day}), '
+            f'{sum(r.investors_updated for r in runs)} investor rows'
+        )
+
+    @app.cli.command('portfolio-report')
+    @click.option('--workers', type=int, default=None, help='Worker processes (default: CPU count, 0 = in-process).')
+    @click.option('--chunk-size', type=int, default=5000, show_default=True, help='Investors per chunk.')
+    @click.option('--output', type=click.Path(dir_okay=False), default=None,
+                  help='Write to a .parquet / .csv file instead of the portfolio_report_rows table.')
+    def portfolio_report_command(workers, chunk_size, output):
+        """Compute every investor's portfolio for admin / compliance reporting."""
+        from app.services.reports import build_portfolio_report
+
+        try:
+            run = build_portfolio_report(workers=workers, chunk_size=chunk_size, output=output)
+        except (ValueError, RuntimeError) as e:
+            raise click.UsageError(str(e))
+        duration = (run.finished_at - run.started_at).total_seconds()
+        click.echo(
+            f'Report #{run.id}: {run.investor_count} investors in {duration:.1f}s'
+            + (f' -> {run.output_path}' if run.output_path else '')
+        )
+
+    @app.cli.command('calibrate-model')
+    @click.option('--no-activate', is_flag=True, help='Store the fitted version without activating it.')
+    def calibrate_model_command(no_activate):
+        """Fit the revenue model's parameter table to realized revenue as a new version."""
+        from app.services.model_calibration import calibrate_model
+
+        try:
+            version = calibrate_model(activate=not no_activate)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        db.session.commit()
+        click.echo(
+            f'Version {version.id}: {version.campaigns_used} campaigns, '
+            f'RMSE {version.rmse_before:.2f} -> {version.rmse_after:.2f}'
+            + (' (active)' if version.is_active else ' (not activated)')
+        )
+
+    @app.cli.command('activate-model-version')
+    @click.argument('version', type=int)
+    def activate_model_version_command(version):
+        """Switch predictions to a stored revenue model version (0 = built-in defaults)."""
+        from app.services.model_calibration import activate_version, POLL_SECONDS
+
+        try:
+            activate_version(version)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        db.session.commit()
+        click.echo(f'Revenue model version {version} is active; workers switch within {POLL_SECONDS}s')
+
+    @app.cli.command('gc-media')
+    @click.option('--grace-hours', type=float, default=None,
+                  help='Keep unreferenced blobs this long (default: MEDIA_GC_GRACE_SECONDS).')
+    def gc_media_command(grace_hours):
+        """Recount media references and delete blobs nothing points at any more."""
+        from app.services.media_store import collect_garbage
+
+        result = collect_garbage(grace_seconds=grace_hours * 3600 if grace_hours is not None else None)
+        db.session.commit()
+        click.echo(
+            f"Deleted {result['deleted']} blobs and {result['orphans']} orphaned files "
+            f"({result['bytes_freed'] / (1024 * 1024):.1f} MB), "
+            f"fixed {result['recounted']} reference counts"
+        )
+
+    @app.cli.command('media-worker')
+    @click.option('--workers', type=int, default=None, help='Render processes (default: CPU count, 0 = in-process).')
+    @click.option('--batch-size', type=int, default=16, show_default=True, help='Jobs claimed at a time.')
+    @click.option('--once', is_flag=True, help='Exit when the queue is empty instead of polling.')
+    def media_worker_command(workers, batch_size, once):
+        """Process queued media jobs (image derivatives, audio analysis) off the request path."""
+        from app.services.media_jobs import run_media_worker
+
+        processed = run_media_worker(workers=workers, batch_size=batch_size, once=once)
+        click.echo(f'Processed {processed} media jobs')
+
+    @app.cli.command('enqueue-media-jobs')
+    def enqueue_media_jobs_command():
+        """Queue media jobs for uploads that predate them (e.g. derivatives of old artwork)."""
+        from app.services.media_jobs import enqueue_missing
+
+        queued = enqueue_missing()
+        db.session.commit()
+        click.echo(f'Queued {queued} media jobs')
+
+    @app.cli.command('import-legacy-media')
+    def import_legacy_media_command():
+        """Move files uploaded before the media store into it, deduplicated."""
+        import os
+        from app.services.media_store import import_legacy_media
+
+        imported, blobs, legacy_paths = import_legacy_media()
+        db.session.commit()
+        for path in legacy_paths:
+            os.remove(path)
+        click.echo(f'Repointed {imported} media URLs at {blobs} distinct blobs')
@@ -22,6 +22,7 @@ class User(db.Model):
     # Artist profile fields
     bio = db.Column(db.Text, nullable=True) # Good
     profile_image_url = db.Column(db.String(500), nullable=True) # Good
+    profile_image_variants = db.Column(db.JSON(none_as_null=True), nullable=True) # {format: {width: url}}, filled by the media worker
     spotify_url = db.Column(db.String(255), nullable=True) # Good
     instagram_url = db.Column(db.String(255), nullable=True) # Good
     youtube_url = db.Column(db.String(255), nullable=True) # Good
@@ -55,6 +56,7 @@ class User(db.Model):
         data = {
             'id': self.id, 'name': self.name, 'role': self.role,
             'profile_image_url': self.profile_image_url,
+            'profile_image_variants': self.profile_image_variants,
             'bio': self.bio if self.role == 'artist' else None,
             'location': self.location if self.role == 'artist' else None,
             'genre': self.genre if self.role == 'artist' else None,
@@ -81,12 +83,17 @@ class Campaign(db.Model):
     description = db.Column(db.Text, nullable=True) # Good
     genre = db.Column(db.String(50), nullable=True, index=True) # Added index, nullable=True is fine
     audio_preview_url = db.Column(db.String(500), nullable=True) # Good
+    audio_duration = db.Column(db.Float, nullable=True) # Seconds, filled by the media worker
+    audio_peaks_url = db.Column(db.String(500), nullable=True) # Binary waveform peaks (app/services/audio_analysis.py)
+    audio_metadata = db.Column(db.JSON(none_as_null=True), nullable=True) # Bitrate, levels, how to read the peaks
     artwork_url = db.Column(db.String(500), nullable=True) # Good
+    artwork_variants = db.Column(db.JSON(none_as_null=True), nullable=True) # {format: {width: url}}, filled by the media worker
     target_amount = db.Column(db.Float, nullable=False)
     amount_raised = db.Column(db.Float, default=0, nullable=False) # Added nullable=False
     revenue_share_pct = db.Column(db.Float, nullable=False)
     partition_price = db.Column(db.Float, nullable=False)
     total_partitions = db.Column(db.Integer, nullable=True) # Made nullable, might be calculated later? If always needed, make False.
+    partitions_remaining = db.Column(db.Integer, nullable=True) # Unsold + unreserved partitions. NULL = no cap (legacy campaigns)
     min_partitions_per_user = db.Column(db.Integer, default=1, nullable=False) # Added nullable=False
     funding_status = db.Column(db.String(20), default='draft', nullable=False, index=True) # Added nullable=False, index
     sharing_term = db.Column(db.String(100), nullable=True) # Changed from String? If months, use Integer. Kept as String for now.
@@ -117,6 +124,7 @@ class Campaign(db.Model):
     investor_holdings = db.relationship('InvestorHolding', backref='campaign', lazy='dynamic') # Added InvestorHolding relationship
     # This links Campaign to Comment. Cascade ensures comments are deleted if campaign is deleted.
     comments = db.relationship('Comment', backref='campaign', lazy='dynamic', cascade="all, delete-orphan")
+    reservations = db.relationship('PartitionReservation', backref='campaign', lazy='dynamic', cascade="all, delete-orphan")
     # --- END RELATIONSHIPS ---
 
     def __repr__(self):
@@ -140,6 +148,39 @@ class Partition(db.Model):
         return f'<Partition {self.id}>'
 
 
+# --- PartitionReservation Model ---
+# A short-lived checkout hold. Creating one takes partitions out of
+# Campaign.partitions_remaining; it is either consumed by a purchase,
+# released by the user, or expired by the sweeper (which gives them back).
+class PartitionReservation(db.Model):
+    __tablename__ = 'partition_reservations'
+
+    id = db.Column(db.Integer, primary_key=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    partitions = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), default='held', nullable=False) # held, consumed, released, expired
+    expires_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # The sweeper scans "held AND expired"
+    __table_args__ = (db.Index('ix_partition_reservations_status_expires_at', 'status', 'expires_at'),)
+
+    def __repr__(self):
+        return f'<PartitionReservation {self.id} - {self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'user_id': self.user_id,
+            'partitions': self.partitions,
+            'status': self.status,
+            'expires_at': self.expires_at.isoformat(),
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
 # --- RevenueEvent Model ---
 class RevenueEvent(db.Model):
     __tablename__ = 'revenue_events'
@@ -181,11 +222,15 @@ class Distribution(db.Model):
 
 
 # --- Transaction Model ---
+# Legacy ledger. No longer written: purchases and revenue shares are
+# wallet_transactions rows now (see app/services/ledger.py), and its rows
+# were folded in by migration c6e2f9a4b718. Kept until it is dropped.
 class Transaction(db.Model):
     __tablename__ = 'transactions'
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True) # Added index
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=True, index=True) # Campaign a purchase / revenue share belongs to
     tx_type = db.Column(db.String(50), nullable=True, index=True) # Made nullable, index
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='pending', nullable=False, index=True) # Added nullable=False, index
@@ -193,6 +238,9 @@ class Transaction(db.Model):
     description = db.Column(db.Text, nullable=True) # Good
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True) # Added nullable=False, index
 
+    # Covers the earnings query (filter on user/type/status, SUM(amount)) without touching the table
+    __table_args__ = (db.Index('ix_transactions_user_type_status_amount', 'user_id', 'tx_type', 'status', 'amount'),)
+
     def __repr__(self):
         return f'<Transaction {self.id}>'
 
@@ -206,7 +254,7 @@ class InvestorHolding(db.Model):
     investor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True) # Added index
     partitions_owned = db.Column(db.Integer, nullable=False)
     ownership_pct = db.Column(db.Float, nullable=True) # Good
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False) # Added nullable=False
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True) # Indexed for the daily portfolio rollup
 
     # Added UniqueConstraint
     __table_args__ = (db.UniqueConstraint('investor_id', 'campaign_id', name='_investor_campaign_uc'),)
@@ -270,7 +318,14 @@ class WalletTransaction(db.Model):
     reference_id = db.Column(db.String(100), nullable=True, index=True) # Added index
     reference_type = db.Column(db.String(50), nullable=True, index=True) # Added index
     status = db.Column(db.String(20), default='completed', nullable=False, index=True) # Added nullable=False, index
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=True, index=True) # Campaign an investment / purchase / revenue share belongs to
+    tx_reference = db.Column(db.String(255), nullable=True, unique=True, index=True) # Payment reference of a partition purchase (Partition.payment_transaction_id)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True) # Added nullable=False, index
+    settled_at = db.Column(db.DateTime, nullable=True, index=True) # When the row started counting toward the wallet (set on flush, see services/reconciliation.py)
+
+    # Covers the earnings query (filter on wallet/type/status, SUM(amount)) without touching the table
+    __table_args__ = (db.Index('ix_wallet_transactions_wallet_type_status_amount',
+                               'wallet_id', 'transaction_type', 'status', 'amount'),)
 
     def to_dict(self):
         return {
@@ -278,7 +333,275 @@ class WalletTransaction(db.Model):
             'amount': round(self.amount, 2), 'balance_before': round(self.balance_before, 2),
             'balance_after': round(self.balance_after, 2), 'description': self.description,
             'reference_id': self.reference_id, 'reference_type': self.reference_type,
-            'status': self.status, 'created_at': self.created_at.isoformat()
+            'campaign_id': self.campaign_id, 'status': self.status, 'created_at': self.created_at.isoformat()
+        }
+
+
+# --- Wallet Reconciliation Models ---
+# The reconciliation job (app/services/reconciliation.py) recomputes every
+# wallet's totals from the WalletTransaction ledger and records any drift.
+
+class WalletLedgerCheckpoint(db.Model):
+    """Per-wallet ledger totals for all settled transactions below the run watermark"""
+    __tablename__ = 'wallet_ledger_checkpoints'
+
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), primary_key=True)
+    balance = db.Column(db.Float, default=0.0, nullable=False)
+    total_deposited = db.Column(db.Float, default=0.0, nullable=False)
+    total_withdrawn = db.Column(db.Float, default=0.0, nullable=False)
+    total_invested = db.Column(db.Float, default=0.0, nullable=False)
+    total_earnings = db.Column(db.Float, default=0.0, nullable=False)
+
+
+class WalletReconciliationRun(db.Model):
+    __tablename__ = 'wallet_reconciliation_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    mode = db.Column(db.String(20), nullable=False) # full, incremental
+    status = db.Column(db.String(20), default='running', nullable=False) # running, completed, failed
+    watermark_tx_id = db.Column(db.Integer, nullable=True) # Ledger rows with id < watermark are folded into checkpoints
+    open_tx_ids = db.Column(db.JSON, nullable=True) # ...except these, still pending long after their watermark passed
+    ledger_rows_scanned = db.Column(db.Integer, default=0, nullable=False)
+    wallets_checked = db.Column(db.Integer, default=0, nullable=False)
+    discrepancy_count = db.Column(db.Integer, default=0, nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    discrepancies = db.relationship('WalletDiscrepancy', backref='run', lazy='dynamic', cascade="all, delete-orphan")
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'mode': self.mode, 'status': self.status,
+            'watermark_tx_id': self.watermark_tx_id,
+            'open_tx_count': len(self.open_tx_ids or []),
+            'ledger_rows_scanned': self.ledger_rows_scanned,
+            'wallets_checked': self.wallets_checked,
+            'discrepancy_count': self.discrepancy_count,
+            'started_at': self.started_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'duration_seconds': (self.finished_at - self.started_at).total_seconds() if self.finished_at else None
+        }
+
+
+class WalletDiscrepancy(db.Model):
+    __tablename__ = 'wallet_discrepancies'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('wallet_reconciliation_runs.id'), nullable=False, index=True)
+    wallet_id = db.Column(db.Integer, db.ForeignKey('wallets.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    field = db.Column(db.String(30), nullable=False) # balance, total_deposited, ...
+    expected = db.Column(db.Float, nullable=False) # From the ledger
+    actual = db.Column(db.Float, nullable=False) # On the wallet row
+    difference = db.Column(db.Float, nullable=False) # actual - expected
+
+    def to_dict(self):
+        return {
+            'id': self.id, 'run_id': self.run_id, 'wallet_id': self.wallet_id, 'user_id': self.user_id,
+            'field': self.field, 'expected': round(self.expected, 2), 'actual': round(self.actual, 2),
+            'difference': round(self.difference, 2)
+        }
+
+
+# --- Portfolio Position Model ---
+# Materialized per-investor, per-campaign totals, kept up to date by the
+# investment / purchase / distribution paths (app/services/positions.py).
+
+class PortfolioPosition(db.Model):
+    __tablename__ = 'portfolio_positions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    investor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, index=True)
+    partitions_owned = db.Column(db.Integer, default=0, nullable=False)
+    invested_amount = db.Column(db.Float, default=0.0, nullable=False) # Sum of partitions.amount_paid
+    realized_earnings = db.Column(db.Float, default=0.0, nullable=False) # Completed revenue_distribution transactions
+    roi_pct = db.Column(db.Float, default=0.0, nullable=False) # realized_earnings / invested_amount * 100
+    first_invested_at = db.Column(db.DateTime, nullable=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    # Leading investor_id makes "one investor's portfolio" an index range scan
+    __table_args__ = (db.UniqueConstraint('investor_id', 'campaign_id', name='_position_investor_campaign_uc'),)
+
+    def __repr__(self):
+        return f'<PortfolioPosition investor={self.investor_id} campaign={self.campaign_id}>'
+
+
+# --- Portfolio Rollup Models ---
+# End-of-day portfolio totals for charts, written by the nightly
+# `flask rollup-portfolios` job (app/services/rollups.py). Rows are sparse:
+# an investor only gets a row on days their totals changed.
+
+class PortfolioDailyRollup(db.Model):
+    __tablename__ = 'portfolio_daily_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    investor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False) # UTC day
+    invested = db.Column(db.Float, default=0.0, nullable=False) # Cumulative, as of the end of the day
+    earnings = db.Column(db.Float, default=0.0, nullable=False)
+    balance = db.Column(db.Float, default=0.0, nullable=False)
+    positions = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (db.UniqueConstraint('investor_id', 'day', name='_rollup_investor_day_uc'),)
+
+    def to_dict(self):
+        return {
+            'day': self.day.isoformat(), 'invested': round(self.invested, 2),
+            'earnings': round(self.earnings, 2), 'balance': round(self.balance, 2),
+            'positions': self.positions
+        }
+
+
+class PortfolioRollupRun(db.Model):
+    __tablename__ = 'portfolio_rollup_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, index=True) # UTC day rolled up by this run
+    investors_updated = db.Column(db.Integer, default=0, nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+
+# --- Portfolio Report Models ---
+# Admin/compliance snapshot of every investor's portfolio, computed by
+# `flask portfolio-report` (app/services/reports.py).
+
+class PortfolioReportRun(db.Model):
+    __tablename__ = 'portfolio_report_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.String(20), default='running', nullable=False) # running, completed, failed
+    investor_count = db.Column(db.Integer, default=0, nullable=False)
+    output_path = db.Column(db.String(500), nullable=True) # Set when rows went to a file instead of the table
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    rows = db.relationship('PortfolioReportRow', backref='run', lazy='dynamic', cascade="all, delete-orphan")
+
+
+class PortfolioReportRow(db.Model):
+    __tablename__ = 'portfolio_report_rows'
+
+    id = db.Column(db.Integer, primary_key=True)
+    run_id = db.Column(db.Integer, db.ForeignKey('portfolio_report_runs.id'), nullable=False, index=True)
+    investor_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    balance = db.Column(db.Float, default=0.0, nullable=False)
+    total_deposited = db.Column(db.Float, default=0.0, nullable=False)
+    total_invested = db.Column(db.Float, default=0.0, nullable=False)
+    total_earnings = db.Column(db.Float, default=0.0, nullable=False)
+    positions = db.Column(db.Integer, default=0, nullable=False)
+    invested_amount = db.Column(db.Float, default=0.0, nullable=False) # Sum of partitions.amount_paid
+    realized_earnings = db.Column(db.Float, default=0.0, nullable=False) # Completed revenue shares
+    pending_earnings = db.Column(db.Float, default=0.0, nullable=False)
+    expected_return_3m = db.Column(db.Float, default=0.0, nullable=False)
+    roi_pct = db.Column(db.Float, default=0.0, nullable=False)
+
+
+# --- Revenue Model Versions ---
+# Parameter tables for the revenue model, fitted to realized revenue by
+# `flask calibrate-model` (app/services/model_calibration.py). At most one
+# version is active; workers pick up a newly activated one on their own.
+
+class RevenueModelVersion(db.Model):
+    __tablename__ = 'revenue_model_versions'
+
+    id = db.Column(db.Integer, primary_key=True) # The version number
+    parameters = db.Column(db.JSON, nullable=False) # revenue_model.DEFAULT_PARAMETERS layout
+    campaigns_used = db.Column(db.Integer, default=0, nullable=False)
+    rmse_before = db.Column(db.Float, nullable=True) # 3 month revenue error of the previously active table
+    rmse_after = db.Column(db.Float, nullable=True) # ... and of this one, on the same campaigns
+    is_active = db.Column(db.Boolean, default=False, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    activated_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'version': self.id,
+            'parameters': self.parameters,
+            'campaigns_used': self.campaigns_used,
+            'rmse_before': round(self.rmse_before, 2) if self.rmse_before is not None else None,
+            'rmse_after': round(self.rmse_after, 2) if self.rmse_after is not None else None,
+            'is_active': self.is_active,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'activated_at': self.activated_at.isoformat() if self.activated_at else None,
+        }
+
+
+# --- Media Blob Model ---
+# Content-addressed media store (app/services/media_store.py): one file per
+# distinct SHA-256, however many campaigns / profiles point at it.
+
+class MediaBlob(db.Model):
+    __tablename__ = 'media_blobs'
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.BigInteger, nullable=False)
+    extension = db.Column(db.String(10), nullable=False) # From the first upload, part of the URL
+    ref_count = db.Column(db.Integer, default=0, nullable=False) # URL columns pointing at this blob
+    unreferenced_since = db.Column(db.DateTime, nullable=True, index=True) # Set while ref_count is 0; `flask gc-media` deletes after a grace period
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+# --- Media Job Model ---
+# Background work on uploaded media (app/services/media_jobs.py), run by
+# `flask media-worker` off the request path.
+
+class MediaJob(db.Model):
+    __tablename__ = 'media_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(30), nullable=False) # image_derivatives, audio_analysis
+    target_type = db.Column(db.String(20), nullable=False) # campaign, user
+    target_id = db.Column(db.Integer, nullable=False)
+    field = db.Column(db.String(50), nullable=False) # URL column the job works on, e.g. artwork_url
+    source_sha256 = db.Column(db.String(64), nullable=False) # Blob the column pointed at when queued
+    status = db.Column(db.String(20), default='queued', nullable=False) # queued, running, done, stale, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (db.Index('ix_media_jobs_status_id', 'status', 'id'),)
+
+
+# --- Upload Session Model ---
+# Resumable chunked uploads (app/services/uploads.py): the client creates a
+# session, PUTs ranged chunks, then finalizes it into the campaign / profile.
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+
+    id = db.Column(db.String(32), primary_key=True) # Random token, part of the upload URLs
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), nullable=False) # artwork, audio, profile_image
+    target_id = db.Column(db.Integer, nullable=False) # Campaign for artwork / audio, the user for profile_image
+    filename = db.Column(db.String(255), nullable=False) # secure_filename() of the original name
+    total_size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, default=0, nullable=False) # Bytes on disk so far, always a prefix of the file
+    sha256 = db.Column(db.String(64), nullable=True) # Whole-file checksum from the client, checked on finalize
+    status = db.Column(db.String(20), default='open', nullable=False, index=True) # open, assembled, verifying, completed, aborted, expired, failed
+    media_url = db.Column(db.String(500), nullable=True) # Set on completion
+    error = db.Column(db.Text, nullable=True) # Why the media worker sent a direct upload back (or failed it)
+    storage_upload_id = db.Column(db.String(255), nullable=True) # Multipart upload id of a direct upload (browser -> bucket)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True) # Pushed back by every chunk
+
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'kind': self.kind,
+            'target_id': self.target_id,
+            'filename': self.filename,
+            'size': self.total_size,
+            'offset': self.received,
+            'status': self.status,
+            'url': self.media_url,
+            'direct': self.storage_upload_id is not None,
+            'error': self.error,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None,
         }
 
 
@@ -296,7 +619,11 @@ class Comment(db.Model):
     # `ForeignKey('users.id')` links this to the `id` column in the `users` table.
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     # `ForeignKey('campaigns.id')` links this to the `id` column in the `campaigns` table.
-    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False, index=True)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaigns.id'), nullable=False)
+
+    # A campaign's comments newest first, in cursor order (GET /api/campaigns/<id>/comments).
+    # Also serves plain campaign_id lookups, so campaign_id has no index of its own.
+    __table_args__ = (db.Index('ix_comments_campaign_created_id', 'campaign_id', 'created_at', 'id'),)
 
     # Relationships are handled by the 'backref' attributes in the User and Campaign models.
     # This means you can access `comment.author` to get the User object and
@@ -323,11 +650,17 @@ class ArtistWithdrawal(db.Model):
     __tablename__ = 'artist_withdrawals'
 
     id = db.Column(db.Integer, primary_key=True)
-    artist_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    artist_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     status = db.Column(db.String(20), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Admin queue, newest first (created_at, id): all withdrawals, or one status
+    __table_args__ = (
+        db.Index('ix_artist_withdrawals_created_at_id', 'created_at', 'id'),
+        db.Index('ix_artist_withdrawals_status_created_at_id', 'status', 'created_at', 'id'),
+    )
+
 # --- RazorpayOrder Model ---
 # This stores all Razorpay payment/order information
 class RazorpayOrder(db.Model):
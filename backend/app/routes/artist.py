@@ -3,9 +3,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Campaign, InvestorHolding, Partition
-from datetime import datetime
+from app.services.media_store import store_stream
+from app.services.media_jobs import attach_upload
 from werkzeug.utils import secure_filename
-import os
 
 bp = Blueprint('artist', __name__, url_prefix='/api/artist')
 
@@ -43,6 +43,7 @@ def get_artist_profile(artist_id):
         'email': artist.email,
         'bio': artist.bio or "Passionate musician creating unique sounds",
         'profile_image_url': artist.profile_image_url,
+        'profile_image_variants': artist.profile_image_variants,
         'location': artist.location or "India",
         'genre': artist.genre or "Independent",
         'verified': artist.verified,
@@ -66,6 +67,7 @@ def get_artist_profile(artist_id):
             'title': c.title,
             'description': c.description,
             'artwork_url': c.artwork_url,
+            'artwork_variants': c.artwork_variants,
             'target_amount': c.target_amount,
             'amount_raised': c.amount_raised,
             'revenue_share_pct': c.revenue_share_pct,
@@ -155,19 +157,9 @@ def upload_profile_image():
     if '.' not in file.filename or file.filename.rsplit('.', 1)[1].lower() not in allowed_extensions:
         return jsonify({'error': 'Invalid file type'}), 400
     
-    # Create safe filename
-    filename = secure_filename(file.filename)
-    timestamp = int(datetime.utcnow().timestamp())
-    filename = f"artist_{user_id}_{timestamp}_{filename}"
-    
-    # Save file
-    upload_folder = os.path.join('uploads', 'profiles')
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, filename)
-    file.save(filepath)
-    
-    # Update user profile
-    user.profile_image_url = f'/uploads/profiles/{filename}'
+    # Content-addressed: re-uploading the same file reuses the stored copy
+    blob = store_stream(file.stream, secure_filename(file.filename))
+    attach_upload(user, 'profile_image_url', blob)
     db.session.commit()
     
     return jsonify({
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_jwt_extended import create_access_token
 from app import db
-from app.models import User
+from app.models import User, Wallet
 
 bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 
@@ -21,6 +21,8 @@ def register():
         password_hash=generate_password_hash(data['password']),
         role=data.get('role', 'investor')
     )
+    # Wallet is created with the user, so balance reads never have to write
+    user.wallet = Wallet()
     db.session.add(user)
     db.session.commit()
     access_token = create_access_token(identity=str(user.id))
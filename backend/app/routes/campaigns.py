@@ -1,11 +1,23 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Campaign, User, Partition, Transaction
+from app.models import Campaign, User, Partition
+from app.services.positions import record_earnings
+from app.services.ledger import wallet_for
+from app.services.media_store import store_stream
+from app.services.media_jobs import attach_upload
+from app.services.budget_optimizer import optimize_budget
+from app.services.prediction_cache import cached_prediction, cache_stats
+from app.services.model_calibration import current_parameters, active_version
+from app.services.revenue_model import (
+    normalize_inputs, grid_scenarios, predict, prediction_response, MAX_SCENARIOS, PROJECTION_FIELDS
+)
 from datetime import datetime, timedelta
-import os
+import secrets
+import time
+import numpy as np
+import uuid
 from werkzeug.utils import secure_filename
-from flask import send_from_directory
 from sqlalchemy import func, case, cast, Float
 
 bp = Blueprint('campaigns', __name__, url_prefix='/api/campaigns')
@@ -49,6 +61,7 @@ def create_campaign():
         revenue_share_pct=data['revenue_share_pct'],
         partition_price=data['partition_price'],
         total_partitions=total_partitions,
+        partitions_remaining=total_partitions,
 
         # budgets
         music_video_budget=data['music_video_budget'],
@@ -87,7 +100,10 @@ def list_campaigns():
         'funding_status': c.funding_status,
         'artist_id': c.artist_id,
         'artwork_url': c.artwork_url,  # 🔥 ADDED
+        'artwork_variants': c.artwork_variants,
         'audio_preview_url': c.audio_preview_url,  # 🔥 ADDED
+        'audio_duration': c.audio_duration,
+        'audio_peaks_url': c.audio_peaks_url,
         'created_at': c.created_at.isoformat(),
         'start_date': c.start_date.isoformat() if c.start_date else None,
         'end_date': c.end_date.isoformat() if c.end_date else None
@@ -169,6 +185,7 @@ def get_trending_campaigns():
                 'funding_status': campaign.funding_status,
                 'artist_id': campaign.artist_id,
                 'artwork_url': campaign.artwork_url,
+                'artwork_variants': campaign.artwork_variants,
                 'audio_preview_url': campaign.audio_preview_url,
                 'created_at': campaign.created_at.isoformat(),
                 'start_date': campaign.start_date.isoformat() if campaign.start_date else None,
@@ -217,7 +234,10 @@ def get_my_campaigns():
         'funding_status': c.funding_status,
         'artist_id': c.artist_id,
         'artwork_url': c.artwork_url,  # 🔥 ADDED
+        'artwork_variants': c.artwork_variants,
         'audio_preview_url': c.audio_preview_url,  # 🔥 ADDED
+        'audio_duration': c.audio_duration,
+        'audio_peaks_url': c.audio_peaks_url,
         'expected_streams_3m': c.expected_streams_3m,
         'expected_revenue_3m': c.expected_revenue_3m,
         'created_at': c.created_at.isoformat(),
@@ -258,9 +278,13 @@ def get_campaign(campaign_id):
         'artist_id': campaign.artist_id,
         'artist_name': artist.name if artist else 'Unknown',
         'artwork_url': campaign.artwork_url,
+        'artwork_variants': campaign.artwork_variants,
         'artist_profile_image': artist.profile_image_url if artist and artist.profile_image_url else None,
 
         'audio_preview_url': campaign.audio_preview_url,
+        'audio_duration': campaign.audio_duration,
+        'audio_peaks_url': campaign.audio_peaks_url,
+        'audio_metadata': campaign.audio_metadata,
         'sharing_term': campaign.sharing_term,
         'expected_streams_3m': campaign.expected_streams_3m,
         'expected_revenue_3m': campaign.expected_revenue_3m,
@@ -465,7 +489,7 @@ def distribute_revenue(campaign_id):
         print(f"DEBUG 403: campaign.artist_id={campaign.artist_id}, user_id={user_id}, types: {type(campaign.artist_id)}, {type(user_id)}")
         return jsonify({'error': 'Unauthorized - only artist can distribute'}), 403
     
-    from app.models import RevenueEvent, Distribution, InvestorHolding, Transaction
+    from app.models import RevenueEvent, Distribution, InvestorHolding
     
     unprocessed_revenue = RevenueEvent.query.filter_by(
         campaign_id=campaign_id,
@@ -508,36 +532,20 @@ def distribute_revenue(campaign_id):
     
     db.session.add(distribution)
     
-    # Create transactions for each investor AND update their wallet
-    from app.models import Wallet, WalletTransaction
+    # One ledger row per movement: credit each investor's wallet
+    from app.models import WalletTransaction
     
     for investor_id, data in distribution_data.items():
-        # Create old transaction record (for backwards compatibility)
-        transaction = Transaction(
-            user_id=int(investor_id),
-            tx_type='revenue_distribution',
-            amount=data['share_amount'],
-            status='completed',
-            tx_reference=f'DIST_{campaign_id}_{investor_id}_{int(datetime.utcnow().timestamp())}',
-            description=f'Revenue share from {campaign.title}'
-        )
-        db.session.add(transaction)
-        
-        # Update investor wallet balance and earnings
-        wallet = Wallet.query.filter_by(user_id=int(investor_id)).first()
-        if not wallet:
-            wallet = Wallet(user_id=int(investor_id))
-            db.session.add(wallet)
-            db.session.flush()  # Get wallet ID
+        wallet = wallet_for(int(investor_id))
         
         balance_before = wallet.balance
         wallet.balance += data['share_amount']
         wallet.total_earnings += data['share_amount']
         wallet.updated_at = datetime.utcnow()
         
-        # Create wallet transaction record
         wallet_transaction = WalletTransaction(
             wallet_id=wallet.id,
+            campaign_id=campaign_id,
             transaction_type='payout',
             amount=data['share_amount'],
             balance_before=balance_before,
@@ -549,18 +557,29 @@ def distribute_revenue(campaign_id):
         )
         db.session.add(wallet_transaction)
     
-    # Create transaction for artist
+    # Artist share is recorded but paid outside the wallet
     artist_share = total_revenue - investor_pool - platform_fee
-    artist_transaction = Transaction(
-        user_id=campaign.artist_id,
-        tx_type='revenue_distribution',
+    artist_wallet = wallet_for(campaign.artist_id)
+    artist_transaction = WalletTransaction(
+        wallet_id=artist_wallet.id,
+        campaign_id=campaign_id,
+        transaction_type='artist_revenue',
         amount=artist_share,
-        status='completed',
-        tx_reference=f'DIST_{campaign_id}_ARTIST_{int(datetime.utcnow().timestamp())}',
-        description=f'Artist share from {campaign.title}'
+        balance_before=artist_wallet.balance,
+        balance_after=artist_wallet.balance,
+        tx_reference=f'DIST_{campaign_id}_ARTIST_{int(datetime.utcnow().timestamp())}_{uuid.uuid4().hex[:6]}',
+        description=f'Artist share from {campaign.title}',
+        reference_id=str(campaign_id),
+        reference_type='revenue',
+        status='completed'
     )
     db.session.add(artist_transaction)
     
+    # Keep the investors' materialized positions in step
+    record_earnings(campaign_id, {
+        int(investor_id): data['share_amount'] for investor_id, data in distribution_data.items()
+    })
+
     # Mark all revenue events as processed
     for revenue in unprocessed_revenue:
         revenue.processed = True
@@ -625,7 +644,10 @@ def get_artist_campaigns(artist_id):
         'funding_status': c.funding_status,
         'artist_id': c.artist_id,
         'artwork_url': c.artwork_url,  # 🔥 ADDED
+        'artwork_variants': c.artwork_variants,
         'audio_preview_url': c.audio_preview_url,  # 🔥 ADDED
+        'audio_duration': c.audio_duration,
+        'audio_peaks_url': c.audio_peaks_url,
         'expected_streams_3m': c.expected_streams_3m,
         'expected_revenue_3m': c.expected_revenue_3m,
         'start_date': c.start_date.isoformat() if c.start_date else None,
@@ -668,19 +690,9 @@ def upload_artwork(campaign_id):
     if not allowed_file(file.filename, 'image'):
         return jsonify({'error': 'Invalid file type. Allowed: PNG, JPG, JPEG, GIF'}), 400
     
-    # Create safe filename
-    filename = secure_filename(file.filename)
-    timestamp = int(datetime.utcnow().timestamp())
-    filename = f"campaign_{campaign_id}_{timestamp}_{filename}"
-    
-    # Save file
-    upload_folder = os.path.join('uploads', 'artwork')
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, filename)
-    file.save(filepath)
-    
-    # Update campaign
-    campaign.artwork_url = f'/uploads/artwork/{filename}'
+    # Content-addressed: re-uploading the same file reuses the stored copy
+    blob = store_stream(file.stream, secure_filename(file.filename))
+    attach_upload(campaign, 'artwork_url', blob)
     db.session.commit()
     
     return jsonify({
@@ -714,19 +726,9 @@ def upload_audio(campaign_id):
     if not allowed_file(file.filename, 'audio'):
         return jsonify({'error': 'Invalid file type. Allowed: MP3, WAV, M4A, OGG'}), 400
     
-    # Create safe filename
-    filename = secure_filename(file.filename)
-    timestamp = int(datetime.utcnow().timestamp())
-    filename = f"campaign_{campaign_id}_{timestamp}_{filename}"
-    
-    # Save file
-    upload_folder = os.path.join('uploads', 'audio')
-    os.makedirs(upload_folder, exist_ok=True)
-    filepath = os.path.join(upload_folder, filename)
-    file.save(filepath)
-    
-    # Update campaign
-    campaign.audio_preview_url = f'/uploads/audio/{filename}'
+    # Content-addressed: re-uploading the same file reuses the stored copy
+    blob = store_stream(file.stream, secure_filename(file.filename))
+    attach_upload(campaign, 'audio_preview_url', blob)
     db.session.commit()
     
     return jsonify({
@@ -736,294 +738,132 @@ def upload_audio(campaign_id):
     }), 200
 
 
-# Serve uploaded files
-@bp.route('/uploads/<path:folder>/<path:filename>')
-def serve_upload(folder, filename):
-    """Serve uploaded files"""
-    import os
-    from flask import send_from_directory, current_app
-    
-    upload_folder = os.path.join(current_app.root_path, '..', 'uploads', folder)
-    return send_from_directory(upload_folder, filename)
-
-
 @bp.route('/predict-revenue', methods=['POST'])
 def predict_revenue():
     """
     Realistic AI predictor for campaign revenue
     Uses conservative but achievable estimates based on Indian music market
+    (see app/services/revenue_model.py). Served from the prediction cache
+    (app/services/prediction_cache.py) unless an explicit `seed` is passed.
     """
-    import time
-    import random
-    import math
-    
-    data = request.get_json()
-    
-    # Input parameters
-    genre = data.get('genre', 'pop').lower()
-    marketing_budget = float(data.get('marketing_budget', 10000))
-    video_budget = float(data.get('video_budget', 10000))
-    artist_followers = int(data.get('artist_followers', 5000))
-    campaign_duration = int(data.get('campaign_duration', 3))  # months
-    viral_factor = data.get('viral_factor', 'medium')  # low, medium, high
-    
-    total_investment = marketing_budget + video_budget
-    
-    # Simulate AI "processing"
-    time.sleep(1.5)
-    
-    # Genre multipliers (Indian market focus)
-    genre_multipliers = {
-        'dhh': 1.4,      # DHH is hot right now
-        'hip-hop': 1.4,
-        'rap': 1.4,
-        'indie': 1.1,
-        'pop': 1.2,
-        'indie pop': 1.25,
-        'electronic': 0.9,
-        'rock': 0.85,
-        'classical': 0.7,
-        'bollywood': 1.5,
-        'punjabi': 1.45
-    }
-    
-    genre_factor = genre_multipliers.get(genre, 1.0)
-    
-    # Viral probability multipliers
-    viral_multipliers = {
-        'low': 0.7,
-        'medium': 1.0,
-        'high': 1.5,
-        'viral': 2.5  # "Fatega" factor
-    }
-    viral_mult = viral_multipliers.get(viral_factor, 1.0)
-    
-    # REALISTIC BASE CALCULATION
-    # Marketing effectiveness: ₹1 = 20-30 streams (with good targeting)
-    marketing_effectiveness = 25  # streams per rupee spent
-    
-    # Follower boost: Every 1000 followers = 10% boost, capped at 200%
-    follower_boost = min(2.0, 1 + (artist_followers / 10000))
-    
-    # Video quality boost (better video = more shares)
-    video_quality_boost = 1 + (video_budget / 20000)  # Up to 1.5x for ₹10k video
-    
-    # Calculate base streams (3 months)
-    base_streams = marketing_budget * marketing_effectiveness * genre_factor * follower_boost * video_quality_boost * viral_mult
-    
-    # Platform distribution (REAL Indian market - Spotify + YouTube dominate)
-    youtube_views = int(base_streams * 0.50)     # 50% YouTube (FREE = KING in India)
-    spotify_streams = int(base_streams * 0.40)   # 40% Spotify (most popular premium)
-    other_streams = int(base_streams * 0.08)     # 8% Others (JioSaavn, Gaana, Wynk)
-    apple_streams = int(base_streams * 0.02)     # 2% Apple Music (very rare)
-    
-    # Add organic growth from followers
-    organic_spotify = int(artist_followers * 3 * campaign_duration)  # Each follower = 3 streams/month
-    organic_youtube = int(artist_followers * 5 * campaign_duration)   # More YouTube engagement
-    
-    spotify_streams += organic_spotify
-    youtube_views += organic_youtube
-    
-    # Reels/Shorts potential (based on video budget and genre)
-    reel_base = (video_budget / 100) * genre_factor * viral_mult
-    reels_uses = int(reel_base * random.uniform(0.8, 1.2))  # Add some randomness
-    
-    # Revenue calculations (₹) - Indian market rates
-    spotify_rate = 0.046      # ₹ per stream
-    apple_rate = 0.25         # ₹ per stream (high rate but almost no users)
-    
-    # YouTube revenue (REALISTIC Indian music CPM)
-    # Net CPM = After YouTube's 45% cut + accounting for monetization rate
-    
-    # Base CPM depends on audience geography
-    indian_cpm = 60   # ₹60/1000 for Indian audience (conservative)
-    global_cpm = 120  # ₹120/1000 if international audience
-    
-    # Marketing budget determines reach quality
-    # Higher budget = better targeting = more global audience mix
-    if marketing_budget >= 30000:
-        # Big budget: 30% international, 70% Indian
-        effective_cpm = (indian_cpm * 0.70) + (global_cpm * 0.30)  # ~₹78
-    elif marketing_budget >= 15000:
-        # Medium budget: 15% international, 85% Indian
-        effective_cpm = (indian_cpm * 0.85) + (global_cpm * 0.15)  # ~₹69
-    else:
-        # Small budget: mostly Indian audience
-        effective_cpm = (indian_cpm * 0.95) + (global_cpm * 0.05)  # ~₹63
-    
-    # Genre boost (some genres travel better internationally)
-    if genre in ['dhh', 'hip-hop', 'rap']:
-        effective_cpm *= 1.1  # DHH has global appeal
-    elif genre in ['bollywood', 'punjabi']:
-        effective_cpm *= 1.15  # Very popular globally
-    
-    # Viral factor (viral videos get better ad placements)
-    if viral_factor == 'viral':
-        effective_cpm *= 1.2  # Better retention = better ads
-    elif viral_factor == 'high':
-        effective_cpm *= 1.1
-    
-    # Monetization rate (not all views are monetized)
-    monetization_rate = 0.85  # 85% of views have ads (ad blockers, etc.)
-    monetized_views = youtube_views * monetization_rate
-    
-    # Calculate revenue
-    youtube_revenue = (monetized_views / 1000) * effective_cpm
-    other_rate = 0.03         # ₹ per stream (JioSaavn, Gaana, Wynk average)
-    reel_rate = 0.05          # ₹ per reel use (audio)
-    
-    # Calculate revenues
-    spotify_revenue = spotify_streams * spotify_rate
-    apple_revenue = apple_streams * apple_rate
-    other_revenue = other_streams * other_rate
-    reels_revenue = reels_uses * reel_rate
-    
-    # Sync licensing (VERY RARE for indie artists)
-    # Only high-quality videos with good marketing have a chance
-    sync_deals = 0
-    sync_revenue = 0
-    
-    # Need minimum thresholds to even have a chance
-    if marketing_budget >= 20000 and video_budget >= 15000:
-        sync_base_prob = 0.02  # 2% base chance (very low)
-        
-        # Follower boost (need decent following)
-        sync_follower_boost = 0.01 if artist_followers > 50000 else 0
-        
-        # Viral boost (viral songs get noticed)
-        sync_viral_boost = 0.03 if viral_factor == 'viral' else 0.01 if viral_factor == 'high' else 0
-        
-        sync_probability = sync_base_prob + sync_follower_boost + sync_viral_boost
-        
-        # Roll the dice
-        if random.random() < sync_probability:
-            # Small indie sync deals: ₹2000-8000 (realistic)
-            sync_deals = 1  # Usually just 1 deal
-            sync_revenue = random.choice([2000, 3000, 5000, 8000])  # Fixed realistic amounts
-    elif marketing_budget >= 50000:  # Big budget might get lucky
-        if random.random() < 0.10:  # 10% chance
-            sync_deals = 1
-            sync_revenue = random.choice([5000, 10000, 15000])  # Bigger deal
-    
-    # Merchandise (REALISTIC - based on follower base, not streams)
-    # 10k followers = 2-3 merch, 50k = 5-10, 100k = 15-20
-    merch_base = int((artist_followers / 10000) * 2)  # Base: 2 sales per 10k followers
-    merch_viral_boost = 1.5 if viral_factor == 'viral' else 1.0  # Viral songs sell more merch
-    merch_random = random.uniform(0.8, 1.2)  # Add some randomness
-    merch_sales = max(0, int(merch_base * merch_viral_boost * merch_random))
-    merch_sales = min(merch_sales, 50)  # Cap at 50 for realistic numbers
-    merch_revenue = merch_sales * 800  # ₹800 per item
-    
-    # Live shows (if artist has good following)
-    show_revenue = 0
-    if artist_followers > 30000:
-        shows = campaign_duration  # 1 show per month
-        show_revenue = shows * (5000 + (artist_followers / 10))  # Base + follower bonus
-    
-    # Total revenues
-    total_streaming = spotify_revenue + apple_revenue + youtube_revenue + other_revenue
-    total_additional = reels_revenue + sync_revenue + merch_revenue + show_revenue
-    gross_revenue_3m = total_streaming + total_additional
-    
-    # 6-month projection (with growth momentum)
-    growth_factor = 2.2 if viral_factor == 'high' else 1.8
-    gross_revenue_6m = gross_revenue_3m * growth_factor
-    
-    # 12-month projection (steady state)
-    gross_revenue_12m = gross_revenue_6m * 1.8
-    
-    # Calculate returns
-    net_revenue_3m = gross_revenue_3m - total_investment
-    roi_percentage = (net_revenue_3m / total_investment * 100) if total_investment > 0 else 0
-    
-    # Break-even calculation
-    total_streams = spotify_streams + apple_streams + youtube_views + other_streams
-    avg_revenue_per_stream = gross_revenue_3m / total_streams if total_streams > 0 else 0.05
-    breakeven_streams = int(total_investment / avg_revenue_per_stream) if avg_revenue_per_stream > 0 else 0
-    
-    # Confidence score (based on multiple factors)
-    confidence_base = 65
-    confidence_marketing = min(15, marketing_budget / 1000)  # +1.5% per ₹1000
-    confidence_video = min(10, video_budget / 1000)         # +1% per ₹1000  
-    confidence_followers = min(10, artist_followers / 2000)  # +0.5% per 1000 followers
-    confidence_score = min(95, confidence_base + confidence_marketing + confidence_video + confidence_followers)
-    
-    # Investor pool (dynamic based on campaign revenue share)
-    revenue_share_pct = float(data.get('revenue_share_pct', 40))
-    revenue_share_pct = max(0.0, min(revenue_share_pct, 100.0))  # Clamp 0-100
-    investor_pool_pct = revenue_share_pct  # This is the % going to investors
-    
-    # Return prediction response
+    data = request.get_json() or {}
+    seed = data.get('seed')
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+        return jsonify({'error': 'seed must be a non-negative integer'}), 400
+
+    try:
+        if seed is None:
+            body, cached = cached_prediction(data)
+            response = {**body, 'metadata': {**body['metadata'], 'cached': cached}}
+        else:
+            version, params = current_parameters()
+            inputs = normalize_inputs(data)
+            response = prediction_response(inputs, *predict([inputs], np.random.default_rng(seed), params))
+            response['metadata'].update(seed=seed, model_version=version)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    response['metadata']['processed_at'] = datetime.utcnow().isoformat()
+    return jsonify(response), 200
+
+
+@bp.route('/optimize-budget', methods=['POST'])
+def optimize_budget_split():
+    """
+    Best marketing / video / artist fee splits of `total_budget` for the
+    given genre, followers, viral factor etc. (see app/services/budget_optimizer.py).
+    Body: total_budget, objective ('roi' | 'breakeven'), constraints
+    ({field: {min, max}}) plus the predict-revenue inputs.
+    """
+    data = request.get_json() or {}
+    if 'total_budget' not in data:
+        return jsonify({'error': 'total_budget is required'}), 400
+    version, params = current_parameters()
+    started = time.perf_counter()
+    try:
+        result = optimize_budget(data['total_budget'], normalize_inputs(data),
+                                 data.get('objective', 'roi'), data.get('constraints'), params)
+    except (ValueError, TypeError, AttributeError) as e:
+        return jsonify({'error': str(e)}), 400
+    result['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    result['model_version'] = version
+    return jsonify({'success': True, **result}), 200
+
+
+@bp.route('/predict-revenue/cache', methods=['GET'])
+@jwt_required()
+def prediction_cache_stats():
+    """Hit rate of the prediction cache (this worker's LRU and the shared backend)"""
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    return jsonify(cache_stats()), 200
+
+
+@bp.route('/predict-revenue/model', methods=['GET'])
+@jwt_required()
+def prediction_model_version():
+    """The revenue model parameter table predictions use (see `flask calibrate-model`)"""
+    user = User.query.get(int(get_jwt_identity()))
+    if not user or user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+    version, params = current_parameters()
+    active = active_version()
+    return jsonify({
+        'version': version,
+        'parameters': params,
+        'active': active.to_dict() if active is not None else None,
+    }), 200
+
+@bp.route('/predict-revenue/batch', methods=['POST'])
+def predict_revenue_batch():
+    """
+    Predict many scenarios in one vectorized call, for sensitivity charts.
+    Send either `scenarios` (a list of predict-revenue inputs) or `grid`
+    ({field: [values]}, every combination); `base` fills the other fields.
+    Each projection comes back as a matrix of `shape`, grid axes in order.
+    """
+    data = request.get_json() or {}
+    base = data.get('base') or {}
+    seed = data.get('seed')
+    if seed is None:
+        seed = secrets.randbits(32)
+    elif isinstance(seed, bool) or not isinstance(seed, int) or seed < 0:
+        return jsonify({'error': 'seed must be a non-negative integer'}), 400
+
+    try:
+        if 'grid' in data:
+            axes = data['grid']
+            if not isinstance(axes, dict) or not axes:
+                raise ValueError('grid must map field names to lists of values')
+            scenarios = grid_scenarios(base, axes)
+            shape = [len(values) for values in axes.values()]
+        elif 'scenarios' in data:
+            axes = None
+            if not isinstance(data['scenarios'], list) or not data['scenarios']:
+                raise ValueError('scenarios must be a non-empty list')
+            if len(data['scenarios']) > MAX_SCENARIOS:
+                raise ValueError(f'At most {MAX_SCENARIOS} scenarios per request')
+            scenarios = [normalize_inputs({**base, **scenario}) for scenario in data['scenarios']]
+            shape = [len(scenarios)]
+        else:
+            raise ValueError('Send scenarios or grid')
+        version, params = current_parameters()
+        _, _, projection = predict(scenarios, np.random.default_rng(seed), params)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
     return jsonify({
         'success': True,
-        'prediction': {
-            'gross_revenue_3m': round(gross_revenue_3m, 2),
-            'net_revenue_3m': round(net_revenue_3m, 2),
-            'gross_revenue_6m': round(gross_revenue_6m, 2),
-            'gross_revenue_12m': round(gross_revenue_12m, 2),
-            'roi_percentage': round(roi_percentage, 2),
-            'breakeven_streams': breakeven_streams,
-            'confidence_score': round(confidence_score, 1),
-            'total_streams_3m': total_streams
-        },
-        'breakdown': {
-            'streaming': {
-                'spotify': {
-                    'streams': spotify_streams, 
-                    'revenue': round(spotify_revenue, 2)
-                },
-                'apple_music': {
-                    'streams': apple_streams, 
-                    'revenue': round(apple_revenue, 2)
-                },
-                'youtube': {
-                    'views': youtube_views, 
-                    'revenue': round(youtube_revenue, 2)
-                },
-                'other_platforms': {
-                    'streams': other_streams, 
-                    'revenue': round(other_revenue, 2)
-                },
-                'total': round(total_streaming, 2)
-            },
-            'additional': {
-                'reels_shorts': {
-                    'uses': reels_uses, 
-                    'revenue': round(reels_revenue, 2)
-                },
-                'sync_licensing': {
-                    'deals': sync_deals,
-                    'revenue': round(sync_revenue, 2)
-                },
-                'merchandise': {
-                    'sales': merch_sales, 
-                    'revenue': round(merch_revenue, 2)
-                },
-                'live_shows': {
-                    'revenue': round(show_revenue, 2)
-                },
-                'total': round(total_additional, 2)
-            }
-        },
-        'investor_returns': {
-            'pool_percentage': investor_pool_pct,  # Already a percentage (0-100)
-            'investor_share_3m': round(gross_revenue_3m * (investor_pool_pct / 100.0), 2),
-            'investor_share_6m': round(gross_revenue_6m * (investor_pool_pct / 100.0), 2),
-            'investor_share_12m': round(gross_revenue_12m * (investor_pool_pct / 100.0), 2),
-            'min_investment': 1000,
-            'max_investment': total_investment
-        },
-        'investment': {
-            'marketing': marketing_budget,
-            'video': video_budget,
-            'total': total_investment
+        'count': len(scenarios),
+        'shape': shape,
+        # A list, so the axis order survives JSON key sorting
+        'axes': [{'field': name, 'values': values} for name, values in axes.items()] if axes else None,
+        'fields': list(PROJECTION_FIELDS),
+        'projections': {
+            field: np.round(projection[field], 2).reshape(shape).tolist() for field in PROJECTION_FIELDS
         },
         'metadata': {
-            'genre': genre,
-            'genre_factor': genre_factor,
-            'viral_factor': viral_factor,
-            'duration_months': campaign_duration,
-            'artist_followers': artist_followers,
+            'seed': seed,
+            'model_version': version,
             'processed_at': datetime.utcnow().isoformat()
         }
     }), 200
\ No newline at end of file
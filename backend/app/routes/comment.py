@@ -1,11 +1,18 @@
+import base64
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from app import db
 from app.models import Comment, User, Campaign
 from datetime import datetime
 
 bp = Blueprint('comments', __name__, url_prefix='/api/campaigns')
 
+# Comments per page of GET /api/campaigns/<id>/comments
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 # =============================
 # POST /api/campaigns/<id>/comments
 # Create a new comment
@@ -19,8 +26,7 @@ def create_comment(campaign_id):
     2. Check if the campaign exists
     3. Get the comment text from the request
     4. Create a new Comment object
-    5. Save it to the database
-    6. Return the new comment with author details
+    5. Save it to the database and return it with author details
     """
     
     # 1. Get current user
@@ -42,38 +48,28 @@ def create_comment(campaign_id):
     if len(body) > 1000:  # Limit comment length
         return jsonify({'error': 'Comment too long (max 1000 characters)'}), 400
     
-    # 4. Create new comment
+    # 4. Create new comment (author loaded up front, so nothing is re-fetched after commit)
+    author = User.query.get(user_id)
+    if not author:
+        return jsonify({'error': 'User not found'}), 404
+
     try:
         comment = Comment(
             body=body,
-            user_id=user_id,
+            user_id=author.id,
             campaign_id=campaign_id
         )
         
         db.session.add(comment)
+        db.session.flush()  # Assigns id and created_at
+        comment_data = serialize_comment(comment, author)
         db.session.commit()
         
-        # 5. Get author details to return with comment
-        author = User.query.get(user_id)
-        
-        # 6. Return success response
+        # 5. Return success response
         return jsonify({
             'success': True,
             'message': 'Comment posted successfully',
-            'comment': {
-                'id': comment.id,
-                'body': comment.body,
-                'created_at': comment.created_at.isoformat(),
-                'user_id': comment.user_id,
-                'campaign_id': comment.campaign_id,
-                'author': {
-                    'id': author.id,
-                    'name': author.name,
-                    'profile_image_url': author.profile_image_url,
-                    'role': author.role,
-                    'verified': author.verified if author.role == 'artist' else False
-                }
-            }
+            'comment': comment_data
         }), 201
         
     except Exception as e:
@@ -83,16 +79,20 @@ def create_comment(campaign_id):
 
 # =============================
 # GET /api/campaigns/<id>/comments
-# Fetch all comments for a campaign
+# Fetch a page of comments for a campaign
 # =============================
 @bp.route('/<int:campaign_id>/comments', methods=['GET'])
 def get_comments(campaign_id):
     """
     STEP-BY-STEP:
     1. Verify campaign exists
-    2. Fetch all comments for this campaign (newest first)
-    3. For each comment, include author details
-    4. Return as JSON array
+    2. Read the page size (?limit=, at most MAX_PAGE_SIZE) and ?cursor=
+    3. Fetch one page of comments (newest first) with their authors in one query
+    4. Return the page plus `next_cursor` for the following one (null on the last page)
+
+    Pages are keyed on (created_at, id) rather than an offset, so a page is
+    an index range scan on ix_comments_campaign_created_id however deep it
+    is, and comments posted meanwhile don't shift later pages.
     """
     
     # 1. Verify campaign exists
@@ -100,39 +100,43 @@ def get_comments(campaign_id):
     if not campaign:
         return jsonify({'error': 'Campaign not found'}), 404
     
-    # 2. Fetch comments (newest first)
-    comments = Comment.query.filter_by(
-        campaign_id=campaign_id
-    ).order_by(
-        Comment.created_at.desc()  # Most recent comments first
-    ).all()
-    
-    # 3. Build response with author details
-    comments_data = []
-    for comment in comments:
-        author = User.query.get(comment.user_id)
-        
-        comments_data.append({
-            'id': comment.id,
-            'body': comment.body,
-            'created_at': comment.created_at.isoformat(),
-            'user_id': comment.user_id,
-            'campaign_id': comment.campaign_id,
-            'time_ago': get_time_ago(comment.created_at),  # Human-readable time
-            'author': {
-                'id': author.id,
-                'name': author.name,
-                'profile_image_url': author.profile_image_url or get_default_avatar(author.name),
-                'role': author.role,
-                'verified': author.verified if author.role == 'artist' else False
-            }
-        })
+    # 2. Page size and position
+    limit = max(1, min(request.args.get('limit', DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after_time, after_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    
+    # 3. Fetch one more than the page to know whether another follows
+    query = Comment.query.options(
+        joinedload(Comment.author)
+    ).filter(
+        Comment.campaign_id == campaign_id
+    )
+    if cursor:
+        query = query.filter(or_(
+            Comment.created_at < after_time,
+            and_(Comment.created_at == after_time, Comment.id < after_id)
+        ))
+    comments = query.order_by(
+        Comment.created_at.desc(), Comment.id.desc()  # Most recent comments first
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(comments) > limit:
+        comments = comments[:limit]
+        next_cursor = encode_cursor(comments[-1])
     
     # 4. Return response
+    comments_data = [serialize_comment(comment, comment.author) for comment in comments]
     return jsonify({
         'success': True,
         'count': len(comments_data),
-        'comments': comments_data
+        'total': Comment.query.filter_by(campaign_id=campaign_id).count(),
+        'comments': comments_data,
+        'next_cursor': next_cursor
     }), 200
 
 
@@ -184,6 +188,46 @@ def delete_comment(comment_id):
 # HELPER FUNCTIONS
 # =============================
 
+def serialize_comment(comment, author):
+    """
+    A comment with its author's details, as returned by the endpoints above
+    """
+    return {
+        'id': comment.id,
+        'body': comment.body,
+        'created_at': comment.created_at.isoformat(),
+        'user_id': comment.user_id,
+        'campaign_id': comment.campaign_id,
+        'time_ago': get_time_ago(comment.created_at),  # Human-readable time
+        'author': {
+            'id': author.id,
+            'name': author.name,
+            'profile_image_url': author.profile_image_url or get_default_avatar(author.name),
+            'role': author.role,
+            'verified': author.verified if author.role == 'artist' else False
+        }
+    }
+
+
+def encode_cursor(comment):
+    """
+    Opaque cursor for the page after `comment`
+    """
+    raw = f"{comment.created_at.isoformat()}|{comment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    (created_at, id) from encode_cursor; ValueError if it isn't one
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, comment_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(comment_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
 def get_time_ago(dt):
     """
     Convert datetime to human-readable format like "2 hours ago"
@@ -1,31 +1,64 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import Campaign, Partition, Transaction, InvestorHolding, User
-from datetime import datetime
+from app.models import Campaign, Partition, WalletTransaction, PartitionReservation
+from app.services.inventory import (
+    check_available, take_partitions, reserve_partitions, consume_reservation, release_reservation, SoldOutError
+)
+from app.services.investments import upsert_holding
+from app.services.ledger import wallet_for, legacy_transactions
+from app.services.portfolio import investor_portfolio, investor_earnings, EARNINGS_BREAKDOWNS
+from app.services.holdings import load_holdings
+from app.services.return_distributions import return_distributions, SAMPLES, MIN_SAMPLES, MAX_SAMPLES
+from app.services.positions import record_purchase
+from app.services.rollups import portfolio_history, bucket_starts, BUCKETS, MAX_POINTS
+from datetime import datetime, date, timedelta
+import uuid
 
 bp = Blueprint('investors', __name__, url_prefix='/api')
 
 @bp.route('/campaigns/<int:campaign_id>/buy', methods=['POST'])
 @jwt_required()
 def buy_partitions(campaign_id):
-    user_id = get_jwt_identity()
+    user_id = int(get_jwt_identity())
     data = request.get_json()
     campaign = Campaign.query.get(campaign_id)
     if not campaign:
         return jsonify({'error': 'Campaign not found'}), 404
     if campaign.funding_status != 'live':
         return jsonify({'error': 'Campaign is not active'}), 400
+    reservation_id = data.get('reservation_id')
     partitions_count = data.get('partitions_count', 1)
-    if partitions_count < campaign.min_partitions_per_user:
+    if not reservation_id and (isinstance(partitions_count, bool) or not isinstance(partitions_count, int)
+                               or partitions_count < 1):
+        return jsonify({'error': 'partitions_count must be a positive integer'}), 400
+    if not reservation_id and partitions_count < campaign.min_partitions_per_user:
         return jsonify({'error': f'Minimum {campaign.min_partitions_per_user} partitions required'}), 400
+    if reservation_id:
+        reservation = PartitionReservation.query.get(reservation_id)
+        if not reservation or reservation.user_id != user_id:
+            return jsonify({'error': 'Reservation not found'}), 404
+        partitions_count = reservation.partitions
+    else:
+        # Sold out? Fail fast on the row we have, before anything is written
+        try:
+            check_available(campaign, partitions_count)
+        except SoldOutError as e:
+            db.session.rollback()
+            return jsonify({'error': e.message}), e.status_code
     amount_paid = partitions_count * campaign.partition_price
-    transaction = Transaction(
-        user_id=user_id,
-        tx_type='purchase',
+    # Paid outside the wallet: recorded in the ledger without moving the balance
+    wallet = wallet_for(user_id)
+    transaction = WalletTransaction(
+        wallet_id=wallet.id,
+        campaign_id=campaign_id,
+        transaction_type='purchase',
         amount=amount_paid,
+        balance_before=wallet.balance,
+        balance_after=wallet.balance,
         status='completed',
-        tx_reference=f'TXN_{campaign_id}_{user_id}_{int(datetime.utcnow().timestamp())}',
+        # Random suffix: the same user can buy twice within one second during a launch spike
+        tx_reference=f'TXN_{campaign_id}_{user_id}_{int(datetime.utcnow().timestamp())}_{uuid.uuid4().hex[:6]}',
         description=f'Purchase {partitions_count} partitions'
     )
     partition = Partition(
@@ -36,27 +69,67 @@ def buy_partitions(campaign_id):
         payment_transaction_id=transaction.tx_reference,
         status='confirmed'
     )
-    campaign.amount_raised += amount_paid
-    if campaign.amount_raised >= campaign.target_amount:
-        campaign.funding_status = 'funded'
-    holding = InvestorHolding(
-        campaign_id=campaign_id,
-        investor_id=user_id,
-        partitions_owned=partitions_count,
-        ownership_pct=(partitions_count / campaign.total_partitions) * campaign.revenue_share_pct
-    )
+    upsert_holding(user_id, campaign, partitions_count)
+    record_purchase(user_id, campaign, partitions_count, amount_paid)
     db.session.add(transaction)
     db.session.add(partition)
-    db.session.add(holding)
+    db.session.flush()
+    try:
+        # Inventory + amount_raised move in one conditional UPDATE (no oversell),
+        # last so the campaign row is locked only until the commit
+        if reservation_id:
+            _, campaign_row = consume_reservation(reservation_id, user_id, campaign, amount_paid, mark_funded=True)
+        else:
+            campaign_row = take_partitions(campaign, partitions_count, amount_paid, mark_funded=True)
+    except SoldOutError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
     db.session.commit()
     return jsonify({
         'message': 'Partitions purchased',
         'transaction_id': transaction.id,
         'partitions_bought': partitions_count,
         'amount_paid': amount_paid,
-        'campaign_status': campaign.funding_status
+        'campaign_status': campaign_row.funding_status
     }), 201
 
+@bp.route('/campaigns/<int:campaign_id>/reservations', methods=['POST'])
+@jwt_required()
+def reserve_campaign_partitions(campaign_id):
+    """Put a short checkout hold on partitions while the user pays"""
+    user_id = int(get_jwt_identity())
+    data = request.get_json() or {}
+    campaign = Campaign.query.get(campaign_id)
+    if not campaign:
+        return jsonify({'error': 'Campaign not found'}), 404
+    if campaign.funding_status != 'live':
+        return jsonify({'error': 'Campaign is not active'}), 400
+    partitions_count = data.get('partitions_count', 1)
+    if isinstance(partitions_count, bool) or not isinstance(partitions_count, int) or partitions_count < 1:
+        return jsonify({'error': 'partitions_count must be a positive integer'}), 400
+    if partitions_count < campaign.min_partitions_per_user:
+        return jsonify({'error': f'Minimum {campaign.min_partitions_per_user} partitions required'}), 400
+    try:
+        reservation = reserve_partitions(campaign, user_id, partitions_count)
+    except SoldOutError as e:
+        db.session.rollback()
+        return jsonify({'error': e.message}), e.status_code
+    db.session.commit()
+    return jsonify({
+        'message': 'Partitions reserved',
+        'reservation': reservation.to_dict()
+    }), 201
+
+@bp.route('/reservations/<int:reservation_id>', methods=['DELETE'])
+@jwt_required()
+def cancel_reservation(reservation_id):
+    user_id = int(get_jwt_identity())
+    if not release_reservation(reservation_id, user_id):
+        db.session.rollback()
+        return jsonify({'error': 'Reservation not found or no longer held'}), 404
+    db.session.commit()
+    return jsonify({'message': 'Reservation released'}), 200
+
 @bp.route('/users/<int:user_id>/holdings', methods=['GET'])
 @jwt_required()
 def get_user_holdings(user_id):
@@ -65,23 +138,17 @@ def get_user_holdings(user_id):
     current_user_id = int(current_user_id)
     if current_user_id != user_id:
         return jsonify({'error': 'Unauthorized'}), 403
-    holdings = InvestorHolding.query.filter_by(investor_id=user_id).all()
-    result = []
-    for holding in holdings:
-        campaign = Campaign.query.get(holding.campaign_id)
-        artist = User.query.get(campaign.artist_id)
-        result.append({
-            'holding_id': holding.id,
-            'campaign_id': holding.campaign_id,
-            'campaign_title': campaign.title,
-            'artist_name': artist.name if artist else 'Unknown',
-            'partitions_owned': holding.partitions_owned,
-            'ownership_pct': holding.ownership_pct,
-            'revenue_share_pct': campaign.revenue_share_pct,
-            'expected_revenue_3m': campaign.expected_revenue_3m,
-            'acquired_at': holding.created_at.isoformat()
-        })
-    return jsonify(result), 200
+    return jsonify([{
+        'holding_id': h.holding.id,
+        'campaign_id': h.campaign.id,
+        'campaign_title': h.campaign.title,
+        'artist_name': h.artist_name,
+        'partitions_owned': h.holding.partitions_owned,
+        'ownership_pct': h.ownership_pct,
+        'revenue_share_pct': h.campaign.revenue_share_pct,
+        'expected_revenue_3m': h.campaign.expected_revenue_3m,
+        'acquired_at': h.holding.created_at.isoformat()
+    } for h in load_holdings(user_id)]), 200
 
 @bp.route('/users/<int:user_id>/transactions', methods=['GET'])
 @jwt_required()
@@ -91,123 +158,74 @@ def get_user_transactions(user_id):
     current_user_id = int(current_user_id)
     if current_user_id != user_id:
         return jsonify({'error': 'Unauthorized'}), 403
-    transactions = Transaction.query.filter_by(user_id=user_id).order_by(Transaction.created_at.desc()).all()
-    return jsonify([{
-        'id': t.id,
-        'type': t.tx_type,
-        'amount': t.amount,
-        'status': t.status,
-        'description': t.description,
-        'created_at': t.created_at.isoformat()
-    } for t in transactions]), 200
+    return jsonify(legacy_transactions(user_id)), 200
 
 @bp.route('/users/<int:user_id>/expected-returns', methods=['GET'])
 @jwt_required()
 def get_expected_returns(user_id):
-    current_user_id = get_jwt_identity()
-    
-    # Convert to int to avoid type mismatch
-    current_user_id = int(current_user_id)
-    user_id = int(user_id)
-    
+    current_user_id = int(get_jwt_identity())
+
     # Check if this person is asking for their own data
     if current_user_id != user_id:
         return jsonify({'error': 'Unauthorized - you can only view your own returns'}), 403
-    
-    from app.models import InvestorHolding
-    
-    # Get all campaigns this investor invested in
-    holdings = InvestorHolding.query.filter_by(investor_id=user_id).all()
-    
-    # If no investments, return empty list
-    if not holdings:
-        return jsonify({
-            'user_id': user_id,
-            'total_expected_return_3m': 0,
-            'number_of_campaigns': 0,
-            'holdings_breakdown': []
-        }), 200
-    
-    # Calculate total expected return
-    total_expected = 0
-    breakdown = []
-    
-    for holding in holdings:
-        # Get the campaign details
-        campaign = Campaign.query.get(holding.campaign_id)
-        artist = User.query.get(campaign.artist_id)
-        
-        # Calculate this investor's expected return
-        if campaign.expected_revenue_3m:
-            # What % of the campaign does this investor own?
-            investor_ownership_pct = (holding.partitions_owned / campaign.total_partitions) * 100
-            
-            # What % of revenue goes to investors?
-            investor_share_pct = campaign.revenue_share_pct
-            
-            # This investor gets: (their ownership % / 100) * (investor share % / 100) * total revenue
-            expected_personal_return = (investor_ownership_pct / 100) * (investor_share_pct / 100) * campaign.expected_revenue_3m
-        else:
-            expected_personal_return = 0
-        
-        total_expected += expected_personal_return
-        
-        # Build detailed breakdown for each campaign
-        breakdown.append({
-            'holding_id': holding.id,
-            'campaign_id': campaign.id,
-            'campaign_title': campaign.title,
-            'artist_name': artist.name if artist else 'Unknown',
-            'partitions_owned': holding.partitions_owned,
-            'total_partitions_in_campaign': campaign.total_partitions,
-            'your_ownership_pct': (holding.partitions_owned / campaign.total_partitions) * 100,
-            'campaign_revenue_share_pct': campaign.revenue_share_pct,
-            'campaign_expected_revenue_3m': campaign.expected_revenue_3m,
-            'your_expected_return_3m': expected_personal_return,
-            'campaign_status': campaign.funding_status,
-            'date_invested': holding.created_at.isoformat()
-        })
-    
+
+    # Ownership and expected returns come with the holdings (app/services/positions.py):
+    # (ownership % / 100) * (investor share % / 100) * expected revenue
+    holdings = load_holdings(user_id)
+
+    breakdown = [{
+        'holding_id': h.holding.id,
+        'campaign_id': h.campaign.id,
+        'campaign_title': h.campaign.title,
+        'artist_name': h.artist_name,
+        'partitions_owned': h.holding.partitions_owned,
+        'total_partitions_in_campaign': h.campaign.total_partitions,
+        'your_ownership_pct': h.ownership_pct,
+        'campaign_revenue_share_pct': h.campaign.revenue_share_pct,
+        'campaign_expected_revenue_3m': h.campaign.expected_revenue_3m,
+        'your_expected_return_3m': h.expected_return_3m,
+        'campaign_status': h.campaign.funding_status,
+        'date_invested': h.holding.created_at.isoformat()
+    } for h in holdings]
+
     return jsonify({
         'user_id': user_id,
-        'total_expected_return_3m': total_expected,
+        'total_expected_return_3m': sum(h.expected_return_3m for h in holdings),
         'number_of_campaigns': len(holdings),
         'holdings_breakdown': breakdown
     }), 200
 
+@bp.route('/users/<int:user_id>/expected-returns/distribution', methods=['GET'])
+@jwt_required()
+def get_return_distribution(user_id):
+    """p10 / p50 / p90 of the 3 month return, per holding and for the portfolio"""
+    if int(get_jwt_identity()) != user_id:
+        return jsonify({'error': 'Unauthorized - you can only view your own returns'}), 403
+
+    samples = request.args.get('samples', SAMPLES, type=int)
+    if not MIN_SAMPLES <= samples <= MAX_SAMPLES:
+        return jsonify({'error': f'samples must be between {MIN_SAMPLES} and {MAX_SAMPLES}'}), 400
+
+    result = return_distributions(load_holdings(user_id), samples)
+    result['user_id'] = user_id
+    return jsonify(result), 200
+
 @bp.route('/investor/earnings/<int:investor_id>', methods=['GET'])
 @jwt_required()
 def get_investor_earnings(investor_id):
     current_user_id = int(get_jwt_identity())
     investor_id = int(investor_id)
-    
+
     if current_user_id != investor_id:
         return jsonify({'error': 'Unauthorized'}), 403
-    
-    from sqlalchemy import func
-    
-    # Get completed investments (money already earned)
-    actual_earnings = db.session.query(
-        func.sum(Transaction.amount)
-    ).filter(
-        Transaction.user_id == investor_id,
-        Transaction.tx_type == 'revenue_distribution',
-        Transaction.status == 'completed'
-    ).scalar() or 0
-    
-    # Get pending investments (money waiting)
-    pending_earnings = db.session.query(
-        func.sum(Transaction.amount)
-    ).filter(
-        Transaction.user_id == investor_id,
-        Transaction.tx_type == 'revenue_distribution',
-        Transaction.status == 'pending'
-    ).scalar() or 0
-    
-    return jsonify({
-        'actual_earnings': float(actual_earnings),
-        'pending_earnings': float(pending_earnings)
-    }), 200
+
+    # Optional ?breakdown=campaign|month
+    breakdown = request.args.get('breakdown')
+    if breakdown is not None and breakdown not in EARNINGS_BREAKDOWNS:
+        return jsonify({'error': f"breakdown must be one of: {', '.join(EARNINGS_BREAKDOWNS)}"}), 400
+
+    # Completed + pending in a single conditional-aggregate query
+    return jsonify(investor_earnings(investor_id, breakdown)), 200
 
 @bp.route('/investor/portfolio/<int:investor_id>', methods=['GET'])
 @jwt_required()
@@ -215,103 +233,38 @@ def get_investor_portfolio(investor_id):
     """Get complete portfolio with wallet, investments, and ROI"""
     current_user_id = int(get_jwt_identity())
     investor_id = int(investor_id)
-    
+
     if current_user_id != investor_id:
         return jsonify({'error': 'Unauthorized'}), 403
-    
-    from app.models import Wallet, WalletTransaction, InvestorHolding
-    from sqlalchemy import func
-    
-    # Get wallet data
-    wallet = Wallet.query.filter_by(user_id=investor_id).first()
-    wallet_balance = wallet.balance if wallet else 0
-    total_deposited = wallet.total_deposited if wallet else 0
-    total_invested = wallet.total_invested if wallet else 0
-    total_earnings = wallet.total_earnings if wallet else 0
-    
-    # Get holdings with campaign details
-    holdings = InvestorHolding.query.filter_by(investor_id=investor_id).all()
-    
-    holdings_detail = []
-    total_expected_returns = 0
-    
-    for holding in holdings:
-        campaign = Campaign.query.get(holding.campaign_id)
-        artist = User.query.get(campaign.artist_id)
-        
-        # Calculate investment amount for this campaign
-        partitions_invested = Partition.query.filter_by(
-            campaign_id=holding.campaign_id,
-            buyer_id=investor_id
-        ).all()
-        investment_amount = sum(p.amount_paid for p in partitions_invested)
-        
-        # Calculate actual earnings from this campaign
-        campaign_earnings = db.session.query(
-            func.sum(Transaction.amount)
-        ).filter(
-            Transaction.user_id == investor_id,
-            Transaction.tx_type == 'revenue_distribution',
-            Transaction.status == 'completed',
-            Transaction.description.contains(campaign.title)
-        ).scalar() or 0
-        
-        # Calculate expected return
-        if campaign.expected_revenue_3m:
-            investor_ownership_pct = (holding.partitions_owned / campaign.total_partitions) * 100
-            investor_share_pct = campaign.revenue_share_pct
-            expected_return = (investor_ownership_pct / 100) * (investor_share_pct / 100) * campaign.expected_revenue_3m
-        else:
-            expected_return = 0
-        
-        total_expected_returns += expected_return
-        
-        # Calculate ROI
-        roi_percentage = ((campaign_earnings / investment_amount) * 100) if investment_amount > 0 else 0
-        
-        holdings_detail.append({
-            'holding_id': holding.id,
-            'campaign_id': campaign.id,
-            'campaign_title': campaign.title,
-            'campaign_artwork_url': campaign.artwork_url,
-            'artist_name': artist.name if artist else 'Unknown',
-            'partitions_owned': holding.partitions_owned,
-            'investment_amount': investment_amount,
-            'actual_earnings': float(campaign_earnings),
-            'expected_return_3m': expected_return,
-            'roi_percentage': roi_percentage,
-            'campaign_status': campaign.funding_status,
-            'date_invested': holding.created_at.isoformat()
-        })
-    
-    # Calculate overall ROI
-    overall_roi = ((total_earnings / total_invested) * 100) if total_invested > 0 else 0
-    
-    # Get recent wallet transactions
-    recent_transactions = []
-    if wallet:
-        wallet_txs = WalletTransaction.query.filter_by(
-            wallet_id=wallet.id
-        ).order_by(WalletTransaction.created_at.desc()).limit(10).all()
-        recent_transactions = [tx.to_dict() for tx in wallet_txs]
-    
+
+    # Fixed number of grouped queries, however many holdings there are
+    return jsonify(investor_portfolio(investor_id)), 200
+
+@bp.route('/investor/portfolio/<int:investor_id>/history', methods=['GET'])
+@jwt_required()
+def get_portfolio_history(investor_id):
+    """Daily / weekly / monthly portfolio totals for charts (from the nightly rollups)"""
+    if int(get_jwt_identity()) != investor_id:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else datetime.utcnow().date()
+        start = date.fromisoformat(request.args['from']) if request.args.get('from') else end - timedelta(days=365)
+    except ValueError:
+        return jsonify({'error': 'from / to must be YYYY-MM-DD dates'}), 400
+    if start > end:
+        return jsonify({'error': 'from must be on or before to'}), 400
+
+    bucket = request.args.get('bucket', 'day')
+    if bucket not in BUCKETS:
+        return jsonify({'error': f"bucket must be one of: {', '.join(BUCKETS)}"}), 400
+    if len(bucket_starts(start, end, bucket)) > MAX_POINTS:
+        return jsonify({'error': f'Too many points - use a coarser bucket (max {MAX_POINTS})'}), 400
+
     return jsonify({
         'investor_id': investor_id,
-        'wallet': {
-            'balance': wallet_balance,
-            'total_deposited': total_deposited,
-            'total_invested': total_invested,
-            'total_earnings': total_earnings
-        },
-        'portfolio': {
-            'total_invested': total_invested,
-            'total_earnings': total_earnings,
-            'current_value': total_invested + total_earnings,
-            'overall_roi': overall_roi,
-            'number_of_campaigns': len(holdings),
-            'expected_returns_3m': total_expected_returns
-        },
-        'holdings': holdings_detail,
-        'recent_transactions': recent_transactions
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'bucket': bucket,
+        'points': portfolio_history(investor_id, start, end, bucket)
     }), 200
-
@@ -0,0 +1,101 @@
+"""
+Uploaded media: GET /uploads/<path>.
+
+Media store files (/uploads/media/..., app/services/media_store.py) are
+named by their SHA-256, so they never change: they're sent with
+`Cache-Control: public, max-age=<1 year>, immutable` and the hash as a
+strong ETag, and a revalidation is a 304. Files from before the media
+store get a short max-age. Range requests (audio seeking) get a 206.
+
+MEDIA_OFFLOAD hands the bytes to the front server, so no app worker is
+busy streaming them:
+
+- None: the app sends the file; gunicorn passes whole files to the
+  kernel with sendfile() (wsgi.file_wrapper)
+- 'x-accel': nginx serves MEDIA_ACCEL_PREFIX + <path> (X-Accel-Redirect),
+  Range included, with e.g.
+      location /_media/ { internal; alias /srv/fannybags/backend/uploads/; }
+- 'x-sendfile': Apache mod_xsendfile / lighttpd serve the absolute path
+
+The cache headers and ETag are set here in every mode.
+
+With object storage (MEDIA_STORAGE = 's3', app/services/storage.py) media
+store files aren't on this node at all: the route redirects to the
+bucket - to MEDIA_PUBLIC_BASE_URL (a public bucket or CDN; the redirect
+is cached as long as the file) or to a presigned URL (the redirect is
+cached for half its lifetime). The bucket answers Range requests and
+sends the immutable Cache-Control stored with each object.
+"""
+import mimetypes
+import os
+from urllib.parse import quote
+from flask import Blueprint, Response, abort, current_app, redirect, request, send_file
+from werkzeug.security import safe_join
+from app.services.media_store import sha_from_url
+from app.services.storage import get_storage
+
+bp = Blueprint('media', __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+LEGACY_MAX_AGE = 3600
+
+
+def _offload(full_path, path, etag, max_age):
+    response = Response(mimetype=mimetypes.guess_type(full_path)[0] or 'application/octet-stream')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    # If-None-Match is answered here; the front server does Range itself
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+
+    if current_app.config['MEDIA_OFFLOAD'] == 'x-accel':
+        response.headers['X-Accel-Redirect'] = current_app.config['MEDIA_ACCEL_PREFIX'].rstrip('/') + '/' + quote(path)
+    else:
+        response.headers['X-Sendfile'] = full_path
+    return response
+
+
+def _redirect(url):
+    response = redirect(url)
+    if current_app.config.get('MEDIA_PUBLIC_BASE_URL'):
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config.get('MEDIA_URL_TTL_SECONDS', 3600) // 2
+    return response
+
+
+@bp.route('/uploads/<path:path>')
+def serve_media(path):
+    """An uploaded file, cached by its content hash where it has one"""
+    # Dot-directories hold in-progress uploads and worker scratch files
+    if any(part.startswith('.') for part in path.split('/')):
+        abort(404)
+    sha256 = sha_from_url(f'/uploads/{path}')
+    if sha256 is not None:
+        url = get_storage().download_url(path)
+        if url is not None:
+            return _redirect(url)
+
+    full_path = safe_join(os.path.abspath(current_app.config['UPLOAD_FOLDER']), path)
+    if full_path is None or not os.path.isfile(full_path):
+        abort(404)
+
+    if sha256 is not None:
+        etag, max_age = sha256, IMMUTABLE_MAX_AGE
+    else:
+        stat = os.stat(full_path)
+        etag, max_age = f'{int(stat.st_mtime)}-{stat.st_size}', LEGACY_MAX_AGE
+
+    if current_app.config.get('MEDIA_OFFLOAD'):
+        response = _offload(full_path, path, etag, max_age)
+    else:
+        response = send_file(full_path, etag=etag, max_age=max_age, conditional=True)
+        response.accept_ranges = 'bytes'  # Werkzeug only says so when asked for a range
+    if sha256 is not None:
+        response.cache_control.immutable = True
+    return response
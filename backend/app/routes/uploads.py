@@ -0,0 +1,120 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from werkzeug.http import parse_content_range_header
+from app import db
+from app.models import User, UploadSession
+from app.services.uploads import (
+    create_session, upload_lock, write_chunk, presign_parts, received_parts, finalize_session, abort_session,
+    UploadError
+)
+
+bp = Blueprint('uploads', __name__, url_prefix='/api/uploads')
+
+
+def _own_session(upload_id):
+    session = db.session.get(UploadSession, upload_id)
+    if session is None or session.user_id != int(get_jwt_identity()):
+        raise UploadError('Upload not found', 404)
+    return session
+
+
+@bp.errorhandler(UploadError)
+def upload_error(e):
+    db.session.rollback()
+    return jsonify({'error': e.message}), e.status_code
+
+
+@bp.route('', methods=['POST'])
+@jwt_required()
+def create_upload():
+    """
+    Start a resumable upload (see app/services/uploads.py).
+    Body: kind (artwork | audio | profile_image), target_id (the campaign;
+    not needed for profile_image), filename, size in bytes, optional sha256,
+    optional direct (upload the parts straight to object storage).
+    """
+    user = User.query.get(int(get_jwt_identity()))
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+    data = request.get_json() or {}
+
+    kind = data.get('kind')
+    target_id = user.id if kind == 'profile_image' else data.get('target_id')
+    if not isinstance(target_id, int):
+        return jsonify({'error': 'target_id is required'}), 400
+
+    session = create_session(user, kind, target_id, data.get('filename'), data.get('size'), data.get('sha256'),
+                             direct=bool(data.get('direct')))
+    db.session.commit()
+    return jsonify({**session.to_dict(), 'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE']}), 201
+
+
+@bp.route('/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    """Where to resume: the next chunk starts at `offset` (direct uploads: the `parts` received)"""
+    session = _own_session(upload_id)
+    if session.storage_upload_id is not None and session.status == 'open':
+        return jsonify({**session.to_dict(), 'parts': received_parts(session)}), 200
+    return jsonify(session.to_dict()), 200
+
+
+@bp.route('/<upload_id>', methods=['PUT'])
+@jwt_required()
+def put_chunk(upload_id):
+    """
+    One chunk as the raw request body, with
+    Content-Range: bytes <start>-<end>/<size> and X-Chunk-SHA256: <hex digest>.
+    """
+    session = _own_session(upload_id)
+    content_range = parse_content_range_header(request.headers.get('Content-Range'))
+    if content_range is None or content_range.units != 'bytes' or content_range.length != session.total_size:
+        return jsonify({'error': f'Content-Range must be bytes <start>-<end>/{session.total_size}'}), 400
+    length = content_range.stop - content_range.start
+    if request.content_length != length:
+        return jsonify({'error': 'Body length does not match Content-Range'}), 400
+
+    with upload_lock(session) as f:
+        write_chunk(session, f, content_range.start, length, request.stream, request.headers.get('X-Chunk-SHA256'))
+        db.session.commit()
+    return jsonify(session.to_dict()), 200
+
+
+@bp.route('/<upload_id>/parts', methods=['POST'])
+@jwt_required()
+def sign_parts(upload_id):
+    """
+    Presigned URLs for parts of a direct upload. Body: parts, a list of
+    {part_number, sha256 (hex, of that part)}. PUT each part to its url
+    with its headers; parts are chunk_size bytes, the last one the rest.
+    """
+    session = _own_session(upload_id)
+    parts = presign_parts(session, (request.get_json() or {}).get('parts'))
+    return jsonify({'upload_id': session.id, 'parts': parts}), 200
+
+
+@bp.route('/<upload_id>/complete', methods=['POST'])
+@jwt_required()
+def complete_upload(upload_id):
+    """
+    Verify the whole file and attach it to its campaign / profile. A direct
+    upload comes back 202 'assembled': poll GET until it's 'completed' (or
+    'open' again with an `error`). Repeating a completion is harmless.
+    """
+    session = _own_session(upload_id)
+    if session.status not in ('assembled', 'verifying', 'completed'):
+        with upload_lock(session) as f:
+            finalize_session(session, f)
+            db.session.commit()
+    return jsonify({'success': True, **session.to_dict()}), 200 if session.status == 'completed' else 202
+
+
+@bp.route('/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def delete_upload(upload_id):
+    """Abort an upload and discard the received data"""
+    session = _own_session(upload_id)
+    with upload_lock(session):
+        abort_session(session)
+        db.session.commit()
+    return jsonify({'success': True, **session.to_dict()}), 200
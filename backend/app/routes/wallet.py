@@ -1,7 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from app.models import User, Wallet, WalletTransaction, Campaign, Partition, ArtistWithdrawal
+from app.models import User, Wallet, WalletTransaction, ArtistWithdrawal, WalletReconciliationRun
+from app.services.investments import place_investment, InvestmentError
+from app.services.withdrawals import review_withdrawals, WITHDRAWAL_REFERENCE_TYPE
+from app.services.reconciliation import reconciliation_summary
+from app.services.wallet_cache import get_wallet_summary
 from datetime import datetime
 
 bp = Blueprint('wallet', __name__, url_prefix='/api/wallet')
@@ -18,9 +22,9 @@ def get_or_create_wallet(user_id):
 @jwt_required()
 def get_balance():
     try:
-        user_id = get_jwt_identity()
-        wallet = get_or_create_wallet(user_id)
-        return jsonify({'success': True, 'message': 'Balance retrieved', 'data': wallet.to_dict()}), 200
+        # Read-only: no wallet row is created here (see auth.register)
+        summary = get_wallet_summary(get_jwt_identity())
+        return jsonify({'success': True, 'message': 'Balance retrieved', 'data': summary}), 200
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
 
@@ -114,12 +118,13 @@ def withdraw():
 def get_transactions():
     try:
         user_id = get_jwt_identity()
-        wallet = get_or_create_wallet(user_id)
-        
+
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
-        
-        transactions = WalletTransaction.query.filter_by(wallet_id=wallet.id).order_by(
+
+        # Join through the wallet instead of creating one - a user without
+        # a wallet simply has no transactions
+        transactions = WalletTransaction.query.join(Wallet).filter(Wallet.user_id == user_id).order_by(
             WalletTransaction.created_at.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
         
@@ -141,7 +146,7 @@ def get_transactions():
 @jwt_required()
 def invest_from_wallet():
     try:
-        user_id = get_jwt_identity()
+        user_id = int(get_jwt_identity())
         data = request.get_json()
 
         campaign_id = data.get('campaign_id')
@@ -150,137 +155,31 @@ def invest_from_wallet():
         if not campaign_id or not amount or amount <= 0:
             return jsonify({'success': False, 'message': 'Invalid investment details'}), 400
 
-        # Get investor wallet
-        wallet = get_or_create_wallet(user_id)
-
-        if wallet.balance < amount:
-            return jsonify({'success': False, 'message': f'Insufficient balance. Available: ₹{wallet.balance}'}), 400
-
-        # Get campaign
-        campaign = Campaign.query.get(campaign_id)
-        if not campaign:
-            return jsonify({'success': False, 'message': 'Campaign not found'}), 404
-
-        # Deduct from investor wallet
-        balance_before = wallet.balance
-        wallet.balance -= amount
-        wallet.total_invested += amount
-        wallet.updated_at = datetime.utcnow()
-
-        # Log investment transaction
-        transaction = WalletTransaction(
-            wallet_id=wallet.id,
-            transaction_type='investment',
-            amount=amount,
-            balance_before=balance_before,
-            balance_after=wallet.balance,
-            description=f'Investment in {campaign.title}',
-            reference_id=str(campaign_id),
-            reference_type='campaign',
-            status='completed'
-        )
-
-        # Calculate partitions
-        partitions = int(amount / campaign.partition_price)
-
-        # Create Partition
-        partition = Partition(
-            campaign_id=campaign_id,
-            buyer_id=user_id,
-            partitions_bought=partitions,
-            amount_paid=amount,
-            status='confirmed'
-        )
-
-        # Update Investor Holdings
-        from app.models import InvestorHolding
-        holding = InvestorHolding.query.filter_by(
-            campaign_id=campaign_id,
-            investor_id=user_id
-        ).first()
-
-        if holding:
-            holding.partitions_owned += partitions
-        else:
-            holding = InvestorHolding(
-                campaign_id=campaign_id,
-                investor_id=user_id,
-                partitions_owned=partitions
-            )
-            db.session.add(holding)
-
-        # Update ownership %
-        campaign.amount_raised += amount
-        total_partitions = campaign.amount_raised / campaign.partition_price if campaign.partition_price > 0 else 0
-
-        if total_partitions > 0:
-            holding.ownership_pct = (holding.partitions_owned / total_partitions) * 100
-
-        # ------------------------------------
-        # ✅ NEW: AUTO-SPLIT MONEY
-        # ------------------------------------
-        mv_budget = campaign.music_video_budget
-        marketing_budget = campaign.marketing_budget
-        artist_fee = campaign.artist_fee
-
-        total_split = mv_budget + marketing_budget + artist_fee
-
-        if total_split > 0:
-            # Scale the % distribution based on the set budgets
-            mv_cut = amount * (mv_budget / total_split)
-            marketing_cut = amount * (marketing_budget / total_split)
-            artist_cut = amount * (artist_fee / total_split)
-        else:
-            # Default: send everything to artist
-            mv_cut = 0
-            marketing_cut = 0
-            artist_cut = amount
-
-        # ------------------------------------
-        # ✅ SEND ARTIST FEE TO ARTIST WALLET
-        # ------------------------------------
-        artist_wallet = get_or_create_wallet(campaign.artist_id)
-        artist_balance_before = artist_wallet.balance
-
-        artist_wallet.balance += artist_cut
-        artist_wallet.total_earnings += artist_cut
-        artist_wallet.updated_at = datetime.utcnow()
-
-        artist_tx = WalletTransaction(
-            wallet_id=artist_wallet.id,
-            transaction_type='artist_fee',
-            amount=artist_cut,
-            balance_before=artist_balance_before,
-            balance_after=artist_wallet.balance,
-            description=f'Artist fee from investment in {campaign.title}',
-            status='completed'
-        )
-
-        db.session.add(artist_tx)
-        # ------------------------------------
-
-        db.session.add(transaction)
-        db.session.add(partition)
-        db.session.commit()
+        # Whole investment (wallets, holding, ledger, artist fee) is one transaction
+        result = place_investment(user_id, campaign_id, amount, reservation_id=data.get('reservation_id'))
+        split = result['split']
 
         return jsonify({
             'success': True,
             'message': f'Successfully invested ₹{amount}',
             'split': {
-                'music_video': round(mv_cut, 2),
-                'marketing': round(marketing_cut, 2),
-                'artist_fee': round(artist_cut, 2)
+                'music_video': round(split['music_video'], 2),
+                'marketing': round(split['marketing'], 2),
+                'artist_fee': round(split['artist_fee'], 2)
             },
             'data': {
-                'wallet': wallet.to_dict(),
-                'transaction': transaction.to_dict(),
+                'wallet': result['wallet'],
+                'transaction': result['transaction'],
                 'holding': {
-                    'partitions': holding.partitions_owned,
-                    'ownership_pct': round(holding.ownership_pct, 2) if holding.ownership_pct else 0
+                    'partitions': result['partitions_owned'],
+                    'ownership_pct': round(result['ownership_pct'], 2) if result['ownership_pct'] else 0
                 }
             }
         }), 200
 
+    except InvestmentError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': f'Investment failed: {str(e)}'}), 500
@@ -319,8 +218,10 @@ def artist_withdraw():
         amount=amount,
         status='pending'
     )
+    db.session.add(withdrawal)
+    db.session.flush()  # Get withdrawal ID
 
-    # Save wallet transaction
+    # Save wallet transaction (linked so admin review can update it in bulk)
     tx = WalletTransaction(
         wallet_id=wallet.id,
         transaction_type='artist_withdrawal',
@@ -328,10 +229,11 @@ def artist_withdraw():
         balance_before=balance_before,
         balance_after=wallet.balance,
         description='Artist payout withdrawal request',
+        reference_id=str(withdrawal.id),
+        reference_type=WITHDRAWAL_REFERENCE_TYPE,
         status='pending'
     )
 
-    db.session.add(withdrawal)
     db.session.add(tx)
     db.session.commit()
 
@@ -346,27 +248,60 @@ def artist_withdraw():
 @bp.route('/admin/withdrawals', methods=['GET'])
 @jwt_required()
 def admin_get_withdrawals():
+    """
+    Paginated withdrawal queue, newest first.
+    Query params: status, artist_id, from, to (ISO dates), page, per_page (max 100)
+    """
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
 
     if user.role != 'admin':
         return jsonify({'error': 'Admin access required'}), 403
 
-    withdrawals = ArtistWithdrawal.query.order_by(ArtistWithdrawal.created_at.desc()).all()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 100))
+    status = request.args.get('status')
+    artist_id = request.args.get('artist_id', type=int)
 
-    result = []
-    for w in withdrawals:
-        artist = User.query.get(w.artist_id)
-        result.append({
-            "id": w.id,
-            "artist_id": w.artist_id,
-            "artist_name": artist.name if artist else "Unknown",
-            "amount": w.amount,
-            "status": w.status,
-            "created_at": w.created_at.isoformat()
-        })
+    try:
+        date_from = datetime.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = datetime.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid date format'}), 400
+
+    # One joined query for the page (+ one COUNT) - no per-row artist lookups
+    query = db.session.query(ArtistWithdrawal, User.name).outerjoin(
+        User, User.id == ArtistWithdrawal.artist_id
+    )
+    if status:
+        query = query.filter(ArtistWithdrawal.status == status)
+    if artist_id:
+        query = query.filter(ArtistWithdrawal.artist_id == artist_id)
+    if date_from:
+        query = query.filter(ArtistWithdrawal.created_at >= date_from)
+    if date_to:
+        query = query.filter(ArtistWithdrawal.created_at <= date_to)
+
+    withdrawals = query.order_by(
+        ArtistWithdrawal.created_at.desc(), ArtistWithdrawal.id.desc()
+    ).paginate(page=page, per_page=per_page, error_out=False)
+
+    result = [{
+        "id": w.id,
+        "artist_id": w.artist_id,
+        "artist_name": artist_name or "Unknown",
+        "amount": w.amount,
+        "status": w.status,
+        "created_at": w.created_at.isoformat()
+    } for w, artist_name in withdrawals.items]
 
-    return jsonify({"withdrawals": result}), 200
+    return jsonify({
+        "withdrawals": result,
+        "total": withdrawals.total,
+        "pages": withdrawals.pages,
+        "current_page": withdrawals.page,
+        "per_page": withdrawals.per_page
+    }), 200
 
 
 # ================================
@@ -375,46 +310,112 @@ def admin_get_withdrawals():
 @bp.route('/admin/withdrawals/<int:withdrawal_id>/approve', methods=['POST'])
 @jwt_required()
 def admin_approve_withdrawal(withdrawal_id):
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
+    return _review_single_withdrawal(withdrawal_id, approve=True)
 
-    if user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
 
-    from app.models import ArtistWithdrawal
+# ================================
+# 🚨 ADMIN: REJECT WITHDRAWAL
+# ================================
+@bp.route('/admin/withdrawals/<int:withdrawal_id>/reject', methods=['POST'])
+@jwt_required()
+def admin_reject_withdrawal(withdrawal_id):
+    return _review_single_withdrawal(withdrawal_id, approve=False)
 
-    withdrawal = ArtistWithdrawal.query.get(withdrawal_id)
-    if not withdrawal:
-        return jsonify({'error': 'Withdrawal request not found'}), 404
 
-    withdrawal.status = "approved"
-    db.session.commit()
+# ================================
+# 🚨 ADMIN: BULK APPROVE / REJECT
+# ================================
+@bp.route('/admin/withdrawals/bulk-approve', methods=['POST'])
+@jwt_required()
+def admin_bulk_approve_withdrawals():
+    return _review_bulk_withdrawals(approve=True)
+
 
-    return jsonify({"message": "Withdrawal approved"}), 200
+@bp.route('/admin/withdrawals/bulk-reject', methods=['POST'])
+@jwt_required()
+def admin_bulk_reject_withdrawals():
+    return _review_bulk_withdrawals(approve=False)
 
 
 # ================================
-# 🚨 ADMIN: REJECT WITHDRAWAL
+# 🚨 ADMIN: WALLET RECONCILIATION SUMMARY
 # ================================
-@bp.route('/admin/withdrawals/<int:withdrawal_id>/reject', methods=['POST'])
+@bp.route('/admin/reconciliation', methods=['GET'])
 @jwt_required()
-def admin_reject_withdrawal(withdrawal_id):
+def admin_reconciliation_summary():
+    """Latest (or ?run_id=) reconciliation run. Runs come from `flask reconcile-wallets`."""
     user_id = int(get_jwt_identity())
     user = User.query.get(user_id)
 
     if user.role != 'admin':
         return jsonify({'error': 'Admin access required'}), 403
 
-    from app.models import ArtistWithdrawal
+    run_id = request.args.get('run_id', type=int)
+    if run_id:
+        run = WalletReconciliationRun.query.get(run_id)
+    else:
+        run = WalletReconciliationRun.query.filter_by(status='completed').order_by(
+            WalletReconciliationRun.id.desc()
+        ).first()
+
+    if not run:
+        return jsonify({'error': 'No reconciliation run found'}), 404
+
+    limit = min(request.args.get('limit', 100, type=int), 500)
+    return jsonify(reconciliation_summary(run, limit=limit)), 200
+
+
+MAX_BULK_WITHDRAWALS = 1000
+
+
+def _review_single_withdrawal(withdrawal_id, approve):
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+
+    if user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
 
     withdrawal = ArtistWithdrawal.query.get(withdrawal_id)
     if not withdrawal:
         return jsonify({'error': 'Withdrawal request not found'}), 404
 
-    withdrawal.status = "rejected"
+    if not review_withdrawals([withdrawal_id], approve):
+        db.session.rollback()
+        return jsonify({'error': f'Withdrawal is already {withdrawal.status}'}), 409
     db.session.commit()
 
-    return jsonify({"message": "Withdrawal rejected"}), 200
+    return jsonify({"message": "Withdrawal approved" if approve else "Withdrawal rejected"}), 200
+
+
+def _review_bulk_withdrawals(approve):
+    """Body: {"withdrawal_ids": [1, 2, 3]}"""
+    user_id = int(get_jwt_identity())
+    user = User.query.get(user_id)
+
+    if user.role != 'admin':
+        return jsonify({'error': 'Admin access required'}), 403
+
+    data = request.get_json() or {}
+    withdrawal_ids = data.get('withdrawal_ids')
 
+    if not isinstance(withdrawal_ids, list) or not withdrawal_ids:
+        return jsonify({'error': 'withdrawal_ids must be a non-empty list'}), 400
+    if len(withdrawal_ids) > MAX_BULK_WITHDRAWALS:
+        return jsonify({'error': f'At most {MAX_BULK_WITHDRAWALS} withdrawals per request'}), 400
+    try:
+        withdrawal_ids = [int(i) for i in withdrawal_ids]
+    except (TypeError, ValueError):
+        return jsonify({'error': 'withdrawal_ids must be integers'}), 400
 
+    try:
+        updated = review_withdrawals(withdrawal_ids, approve)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Bulk update failed: {str(e)}'}), 500
 
+    return jsonify({
+        "message": f"{len(updated)} withdrawals {'approved' if approve else 'rejected'}",
+        "updated_ids": updated,
+        "skipped_ids": sorted(set(withdrawal_ids) - set(updated))
+    }), 200
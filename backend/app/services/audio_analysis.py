@@ -0,0 +1,189 @@
+"""
+Waveform peaks and preview metadata for uploaded audio.
+
+The campaign page draws its player from these instead of downloading the
+preview first. Each audio preview is decoded once, by the media worker
+(app/services/media_jobs.py):
+
+- WAV (integer PCM) is read with the standard library; MP3 / OGG / M4A
+  need a local ffmpeg on the PATH, which decodes to raw samples on a pipe
+- samples are mixed down to mono and reduced READ_FRAMES at a time with
+  NumPy - the file is never in memory whole - to a min / max pair per
+  PEAK_BLOCK samples, plus the RMS and peak level
+- the pairs are merged down to at most MAX_PEAKS and stored in the media
+  store as signed bytes, min / max interleaved, scaled to +-127.
+  Campaign.audio_peaks_url points at them and Campaign.audio_metadata
+  says how much audio each pair covers.
+
+analyze_audio runs in a worker process without an app context;
+apply_audio_analysis stores its output from the worker's parent.
+"""
+import hashlib
+import math
+import os
+import secrets
+import shutil
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from app.services.media_store import store_file, attach_media, detach_media
+
+FFMPEG = shutil.which('ffmpeg')  # optional - decoder for everything but WAV
+
+ANALYSIS_RATE = 22050  # ffmpeg resamples to this; plenty for peaks and levels
+READ_FRAMES = 64 * 1024
+PEAK_BLOCK = 256
+MAX_PEAKS = 2000
+SILENCE_DB = -120.0
+
+METADATA_KEYS = ('bitrate', 'sample_rate', 'rms_db', 'peak_db', 'peak_count', 'seconds_per_peak', 'decoder')
+
+
+def _pcm_to_float(data, width):
+    """Little-endian integer PCM bytes -> float32 in [-1, 1)"""
+    if width == 1:
+        return (np.frombuffer(data, np.uint8).astype(np.float32) - 128) / 128
+    if width == 3:
+        raw = np.frombuffer(data, np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        return ((samples << 8) >> 8).astype(np.float32) / 2 ** 23
+    dtype = {2: '<i2', 4: '<i4'}[width]
+    return np.frombuffer(data, dtype).astype(np.float32) / 2 ** (8 * width - 1)
+
+
+def _wav_blocks(w):
+    channels, width = w.getnchannels(), w.getsampwidth()
+    while True:
+        data = w.readframes(READ_FRAMES)
+        if not data:
+            return
+        samples = _pcm_to_float(data, width)
+        yield samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples
+
+
+def _ffmpeg_blocks(path):
+    # stderr goes to a file: a pipe nobody reads until EOF fills up on a
+    # chatty file and blocks ffmpeg - and us, waiting for stdout
+    with tempfile.TemporaryFile() as errors:
+        process = subprocess.Popen(
+            [FFMPEG, '-v', 'error', '-nostdin', '-i', path, '-f', 'f32le', '-ac', '1', '-ar', str(ANALYSIS_RATE),
+             'pipe:1'],
+            stdout=subprocess.PIPE, stderr=errors,
+        )
+        try:
+            while True:
+                data = process.stdout.read(READ_FRAMES * 4)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 4 * 4], '<f4')
+        finally:
+            process.stdout.close()
+            if process.wait() != 0:
+                errors.seek(0)
+                stderr = errors.read(500).decode(errors='replace').strip()
+                raise RuntimeError(f'ffmpeg could not decode the file: {stderr}')
+
+
+def _closing(handle, blocks):
+    with handle:
+        yield from blocks
+
+
+def _decode(path):
+    """(sample rate, iterator of mono float32 blocks, decoder name)"""
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension == 'wav':
+        try:
+            w = wave.open(path, 'rb')
+        except wave.Error:
+            w = None  # Float or compressed WAV - ffmpeg may still read it
+        if w is not None:
+            width = w.getsampwidth()
+            if width not in (1, 2, 3, 4):
+                w.close()
+                raise ValueError(f'Unsupported WAV sample width: {width} bytes')
+            return w.getframerate(), _closing(w, _wav_blocks(w)), 'wav'
+    if FFMPEG is None:
+        raise RuntimeError(f'ffmpeg is required to analyse .{extension} audio (install it on the PATH)')
+    return ANALYSIS_RATE, _ffmpeg_blocks(path), 'ffmpeg'
+
+
+def _decibels(level):
+    return round(20 * math.log10(level), 2) if level > 0 else SILENCE_DB
+
+
+def analyze_audio(source_path, work_dir):
+    """
+    Decode the audio at `source_path`, write its peaks file into `work_dir`
+    and return the duration and metadata with 'peaks_path' / 'peaks_sha256'.
+    Runs in a worker process.
+    """
+    rate, blocks, decoder = _decode(source_path)
+
+    total, sum_squares, peak = 0, 0.0, 0.0
+    carry = np.empty(0, np.float32)
+    mins, maxs = [], []
+    for samples in blocks:
+        if not len(samples):
+            continue
+        total += len(samples)
+        sum_squares += float(np.square(samples, dtype=np.float64).sum())
+        peak = max(peak, float(np.abs(samples).max()))
+
+        samples = np.concatenate([carry, samples])
+        whole = len(samples) // PEAK_BLOCK * PEAK_BLOCK
+        frames = samples[:whole].reshape(-1, PEAK_BLOCK)
+        mins.append(frames.min(axis=1))
+        maxs.append(frames.max(axis=1))
+        carry = samples[whole:]
+    if len(carry):
+        mins.append(np.array([carry.min()]))
+        maxs.append(np.array([carry.max()]))
+    if not total:
+        raise ValueError('No audio samples decoded')
+
+    mins, maxs = np.concatenate(mins), np.concatenate(maxs)
+    group = math.ceil(len(mins) / MAX_PEAKS)
+    starts = np.arange(0, len(mins), group)
+    mins, maxs = np.minimum.reduceat(mins, starts), np.maximum.reduceat(maxs, starts)
+    peaks = np.clip(np.round(np.column_stack([mins, maxs]) * 127), -127, 127).astype(np.int8).tobytes()
+
+    os.makedirs(work_dir, exist_ok=True)
+    peaks_path = os.path.join(work_dir, f'{secrets.token_hex(16)}.peaks')
+    with open(peaks_path, 'wb') as f:
+        f.write(peaks)
+
+    duration = total / rate
+    return {
+        'duration': round(duration, 3),
+        'bitrate': round(os.path.getsize(source_path) * 8 / duration),
+        'sample_rate': rate,
+        'rms_db': _decibels(math.sqrt(sum_squares / total)),
+        'peak_db': _decibels(peak),
+        'peak_count': len(starts),
+        'seconds_per_peak': round(group * PEAK_BLOCK / rate, 6),
+        'decoder': decoder,
+        'peaks_path': peaks_path,
+        'peaks_sha256': hashlib.sha256(peaks).hexdigest(),
+    }
+
+
+def apply_audio_analysis(job, target, result):
+    """Store the peaks file and record the analysis on the campaign"""
+    blob = store_file(result['peaks_path'], result['peaks_path'], result['peaks_sha256'])
+    attach_media(target, 'audio_peaks_url', blob)
+    target.audio_duration = result['duration']
+    target.audio_metadata = {key: result[key] for key in METADATA_KEYS}
+
+
+def clear_audio_analysis(target, field):
+    """Drop the analysis of the audio `field` pointed at before"""
+    detach_media(target, 'audio_peaks_url')
+    target.audio_duration = None
+    target.audio_metadata = None
+
+
+def missing_audio_analysis(model, field):
+    """Filter for rows of `model` whose audio has not been analysed"""
+    return model.audio_peaks_url.is_(None)
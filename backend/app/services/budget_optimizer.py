@@ -0,0 +1,164 @@
+"""
+Campaign budget split optimizer.
+
+Splits a campaign's total budget into marketing, music video and artist
+fee, scoring splits on the revenue model's expected values
+(simulate_revenue with rng=None). Only marketing and video spend earn
+revenue, so the artist fee is the trade-off: for FRONTIER_POINTS fee levels
+across its allowed range, the best marketing / video split of the rest is
+found with
+
+    1. a vectorized grid of GRID_POINTS marketing amounts per fee level
+       (every fee level in one model call)
+    2. local refinement: REFINE_ROUNDS zooms into the grid cell around each
+       fee level's best point, again one model call per round
+
+The result is the frontier - artist fee against the best achievable
+objective - plus the best split overall.
+
+Objectives:
+    roi        maximize the investors' 12 month ROI
+    breakeven  minimize the months until the investors' share repays the budget
+"""
+import math
+import numpy as np
+from app.services.revenue_model import scenario_arrays, simulate_revenue, project
+
+OBJECTIVES = ('roi', 'breakeven')
+SPLIT_FIELDS = ('marketing_budget', 'video_budget', 'artist_fee')
+MAX_TOTAL_BUDGET = 1e10  # ₹ - far past any campaign; absurd budgets overflow the model
+
+FRONTIER_POINTS = 11
+GRID_POINTS = 201
+REFINE_POINTS = 41
+REFINE_ROUNDS = 3
+
+# Cumulative investor share is known at these months; past 12 it grows at the 6-12 month rate
+SHARE_MONTHS = (0, 3, 6, 12)
+MAX_BREAKEVEN_MONTHS = 120
+
+
+def _bounds(total, constraints):
+    if not isinstance(constraints, dict):
+        raise ValueError('constraints must map fields to {min, max}')
+    bounds = {}
+    for field in SPLIT_FIELDS:
+        limits = constraints.get(field) or {}
+        if not isinstance(limits, dict):
+            raise ValueError(f'Invalid {field} bounds')
+        low, high = float(limits.get('min', 0)), float(limits.get('max', total))
+        if not (math.isfinite(low) and math.isfinite(high)) or low < 0 or high < low:
+            raise ValueError(f'Invalid {field} bounds')
+        bounds[field] = (low, min(high, total))
+    if sum(low for low, _ in bounds.values()) > total or sum(high for _, high in bounds.values()) < total:
+        raise ValueError('No split of total_budget satisfies the constraints')
+    return bounds
+
+
+def _breakeven_months(shares, total):
+    """Months until the cumulative investor share (at SHARE_MONTHS) reaches `total`"""
+    months = np.full(len(total), float(MAX_BREAKEVEN_MONTHS))
+    found = np.zeros(len(total), dtype=bool)
+    for i in range(len(SHARE_MONTHS) - 1):
+        low, high = shares[i], shares[i + 1]
+        span = np.where(high > low, high - low, 1.0)
+        inside = ~found & (total > low) & (total <= high) & (high > low)
+        months = np.where(inside, SHARE_MONTHS[i] + (SHARE_MONTHS[i + 1] - SHARE_MONTHS[i]) * (total - low) / span,
+                          months)
+        found |= inside
+    low, high = shares[-2], shares[-1]
+    beyond = ~found & (high > low)
+    months = np.where(beyond, 12 + 6 * (total - high) / np.where(high > low, high - low, 1.0), months)
+    return np.minimum(months, MAX_BREAKEVEN_MONTHS)
+
+
+def _evaluate(inputs, total, marketing, video, params=None):
+    """Expected investor outcomes for arrays of (marketing, video) splits"""
+    columns = scenario_arrays([inputs], repeat=len(marketing), params=params)
+    columns['marketing_budget'], columns['video_budget'] = marketing, video
+    projection = project(columns, simulate_revenue(columns, None, params=params))
+
+    zero = np.zeros(len(marketing))
+    shares = (zero, projection['investor_share_3m'], projection['investor_share_6m'],
+              projection['investor_share_12m'])
+    return {
+        'gross_revenue_3m': projection['gross_revenue_3m'],
+        'gross_revenue_12m': projection['gross_revenue_12m'],
+        'investor_share_12m': projection['investor_share_12m'],
+        'investor_roi_12m_pct': (projection['investor_share_12m'] - total) / total * 100,
+        'breakeven_months': _breakeven_months(shares, np.full(len(marketing), total)),
+    }
+
+
+def _score(outcome, objective):
+    """Higher is better"""
+    if objective == 'roi':
+        return outcome['investor_roi_12m_pct']
+    return -outcome['breakeven_months']
+
+
+def optimize_budget(total_budget, inputs, objective='roi', constraints=None, params=None):
+    """
+    Best marketing / video / artist fee splits of `total_budget` for the
+    normalized model `inputs`. constraints: {field: {'min': ₹, 'max': ₹}};
+    params: the revenue model's parameter table (defaults when None).
+    Raises ValueError for invalid or infeasible requests.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of: {', '.join(OBJECTIVES)}")
+    total = float(total_budget)
+    if not math.isfinite(total) or total <= 0:
+        raise ValueError('total_budget must be a positive number')
+    if total > MAX_TOTAL_BUDGET:
+        raise ValueError(f'total_budget must be at most {MAX_TOTAL_BUDGET:,.0f}')
+    bounds = _bounds(total, {} if constraints is None else constraints)
+    (m_min, m_max), (v_min, v_max), (f_min, f_max) = (bounds[field] for field in SPLIT_FIELDS)
+
+    fees = np.unique(np.linspace(max(f_min, total - m_max - v_max), min(f_max, total - m_min - v_min),
+                                 FRONTIER_POINTS))
+    remaining = total - fees
+    lowest = np.maximum(m_min, remaining - v_max)
+    highest = np.minimum(m_max, remaining - v_min)
+
+    low, high = lowest, highest
+    best_marketing = lowest
+    best_score = np.full(len(fees), -np.inf)
+    evaluated = 0
+    for points in (GRID_POINTS,) + (REFINE_POINTS,) * REFINE_ROUNDS:
+        marketing = low[:, None] + (high - low)[:, None] * np.linspace(0, 1, points)
+        video = remaining[:, None] - marketing
+        score = _score(_evaluate(inputs, total, marketing.ravel(), video.ravel(), params), objective).reshape(marketing.shape)
+        evaluated += marketing.size
+
+        rows, cols = np.arange(len(fees)), score.argmax(axis=1)
+        improved = score[rows, cols] > best_score
+        best_marketing = np.where(improved, marketing[rows, cols], best_marketing)
+        best_score = np.where(improved, score[rows, cols], best_score)
+
+        step = (high - low) / (points - 1)
+        low, high = np.maximum(lowest, best_marketing - step), np.minimum(highest, best_marketing + step)
+
+    # Whole rupees
+    marketing = np.clip(np.round(best_marketing), lowest, highest)
+    video = remaining - marketing
+    outcome = _evaluate(inputs, total, marketing, video, params)
+
+    frontier = [{
+        'artist_fee': round(float(fees[i]), 2),
+        'marketing_budget': round(float(marketing[i]), 2),
+        'video_budget': round(float(video[i]), 2),
+        'gross_revenue_3m': round(float(outcome['gross_revenue_3m'][i]), 2),
+        'gross_revenue_12m': round(float(outcome['gross_revenue_12m'][i]), 2),
+        'investor_share_12m': round(float(outcome['investor_share_12m'][i]), 2),
+        'investor_roi_12m_pct': round(float(outcome['investor_roi_12m_pct'][i]), 2),
+        'breakeven_months': (round(float(outcome['breakeven_months'][i]), 1)
+                             if outcome['breakeven_months'][i] < MAX_BREAKEVEN_MONTHS else None),
+    } for i in range(len(fees))]
+
+    return {
+        'objective': objective,
+        'total_budget': total,
+        'best': frontier[int(np.argmax(_score(outcome, objective)))],
+        'frontier': frontier,
+        'evaluated': evaluated,
+    }
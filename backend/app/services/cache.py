@@ -0,0 +1,143 @@
+"""
+Small in-process caches.
+
+Each gunicorn worker has its own copy, so entries carry a TTL that bounds
+how stale another worker can be after an invalidation on this one.
+RedisCache is the same interface backed by Redis, for caches every worker
+should share; shared_cache() builds one from a config URL.
+"""
+from collections import OrderedDict
+import json
+import threading
+import time
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # optional - only needed for RedisCache
+    redis = None
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a per-entry TTL and hit/miss counters"""
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class RedisCache:
+    """
+    Cache shared by all workers through Redis. Keys and values must be
+    JSON-serializable. Redis being down reads as a miss, never an error.
+    """
+
+    def __init__(self, url, prefix, ttl=60):
+        if redis is None:
+            raise RuntimeError('redis is required for a shared cache (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, key):
+        return f'{self.prefix}:{json.dumps(key)}'
+
+    def _count(self, name):
+        try:
+            self.client.incr(f'{self.prefix}:stats:{name}')
+        except redis.RedisError:
+            pass
+
+    def get(self, key, default=None):
+        try:
+            raw = self.client.get(self._key(key))
+        except redis.RedisError:
+            raw = None
+        self._count('hits' if raw is not None else 'misses')
+        return json.loads(raw) if raw is not None else default
+
+    def set(self, key, value):
+        try:
+            self.client.set(self._key(key), json.dumps(value), ex=self.ttl)
+        except redis.RedisError:
+            pass
+
+    def pop(self, key):
+        try:
+            self.client.delete(self._key(key))
+        except redis.RedisError:
+            pass
+
+    def stats(self):
+        try:
+            hits, misses = (int(v or 0) for v in self.client.mget(
+                f'{self.prefix}:stats:hits', f'{self.prefix}:stats:misses'))
+        except redis.RedisError:
+            return {'ttl_seconds': self.ttl, 'available': False}
+        lookups = hits + misses
+        return {
+            'ttl_seconds': self.ttl,
+            'available': True,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def shared_cache(config_key, prefix, ttl):
+    """
+    The app's RedisCache for `prefix` at the URL in config[config_key],
+    created on first use. None when the URL isn't set - or when redis isn't
+    installed, which is logged once instead of failing every request.
+    """
+    caches = current_app.extensions.setdefault('shared_caches', {})
+    if prefix not in caches:
+        url = current_app.config.get(config_key)
+        if url and redis is None:
+            current_app.logger.warning('%s is set but redis is not installed (pip install redis) - '
+                                       'the %s cache is not shared', config_key, prefix)
+            url = None
+        caches[prefix] = RedisCache(url, prefix, ttl=ttl) if url else None
+    return caches[prefix]
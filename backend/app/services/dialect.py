@@ -0,0 +1,21 @@
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+
+
+def insert_for(model):
+    """
+    Return a dialect-specific INSERT for a model so callers can use
+    on_conflict_do_nothing / on_conflict_do_update (upserts).
+    Works for both SQLite (local dev) and PostgreSQL (production).
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def month_of(column):
+    """'YYYY-MM' of a datetime column, as SQL"""
+    if db.engine.dialect.name == 'postgresql':
+        return func.to_char(column, 'YYYY-MM')
+    return func.strftime('%Y-%m', column)
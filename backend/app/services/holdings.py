@@ -0,0 +1,50 @@
+"""
+Investor holdings loader shared by the holdings and expected-returns endpoints.
+
+One query loads the holdings with their campaigns and artists, and computes
+ownership and the expected 3 month return of every row in SQL - the same
+expressions the portfolio and reports use (app/services/positions.py). The
+result is memoized on flask.g, so anything that needs an investor's
+holdings more than once per request only loads them once.
+"""
+from collections import namedtuple
+from flask import g
+from sqlalchemy import select
+from sqlalchemy.orm import contains_eager
+from app import db
+from app.models import InvestorHolding, Campaign
+from app.services.positions import ownership_share, revenue_share, expected_return
+
+# revenue_share: fraction of the campaign's revenue paid to this holding
+HoldingView = namedtuple('HoldingView', 'holding campaign artist_name ownership_pct revenue_share expected_return_3m')
+
+
+def load_holdings(investor_id):
+    """List of HoldingView for the investor, oldest first."""
+    memo = g.setdefault('_holdings_by_investor', {})
+    if investor_id not in memo:
+        memo[investor_id] = _load(investor_id)
+    return memo[investor_id]
+
+
+def _load(investor_id):
+    owned = InvestorHolding.partitions_owned
+    rows = db.session.execute(
+        select(InvestorHolding, ownership_share(owned) * 100, revenue_share(owned), expected_return(owned))
+        .join(InvestorHolding.campaign)
+        .options(contains_eager(InvestorHolding.campaign).joinedload(Campaign.artist))
+        .where(InvestorHolding.investor_id == investor_id)
+        .order_by(InvestorHolding.created_at)
+    ).all()
+
+    return [
+        HoldingView(
+            holding=h,
+            campaign=h.campaign,
+            artist_name=h.campaign.artist.name if h.campaign.artist else 'Unknown',
+            ownership_pct=float(pct),
+            revenue_share=float(share),
+            expected_return_3m=float(ret),
+        )
+        for h, pct, share, ret in rows
+    ]
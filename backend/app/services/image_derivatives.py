@@ -0,0 +1,98 @@
+"""
+Resized copies of uploaded artwork and profile images.
+
+Browse pages show artwork at card size, so every image upload gets
+derivatives at DERIVATIVE_WIDTHS (never upscaled) in the modern formats
+this Pillow build can write - AVIF, WebP - plus a JPEG (PNG for
+transparent images) fallback for old browsers. They're stored in the
+media store like any upload and recorded on the campaign / user as
+{format: {width: url}}, so a list page picks the smallest that fits.
+
+render_derivatives does the pixel work and runs in a media worker process
+(app/services/media_jobs.py) without an app context; apply_derivatives
+stores its output from the worker's parent.
+"""
+import hashlib
+import io
+import os
+import secrets
+from app.services.media_store import store_file, blob_url, set_variants
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:  # optional - only needed by the media worker
+    Image = None
+
+DERIVATIVE_WIDTHS = (160, 320, 640, 1280)
+
+# Pillow save() options per format
+SAVE_OPTIONS = {
+    'avif': {'quality': 60, 'speed': 6},
+    'webp': {'quality': 80, 'method': 4},
+    'jpeg': {'quality': 82, 'optimize': True, 'progressive': True},
+    'png': {'optimize': True},
+}
+
+# Image field -> JSON column for its derivatives
+VARIANT_FIELDS = {'artwork_url': 'artwork_variants', 'profile_image_url': 'profile_image_variants'}
+
+
+def available_formats(has_alpha):
+    """Formats to write, best first; the last one is the universally supported fallback"""
+    formats = [fmt for fmt in ('avif', 'webp') if features.check(fmt)]
+    return formats + ['png' if has_alpha else 'jpeg']
+
+
+def render_derivatives(source_path, work_dir):
+    """
+    Write the derivatives of the image at `source_path` into `work_dir`.
+    Returns [{'width', 'format', 'path', 'sha256'}]. Runs in a worker process.
+    """
+    if Image is None:
+        raise RuntimeError('Pillow is required for image derivatives (pip install Pillow)')
+
+    largest = max(DERIVATIVE_WIDTHS)
+    with Image.open(source_path) as image:
+        # JPEG: let the decoder downscale by 2/4/8 while it reads
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+        image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    widths = [w for w in DERIVATIVE_WIDTHS if w <= image.width] or [image.width]
+    formats = available_formats(has_alpha)
+    os.makedirs(work_dir, exist_ok=True)
+
+    rendered = []
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+        for fmt in formats:
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt.upper(), **SAVE_OPTIONS[fmt])
+            data = buffer.getvalue()
+            path = os.path.join(work_dir, f'{secrets.token_hex(16)}.{fmt}')
+            with open(path, 'wb') as f:
+                f.write(data)
+            rendered.append({'width': width, 'format': fmt, 'path': path,
+                             'sha256': hashlib.sha256(data).hexdigest()})
+    return rendered
+
+
+def apply_derivatives(job, target, rendered):
+    """Move rendered derivatives into the media store and record them on the target"""
+    variants = {}
+    for item in rendered:
+        blob = store_file(item['path'], item['path'], item['sha256'])
+        variants.setdefault(item['format'], {})[str(item['width'])] = blob_url(blob)
+    set_variants(target, VARIANT_FIELDS[job.field], variants)
+
+
+def clear_derivatives(target, field):
+    """Drop the derivatives of the image `field` pointed at before"""
+    set_variants(target, VARIANT_FIELDS[field], None)
+
+
+def missing_derivatives(model, field):
+    """Filter for rows of `model` whose `field` image has no derivatives"""
+    return getattr(model, VARIANT_FIELDS[field]).is_(None)
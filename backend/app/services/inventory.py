@@ -0,0 +1,216 @@
+"""
+Partition inventory.
+
+Campaign.partitions_remaining is the single source of truth for what can
+still be sold. Every change to it is ONE conditional UPDATE on the campaign
+row (no SELECT ... FOR UPDATE, no read-modify-write), so thousands of
+concurrent buyers just queue briefly on that row and losers fail fast
+instead of overselling.
+
+    check_available      fail fast on the loaded campaign row, before any write
+    take_partitions      buy straight away (no hold)
+    reserve_partitions   checkout hold with a TTL
+    consume_reservation  turn a hold into a purchase
+    release_reservation  user cancels a hold
+    sweep_expired        give expired holds back (CLI / lazily when sold out)
+
+Purchases run the inventory UPDATE as their LAST statement before COMMIT,
+so the campaign row - the hottest one during a launch - is only locked for
+that instant, not while wallets, holdings and ledger rows are written.
+
+Apart from check_available's sweep, none of these commit - the caller owns
+the transaction.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, case, or_, bindparam
+from app import db
+from app.models import Campaign, PartitionReservation
+
+
+class SoldOutError(Exception):
+    """Raised when a campaign doesn't have enough partitions left"""
+
+    def __init__(self, message='Not enough partitions left in this campaign', status_code=409):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _has_room(partitions):
+    # NULL partitions_remaining = legacy campaign with no cap
+    return or_(Campaign.partitions_remaining.is_(None), Campaign.partitions_remaining >= partitions)
+
+
+def check_available(campaign, partitions):
+    """
+    Fail fast on the campaign row we already have - no write lock taken.
+    Call it before any other write; take_partitions still re-checks.
+
+    If the campaign looks sold out, expired holds might free some up, so
+    this campaign is swept once and the sweep COMMITTED on its own: the
+    restock must stick even when this purchase is rejected afterwards.
+    Raises SoldOutError.
+    """
+    if campaign.partitions_remaining is None or campaign.partitions_remaining >= partitions:
+        return
+    restocked = sweep_expired(campaign_id=campaign.id)
+    db.session.commit()  # Also expires `campaign`, so the check below re-reads it
+    if not restocked or campaign.partitions_remaining < partitions:
+        raise SoldOutError()
+
+
+def take_partitions(campaign, partitions, amount, mark_funded=False):
+    """
+    Atomically sell `partitions` and add `amount` to amount_raised.
+    Returns the updated (amount_raised, funding_status). Raises SoldOutError.
+    """
+    values = {
+        'partitions_remaining': Campaign.partitions_remaining - partitions,
+        'amount_raised': Campaign.amount_raised + amount,
+    }
+    if mark_funded:
+        values['funding_status'] = case(
+            (Campaign.amount_raised + amount >= Campaign.target_amount, 'funded'),
+            else_=Campaign.funding_status,
+        )
+
+    row = db.session.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign.id, _has_room(partitions))
+        .values(**values)
+        .returning(Campaign.amount_raised, Campaign.funding_status)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if row is None:
+        raise SoldOutError()
+    return row
+
+
+def reserve_partitions(campaign, user_id, partitions, ttl_seconds=None):
+    """Hold `partitions` for a user until the TTL runs out. Raises SoldOutError."""
+    check_available(campaign, partitions)
+
+    result = db.session.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign.id, _has_room(partitions))
+        .values(partitions_remaining=Campaign.partitions_remaining - partitions)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise SoldOutError()
+
+    if ttl_seconds is None:
+        ttl_seconds = current_app.config.get('RESERVATION_TTL_SECONDS', 300)
+
+    reservation = PartitionReservation(
+        campaign_id=campaign.id,
+        user_id=user_id,
+        partitions=partitions,
+        status='held',
+        expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+    )
+    db.session.add(reservation)
+    db.session.flush()
+    return reservation
+
+
+def consume_reservation(reservation_id, user_id, campaign, amount, mark_funded=False):
+    """
+    Turn a live hold into a purchase: the partitions are already out of
+    inventory, so only amount_raised moves. Returns (partitions, campaign row).
+    Raises SoldOutError if the hold is unknown, not the user's, or expired.
+    """
+    partitions = db.session.execute(
+        update(PartitionReservation)
+        .where(
+            PartitionReservation.id == reservation_id,
+            PartitionReservation.user_id == user_id,
+            PartitionReservation.campaign_id == campaign.id,
+            PartitionReservation.status == 'held',
+            PartitionReservation.expires_at > datetime.utcnow(),
+        )
+        .values(status='consumed')
+        .returning(PartitionReservation.partitions)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+    if partitions is None:
+        raise SoldOutError('Reservation not found or expired', 410)
+
+    values = {'amount_raised': Campaign.amount_raised + amount}
+    if mark_funded:
+        values['funding_status'] = case(
+            (Campaign.amount_raised + amount >= Campaign.target_amount, 'funded'),
+            else_=Campaign.funding_status,
+        )
+    row = db.session.execute(
+        update(Campaign)
+        .where(Campaign.id == campaign.id)
+        .values(**values)
+        .returning(Campaign.amount_raised, Campaign.funding_status)
+        .execution_options(synchronize_session=False)
+    ).one()
+    return partitions, row
+
+
+def release_reservation(reservation_id, user_id):
+    """Cancel a live hold and put its partitions back. Returns True if released."""
+    released = db.session.execute(
+        update(PartitionReservation)
+        .where(
+            PartitionReservation.id == reservation_id,
+            PartitionReservation.user_id == user_id,
+            PartitionReservation.status == 'held',
+        )
+        .values(status='released')
+        .returning(PartitionReservation.campaign_id, PartitionReservation.partitions)
+        .execution_options(synchronize_session=False)
+    ).first()
+
+    if released is None:
+        return False
+
+    _restock({released.campaign_id: released.partitions})
+    return True
+
+
+def sweep_expired(campaign_id=None, now=None):
+    """
+    Expire held reservations past their TTL and give the partitions back.
+
+    Each hold is claimed by the UPDATE ... WHERE status='held' itself, so
+    two sweepers running at once can never restock the same hold twice.
+    Returns the number of partitions returned to inventory.
+    """
+    now = now or datetime.utcnow()
+    stmt = (
+        update(PartitionReservation)
+        .where(PartitionReservation.status == 'held', PartitionReservation.expires_at <= now)
+        .values(status='expired')
+        .returning(PartitionReservation.campaign_id, PartitionReservation.partitions)
+        .execution_options(synchronize_session=False)
+    )
+    if campaign_id is not None:
+        stmt = stmt.where(PartitionReservation.campaign_id == campaign_id)
+
+    restock = defaultdict(int)
+    for row in db.session.execute(stmt):
+        restock[row.campaign_id] += row.partitions
+
+    _restock(restock)
+    return sum(restock.values())
+
+
+def _restock(partitions_by_campaign):
+    if not partitions_by_campaign:
+        return
+    table = Campaign.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.id == bindparam('campaign_id'))
+        .values(partitions_remaining=table.c.partitions_remaining + bindparam('partitions')),
+        [{'campaign_id': cid, 'partitions': n} for cid, n in partitions_by_campaign.items()],
+    )
@@ -0,0 +1,235 @@
+"""
+Wallet-funded investments.
+
+An investment runs as ONE transaction with a fixed number of statements,
+no matter whether the investor / artist wallets or the holding exist yet:
+
+    1. SELECT the campaign (a sold-out campaign is rejected here, from
+       the row in hand - see inventory.check_available)
+    2. INSERT both wallets ... ON CONFLICT DO NOTHING
+    3. UPDATE investor wallet (conditional on balance) RETURNING
+    4. UPDATE artist wallet RETURNING
+    5. INSERT holding ... ON CONFLICT DO UPDATE RETURNING
+    6. INSERT portfolio position ... ON CONFLICT DO UPDATE
+    7. INSERT partition
+    8. INSERT investor + artist wallet transactions
+       (one batched statement on PostgreSQL, two on SQLite)
+    9. UPDATE campaign inventory + amount_raised (conditional) - or consume
+       the user's reservation + UPDATE campaign. Last, so the campaign row
+       lock is only held until the COMMIT right after it.
+    + a single COMMIT
+"""
+from datetime import datetime
+from sqlalchemy import select, update, literal
+from app import db
+from app.models import Campaign, Wallet, WalletTransaction, Partition, InvestorHolding
+from app.services.dialect import insert_for
+from app.services.inventory import check_available, take_partitions, consume_reservation, SoldOutError
+from app.services.wallet_cache import mark_wallet_dirty
+from app.services.positions import record_purchase, ownership_share
+
+
+class InvestmentError(Exception):
+    """Raised when an investment can't go through (bad campaign, low balance...)"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def ensure_wallets(*user_ids):
+    """
+    Make sure every user has a wallet, using a single
+    INSERT ... ON CONFLICT (user_id) DO NOTHING.
+    Does NOT commit - the caller owns the transaction.
+    """
+    now = datetime.utcnow()
+    rows = [
+        {'user_id': uid, 'created_at': now, 'updated_at': now}
+        for uid in dict.fromkeys(user_ids)  # de-dupe, keep order
+    ]
+    stmt = insert_for(Wallet).values(rows).on_conflict_do_nothing(index_elements=['user_id'])
+    db.session.execute(stmt)
+
+
+def split_investment(campaign, amount):
+    """Split an investment into (music_video, marketing, artist_fee) cuts"""
+    mv_budget = campaign.music_video_budget or 0
+    marketing_budget = campaign.marketing_budget or 0
+    artist_fee = campaign.artist_fee or 0
+
+    total_split = mv_budget + marketing_budget + artist_fee
+
+    if total_split > 0:
+        # Scale the % distribution based on the set budgets
+        mv_cut = amount * (mv_budget / total_split)
+        marketing_cut = amount * (marketing_budget / total_split)
+        artist_cut = amount * (artist_fee / total_split)
+    else:
+        # Default: send everything to artist
+        mv_cut = 0
+        marketing_cut = 0
+        artist_cut = amount
+
+    return mv_cut, marketing_cut, artist_cut
+
+
+def place_investment(user_id, campaign_id, amount, reservation_id=None):
+    """
+    Invest `amount` from the user's wallet into a campaign.
+    If `reservation_id` is given, the partitions come from that checkout hold.
+
+    Returns a dict with the serialized investor wallet and investment
+    transaction, the holding totals and the money split.
+    Raises InvestmentError (after rolling back) when the investment is rejected.
+    """
+    campaign = db.session.get(Campaign, campaign_id)
+    if not campaign:
+        raise InvestmentError('Campaign not found', 404)
+
+    partitions = int(amount / campaign.partition_price)
+    if partitions < 1:
+        raise InvestmentError(f'Amount must cover at least one partition (₹{campaign.partition_price})')
+    mv_cut, marketing_cut, artist_cut = split_investment(campaign, amount)
+    now = datetime.utcnow()
+
+    # Sold out? Reject before wallets are touched. Reserved partitions are
+    # already out of inventory, so only direct buys are checked.
+    if not reservation_id:
+        try:
+            check_available(campaign, partitions)
+        except SoldOutError as e:
+            db.session.rollback()
+            raise InvestmentError(e.message, e.status_code)
+
+    ensure_wallets(user_id, campaign.artist_id)
+
+    # Debit investor - the WHERE clause is the balance check, so two
+    # concurrent investments can never overdraw the wallet.
+    wallet = db.session.execute(
+        update(Wallet)
+        .where(Wallet.user_id == user_id, Wallet.balance >= amount)
+        .values(
+            balance=Wallet.balance - amount,
+            total_invested=Wallet.total_invested + amount,
+            updated_at=now,
+        )
+        .returning(Wallet)
+        .execution_options(synchronize_session=False)
+    ).scalars().first()
+
+    if wallet is None:
+        db.session.rollback()
+        available = db.session.execute(
+            select(Wallet.balance).where(Wallet.user_id == user_id)
+        ).scalar() or 0
+        raise InvestmentError(f'Insufficient balance. Available: ₹{available}')
+
+    # Credit artist fee
+    artist_wallet = db.session.execute(
+        update(Wallet)
+        .where(Wallet.user_id == campaign.artist_id)
+        .values(
+            balance=Wallet.balance + artist_cut,
+            total_earnings=Wallet.total_earnings + artist_cut,
+            updated_at=now,
+        )
+        .returning(Wallet.id, Wallet.balance)
+        .execution_options(synchronize_session=False)
+    ).one()
+
+    mark_wallet_dirty(user_id, campaign.artist_id)
+
+    holding = upsert_holding(user_id, campaign, partitions, now)
+    record_purchase(user_id, campaign, partitions, amount, now)
+
+    transaction = WalletTransaction(
+        wallet_id=wallet.id,
+        campaign_id=campaign.id,
+        transaction_type='investment',
+        amount=amount,
+        balance_before=wallet.balance + amount,
+        balance_after=wallet.balance,
+        description=f'Investment in {campaign.title}',
+        reference_id=str(campaign.id),
+        reference_type='campaign',
+        status='completed',
+        created_at=now,
+    )
+    artist_tx = WalletTransaction(
+        wallet_id=artist_wallet.id,
+        campaign_id=campaign.id,
+        transaction_type='artist_fee',
+        amount=artist_cut,
+        balance_before=artist_wallet.balance - artist_cut,
+        balance_after=artist_wallet.balance,
+        description=f'Artist fee from investment in {campaign.title}',
+        status='completed',
+        created_at=now,
+    )
+    partition = Partition(
+        campaign_id=campaign.id,
+        buyer_id=user_id,
+        partitions_bought=partitions,
+        amount_paid=amount,
+        status='confirmed',
+        created_at=now,
+    )
+    db.session.add_all([transaction, artist_tx, partition])
+    db.session.flush()
+
+    # Inventory last: the campaign row stays locked only until the commit below
+    try:
+        if reservation_id:
+            reserved, _ = consume_reservation(reservation_id, user_id, campaign, amount)
+            if reserved != partitions:
+                db.session.rollback()
+                raise InvestmentError(f'Reservation is for {reserved} partitions, amount covers {partitions}')
+        else:
+            take_partitions(campaign, partitions, amount)
+    except SoldOutError as e:
+        db.session.rollback()
+        raise InvestmentError(e.message, e.status_code)
+
+    # Serialize before commit so nothing gets lazily re-loaded afterwards
+    result = {
+        'wallet': wallet.to_dict(),
+        'transaction': transaction.to_dict(),
+        'partitions_owned': holding.partitions_owned,
+        'ownership_pct': holding.ownership_pct,
+        'split': {
+            'music_video': mv_cut,
+            'marketing': marketing_cut,
+            'artist_fee': artist_cut,
+        },
+    }
+    db.session.commit()
+    return result
+
+
+def upsert_holding(user_id, campaign, partitions, now=None):
+    """
+    Add partitions to the user's holding in one INSERT ... ON CONFLICT DO UPDATE.
+    Ownership is measured against the campaign's fixed partition supply, so
+    it's computed in the same statement. Returns (partitions_owned, ownership_pct).
+    """
+    total_partitions = literal(campaign.total_partitions or 0)
+    holding_insert = insert_for(InvestorHolding).values(
+        campaign_id=campaign.id,
+        investor_id=user_id,
+        partitions_owned=partitions,
+        ownership_pct=ownership_share(literal(partitions), total_partitions) * 100,
+        created_at=now or datetime.utcnow(),
+    )
+    partitions_owned = InvestorHolding.partitions_owned + holding_insert.excluded.partitions_owned
+    return db.session.execute(
+        holding_insert.on_conflict_do_update(
+            index_elements=['investor_id', 'campaign_id'],
+            set_={
+                'partitions_owned': partitions_owned,
+                'ownership_pct': ownership_share(partitions_owned, total_partitions) * 100,
+            },
+        ).returning(InvestorHolding.partitions_owned, InvestorHolding.ownership_pct)
+    ).one()
+
@@ -0,0 +1,58 @@
+"""
+Unified money ledger.
+
+wallet_transactions is the one ledger: every money movement is written as
+exactly one row. Partition purchases and revenue shares used to go to the
+legacy `transactions` table instead (and investor payouts to both); those
+now map onto ledger types:
+
+    legacy tx_type          ledger transaction_type
+    purchase                purchase        card-paid partitions, no wallet effect
+    revenue_distribution    payout          investor share, credited to the wallet
+                            artist_revenue  artist share, not credited to the wallet
+
+The rows already in `transactions` are folded in by migration c6e2f9a4b718.
+legacy_transactions() reads the ledger back in the old tx_type shape for
+clients of /users/<id>/transactions.
+"""
+from sqlalchemy import select
+from app import db
+from app.models import Wallet, WalletTransaction
+
+LEGACY_TYPES = {
+    'purchase': 'purchase',
+    'payout': 'revenue_distribution',
+    'artist_revenue': 'revenue_distribution',
+}
+
+# Ledger types that were 'revenue_distribution' in the legacy table
+REVENUE_TYPES = ('payout', 'artist_revenue')
+
+
+def wallet_for(user_id):
+    """The user's wallet, created (and flushed) if they don't have one yet"""
+    wallet = Wallet.query.filter_by(user_id=user_id).first()
+    if not wallet:
+        wallet = Wallet(user_id=user_id)
+        db.session.add(wallet)
+        db.session.flush()
+    return wallet
+
+
+def legacy_transactions(user_id):
+    """The user's purchases and revenue shares, newest first, in the legacy row shape"""
+    rows = db.session.execute(
+        select(WalletTransaction.id, WalletTransaction.transaction_type, WalletTransaction.amount,
+               WalletTransaction.status, WalletTransaction.description, WalletTransaction.created_at)
+        .join(Wallet, Wallet.id == WalletTransaction.wallet_id)
+        .where(Wallet.user_id == user_id, WalletTransaction.transaction_type.in_(LEGACY_TYPES))
+        .order_by(WalletTransaction.created_at.desc())
+    ).all()
+    return [{
+        'id': r.id,
+        'type': LEGACY_TYPES[r.transaction_type],
+        'amount': r.amount,
+        'status': r.status,
+        'description': r.description,
+        'created_at': r.created_at.isoformat()
+    } for r in rows]
@@ -0,0 +1,232 @@
+"""
+Background work on uploaded media.
+
+An upload only stores the file and queues a MediaJob (attach_upload); the
+slow part - image derivatives, audio waveform analysis - runs in `flask media-worker`, off the
+request path:
+
+- a batch of jobs is claimed with one conditional UPDATE, so several
+  workers never run the same job; a job left 'running' by a worker that
+  died is claimed again after RUNNING_TIMEOUT, up to MAX_ATTEMPTS
+- each job's render function runs in a process pool (workers=0:
+  in-process) and only sees file paths, writing its output to a
+  per-job directory under media/.tmp
+- the parent stores the output and marks the job done - unless the
+  campaign / user has moved on to another file meanwhile, which makes the
+  job 'stale'
+
+The worker also finishes direct uploads to object storage (hashing and
+moving the assembled object, see app/services/uploads.py).
+
+JOB_TYPES maps a job type to its render / apply functions, `reset` (drop
+the results for the previous file) and `missing` (a filter for rows that
+have no results yet, for `flask enqueue-media-jobs`).
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+import os
+import shutil
+import time
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from app import db
+from app.models import Campaign, User, MediaBlob, MediaJob
+from app.services.media_store import MEDIA_REFERENCES, attach_media, blob_key, sha_from_url
+from app.services.storage import get_storage
+from app.services.image_derivatives import (
+    render_derivatives, apply_derivatives, clear_derivatives, missing_derivatives
+)
+from app.services.audio_analysis import (
+    analyze_audio, apply_audio_analysis, clear_audio_analysis, missing_audio_analysis
+)
+
+JOB_TYPES = {
+    'image_derivatives': {
+        'render': render_derivatives, 'apply': apply_derivatives,
+        'reset': clear_derivatives, 'missing': missing_derivatives,
+    },
+    'audio_analysis': {
+        'render': analyze_audio, 'apply': apply_audio_analysis,
+        'reset': clear_audio_analysis, 'missing': missing_audio_analysis,
+    },
+}
+
+# Media URL column -> the job a new file in it needs
+FIELD_JOBS = {
+    'artwork_url': 'image_derivatives',
+    'audio_preview_url': 'audio_analysis',
+    'profile_image_url': 'image_derivatives',
+}
+
+TARGET_TYPES = {'campaign': Campaign, 'user': User}
+TARGET_NAMES = {model: name for name, model in TARGET_TYPES.items()}
+
+BATCH_SIZE = 16
+MAX_ATTEMPTS = 3
+RUNNING_TIMEOUT = timedelta(minutes=10)
+POLL_SECONDS = 2
+
+
+def enqueue_job(target, field, sha256):
+    """Queue the FIELD_JOBS job for the blob `sha256` in target.<field>"""
+    job = MediaJob(job_type=FIELD_JOBS[field], target_type=TARGET_NAMES[type(target)], target_id=target.id,
+                   field=field, source_sha256=sha256, status='queued', attempts=0)
+    db.session.add(job)
+    return job
+
+
+def attach_upload(target, field, blob):
+    """attach_media, plus queueing the background work a new file needs. Returns the URL."""
+    previous = getattr(target, field)
+    url = attach_media(target, field, blob)
+    if url != previous and field in FIELD_JOBS:
+        JOB_TYPES[FIELD_JOBS[field]]['reset'](target, field)
+        enqueue_job(target, field, blob.sha256)
+    return url
+
+
+def enqueue_missing():
+    """Queue jobs for media that has no results and no pending job (backfill). Returns how many."""
+    queued = 0
+    for model, field in MEDIA_REFERENCES:
+        if field not in FIELD_JOBS:
+            continue
+        column = getattr(model, field)
+        pending = db.session.query(MediaJob.id).filter(
+            MediaJob.target_type == TARGET_NAMES[model], MediaJob.target_id == model.id,
+            MediaJob.field == field, MediaJob.status.in_(('queued', 'running')),
+        )
+        rows = model.query.filter(
+            column.like('/uploads/media/%'), JOB_TYPES[FIELD_JOBS[field]]['missing'](model, field), ~pending.exists()
+        ).all()
+        for row in rows:
+            enqueue_job(row, field, sha_from_url(getattr(row, field)))
+            queued += 1
+    return queued
+
+
+def claim_jobs(limit=BATCH_SIZE, now=None):
+    """
+    Mark up to `limit` queued (or abandoned) jobs as running for this
+    worker and return them. Jobs abandoned MAX_ATTEMPTS times fail.
+    """
+    now = now or datetime.utcnow()
+    abandoned = and_(MediaJob.status == 'running', MediaJob.started_at < now - RUNNING_TIMEOUT)
+    db.session.execute(
+        update(MediaJob).where(abandoned, MediaJob.attempts >= MAX_ATTEMPTS).values(
+            status='failed', finished_at=now, error='Worker did not finish the job',
+        ).execution_options(synchronize_session=False)
+    )
+
+    claimable = or_(MediaJob.status == 'queued', abandoned)
+    ids = [job_id for (job_id,) in
+           db.session.query(MediaJob.id).filter(claimable).order_by(MediaJob.id).limit(limit)]
+    if not ids:
+        return []
+    # Re-checked in the UPDATE: another worker may have claimed some of them since
+    claimed = db.session.execute(
+        update(MediaJob).where(MediaJob.id.in_(ids), claimable).values(
+            status='running', started_at=now, attempts=MediaJob.attempts + 1,
+        ).returning(MediaJob.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.expire_all()
+    return MediaJob.query.filter(MediaJob.id.in_(claimed)).order_by(MediaJob.id).all()
+
+
+def _current(job):
+    """(target, source blob), or (target, None) if target.<field> no longer points at the job's blob"""
+    target = db.session.get(TARGET_TYPES[job.target_type], job.target_id)
+    if target is None or sha_from_url(getattr(target, job.field)) != job.source_sha256:
+        return target, None
+    return target, db.session.get(MediaBlob, job.source_sha256)
+
+
+def _finish(job, status, error=None):
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.utcnow()
+
+
+def _submit(pool, fn, *args):
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def process_batch(pool=None, batch_size=BATCH_SIZE):
+    """Claim, render and apply one batch of jobs. Returns how many were claimed."""
+    jobs = claim_jobs(batch_size)
+    db.session.commit()
+
+    tmp_dir = os.path.join(current_app.config['UPLOAD_FOLDER'], 'media', '.tmp')
+    futures = {}
+    for job in jobs:
+        _, blob = _current(job)
+        if blob is None:
+            _finish(job, 'stale')
+            continue
+        work_dir = os.path.join(tmp_dir, f'job-{job.id}')
+        try:
+            # Object storage: the render process gets a downloaded copy in its work dir
+            source = get_storage().local_copy(blob_key(blob), work_dir)
+        except Exception as e:
+            future = Future()
+            future.set_exception(e)
+        else:
+            future = _submit(pool, JOB_TYPES[job.job_type]['render'], source, work_dir)
+        futures[job.id] = (work_dir, future)
+    db.session.commit()
+
+    for job in jobs:
+        if job.id not in futures:
+            continue
+        work_dir, future = futures[job.id]
+        try:
+            result = future.result()
+            # The upload may have been replaced while rendering
+            target, blob = _current(job)
+            if blob is None:
+                _finish(job, 'stale')
+            else:
+                JOB_TYPES[job.job_type]['apply'](job, target, result)
+                _finish(job, 'done')
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Media job %s failed', job.id)
+            if job.attempts >= MAX_ATTEMPTS:
+                _finish(job, 'failed', str(e)[:1000])
+            else:
+                job.status, job.error = 'queued', str(e)[:1000]
+            db.session.commit()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    return len(jobs)
+
+
+def run_media_worker(workers=None, batch_size=BATCH_SIZE, once=False, poll_seconds=POLL_SECONDS):
+    """
+    Process media jobs until interrupted, or with once=True until the queue
+    is empty. workers=0 renders in-process. Returns how many jobs were claimed.
+    """
+    # uploads imports this module (attach_upload)
+    from app.services.uploads import process_direct_uploads
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    processed = 0
+    try:
+        while True:
+            claimed = process_batch(pool, batch_size) + process_direct_uploads()
+            processed += claimed
+            if not claimed:
+                if once:
+                    return processed
+                time.sleep(poll_seconds)
+    finally:
+        if pool is not None:
+            pool.shutdown()
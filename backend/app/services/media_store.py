@@ -0,0 +1,279 @@
+"""
+Content-addressed media store.
+
+Every uploaded file is stored once, named by its SHA-256 (computed while
+the upload streams to disk), under the storage key
+
+    media/<first 2 hex chars>/<sha256>.<ext>
+
+in the MEDIA_STORAGE backend (app/services/storage.py - local disk or an
+S3-compatible bucket) and served at /uploads/<key>. A URL always means
+the same bytes and never changes - safe to cache forever - and uploading
+the same file again just points at the existing blob. MediaBlob.ref_count
+counts the URL columns (MEDIA_REFERENCES) and the URLs in variant columns
+(MEDIA_VARIANT_REFERENCES - derivatives such as thumbnails) that point at
+a blob; attach_media / set_variants keep it up to date when a campaign or
+profile switches files.
+
+`flask gc-media` recounts the references from those columns (fixing any
+drift, e.g. from deleted campaigns) and deletes blobs that have been
+unreferenced for MEDIA_GC_GRACE_SECONDS. The grace period covers files
+stored but not attached yet. The blob rows are deleted before their files
+and the files are only deleted inside that transaction, while a
+concurrent store of the same content waits on the row - so a blob that
+was just re-uploaded is never deleted under it. A store puts the file in
+place before the caller commits, so a rolled-back store leaves a file
+without a row: gc-media also deletes files under media/ that have no blob
+row and are older than the grace period (a store in progress wrote its
+file moments ago).
+
+Nothing here commits - the caller owns the transaction.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+import hashlib
+import os
+import re
+import secrets
+from flask import current_app
+from sqlalchemy import update, delete, case
+from app import db
+from app.models import Campaign, User, MediaBlob
+from app.services.dialect import insert_for
+from app.services.storage import get_storage
+
+BLOCK_SIZE = 64 * 1024
+
+# Columns holding media URLs: (model, column name)
+MEDIA_REFERENCES = (
+    (Campaign, 'artwork_url'),
+    (Campaign, 'audio_preview_url'),
+    (Campaign, 'audio_peaks_url'),
+    (User, 'profile_image_url'),
+)
+
+# JSON columns of derivative URLs, {format: {width: url}}
+MEDIA_VARIANT_REFERENCES = (
+    (Campaign, 'artwork_variants'),
+    (User, 'profile_image_variants'),
+)
+
+MEDIA_URL = re.compile(r'^/uploads/media/[0-9a-f]{2}/([0-9a-f]{64})(?:\.\w+)?$')
+
+
+def _scratch_dir():
+    """Local staging for files being stored (same filesystem as a LocalStorage)"""
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], 'media', '.tmp')
+
+
+def _extension(filename):
+    return filename.rsplit('.', 1)[1].lower()[:10] if filename and '.' in filename else ''
+
+
+def _key(sha256, extension):
+    return f'media/{sha256[:2]}/{sha256}' + (f'.{extension}' if extension else '')
+
+
+def blob_key(blob):
+    """The blob's key in the storage backend"""
+    return _key(blob.sha256, blob.extension)
+
+
+def blob_url(blob):
+    return f'/uploads/{blob_key(blob)}'
+
+
+def sha_from_url(url):
+    """The blob SHA-256 a media URL points at, or None for anything else"""
+    match = MEDIA_URL.match(url or '')
+    return match.group(1) if match else None
+
+
+def _record(sha256, size, filename):
+    """Upsert the blob row; the caller puts the file in place afterwards"""
+    now = datetime.utcnow()
+    stmt = insert_for(MediaBlob).values(
+        sha256=sha256, size=size, extension=_extension(filename), ref_count=0,
+        unreferenced_since=now, created_at=now,
+    )
+    # An unreferenced blob gets a fresh grace period to be attached in
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['sha256'],
+        set_={'unreferenced_since': case((MediaBlob.ref_count <= 0, now), else_=None)},
+    ))
+    return db.session.get(MediaBlob, sha256)
+
+
+def _place(tmp_path, sha256, size, filename):
+    """Record the blob and move `tmp_path` into storage (or drop it if the blob exists)"""
+    blob = _record(sha256, size, filename)
+    storage = get_storage()
+    if storage.exists(blob_key(blob)):
+        os.remove(tmp_path)
+    else:
+        storage.put_file(blob_key(blob), tmp_path)
+    return blob
+
+
+def store_stream(stream, filename):
+    """Store a file-like object, hashing it as it's written. Returns the MediaBlob."""
+    tmp_dir = _scratch_dir()
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, secrets.token_hex(16))
+
+    digest, size = hashlib.sha256(), 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                f.write(block)
+                digest.update(block)
+                size += len(block)
+        return _place(tmp_path, digest.hexdigest(), size, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def store_file(path, filename, sha256):
+    """Move an already hashed local file (under UPLOAD_FOLDER) into the store"""
+    return _place(path, sha256, os.path.getsize(path), filename)
+
+
+def store_object(key, sha256, size, filename):
+    """Move an already hashed object from another key of the storage backend into the store"""
+    blob = _record(sha256, size, filename)
+    storage = get_storage()
+    if storage.exists(blob_key(blob)):
+        storage.delete(key)
+    else:
+        storage.move(key, blob_key(blob))
+    return blob
+
+
+def _adjust_refs(sha256, delta):
+    count = MediaBlob.ref_count + delta
+    db.session.execute(
+        update(MediaBlob).where(MediaBlob.sha256 == sha256).values(
+            ref_count=count,
+            unreferenced_since=case((count <= 0, datetime.utcnow()), else_=None),
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def attach_media(target, field, blob):
+    """Point target.<field> at `blob`, moving a reference off the old blob. Returns the URL."""
+    old_sha, url = sha_from_url(getattr(target, field)), blob_url(blob)
+    if old_sha != blob.sha256:
+        _adjust_refs(blob.sha256, +1)
+        if old_sha is not None:
+            _adjust_refs(old_sha, -1)
+    setattr(target, field, url)
+    return url
+
+
+def detach_media(target, field):
+    """Clear target.<field>, dropping its reference on the blob"""
+    old_sha = sha_from_url(getattr(target, field))
+    if old_sha is not None:
+        _adjust_refs(old_sha, -1)
+    setattr(target, field, None)
+
+
+def _variant_shas(variants):
+    urls = (url for by_width in (variants or {}).values() for url in by_width.values())
+    return Counter(sha for sha in map(sha_from_url, urls) if sha is not None)
+
+
+def set_variants(target, field, variants):
+    """Replace target.<field> (derivative URLs, or None), moving blob references to match"""
+    old, new = _variant_shas(getattr(target, field)), _variant_shas(variants)
+    for sha in old | new:
+        if new[sha] != old[sha]:
+            _adjust_refs(sha, new[sha] - old[sha])
+    setattr(target, field, variants)
+
+
+def _referenced_counts():
+    counts = Counter()
+    for model, field in MEDIA_REFERENCES:
+        column = getattr(model, field)
+        for (url,) in db.session.query(column).filter(column.like('/uploads/media/%')).yield_per(5000):
+            sha = sha_from_url(url)
+            if sha is not None:
+                counts[sha] += 1
+    for model, field in MEDIA_VARIANT_REFERENCES:
+        column = getattr(model, field)
+        for (variants,) in db.session.query(column).filter(column.isnot(None)).yield_per(5000):
+            counts.update(_variant_shas(variants))
+    return counts
+
+
+def collect_garbage(grace_seconds=None, now=None):
+    """
+    Recount blob references and delete blobs unreferenced for longer than
+    the grace period. Returns {'recounted', 'deleted', 'bytes_freed'}.
+    """
+    now = now or datetime.utcnow()
+    if grace_seconds is None:
+        grace_seconds = current_app.config.get('MEDIA_GC_GRACE_SECONDS', 24 * 3600)
+
+    counts = _referenced_counts()
+    recounted = 0
+    for sha256, ref_count in db.session.query(MediaBlob.sha256, MediaBlob.ref_count).all():
+        expected = counts.get(sha256, 0)
+        if ref_count != expected:
+            recounted += 1
+            _adjust_refs(sha256, expected - ref_count)
+    db.session.expire_all()
+
+    deleted = db.session.execute(
+        delete(MediaBlob).where(
+            MediaBlob.ref_count <= 0,
+            MediaBlob.unreferenced_since < now - timedelta(seconds=grace_seconds),
+        ).returning(MediaBlob.sha256, MediaBlob.extension, MediaBlob.size)
+    ).all()
+    storage = get_storage()
+    for sha256, extension, _ in deleted:
+        storage.delete(_key(sha256, extension))
+    orphans = _delete_orphans(storage, now - timedelta(seconds=grace_seconds))
+    return {
+        'recounted': recounted,
+        'deleted': len(deleted),
+        'orphans': len(orphans),
+        'bytes_freed': sum(size for *_, size in deleted) + sum(orphans),
+    }
+
+
+def _delete_orphans(storage, cutoff):
+    """Delete files under media/ last written before `cutoff` that no blob row owns. Returns their sizes."""
+    keys = {_key(sha256, extension) for sha256, extension in db.session.query(MediaBlob.sha256, MediaBlob.extension)}
+    sizes = []
+    for key, size, modified in list(storage.list('media/')):
+        if modified < cutoff and key not in keys:
+            storage.delete(key)
+            sizes.append(size)
+    return sizes
+
+
+def import_legacy_media():
+    """
+    Move files uploaded before the media store (/uploads/<folder>/<name>)
+    into it and repoint their URLs. Returns (URLs repointed, distinct blobs,
+    legacy file paths) - delete the legacy files once this is committed.
+    """
+    upload_folder = current_app.config['UPLOAD_FOLDER']
+    imported, blobs, moved = 0, set(), set()
+    for model, field in MEDIA_REFERENCES:
+        column = getattr(model, field)
+        rows = model.query.filter(column.like('/uploads/%'), ~column.like('/uploads/media/%')).all()
+        for row in rows:
+            path = os.path.join(upload_folder, getattr(row, field)[len('/uploads/'):])
+            if not os.path.isfile(path):
+                continue
+            with open(path, 'rb') as f:
+                blob = store_stream(f, path)
+            attach_media(row, field, blob)
+            imported += 1
+            blobs.add(blob.sha256)
+            moved.add(path)
+    return imported, len(blobs), sorted(moved)
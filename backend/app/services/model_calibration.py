@@ -0,0 +1,254 @@
+"""
+Revenue model calibration.
+
+`flask calibrate-model` fits the revenue model's parameter table (genre
+multipliers, streams per rupee, CPM tiers - see
+revenue_model.DEFAULT_PARAMETERS) to realized revenue and stores it as a
+new RevenueModelVersion. A campaign counts once its first 3 months are
+over (from release_date, else campaign_start_date / start_date /
+created_at) and RevenueEvents landed in that window. Inputs the campaign
+doesn't store (followers, viral factor, duration) take the predictor's
+defaults, and the random elements their expected values.
+
+The model is linear in each parameter group once the others are fixed, so
+every step is one np.linalg.lstsq over all campaigns, with one column per
+parameter (a campaign only has a non-zero entry in its own genre / tier
+column):
+
+    1. genre multipliers from non-YouTube revenue. Campaigns whose revenue
+       isn't split by platform (source 'manual') are fitted on their total,
+       with YouTube at the current CPMs.
+    2. CPM tiers from YouTube revenue, with the multipliers from step 1.
+
+repeated FIT_ROUNDS times. Streams per rupee only ever appears multiplied
+by a genre multiplier, so it carries their campaign-weighted average: the
+fitted multipliers are rescaled to average their previous values and the
+level moves into marketing_effectiveness. Genres and tiers with fewer than
+MIN_CAMPAIGNS campaigns keep their current values.
+
+Each worker holds the active table in memory (current_parameters) and
+checks which version is active at most every POLL_SECONDS, so activating
+a version - or rolling back with activate_version - reaches running
+workers without a restart. Version 0 is the built-in DEFAULT_PARAMETERS.
+"""
+from datetime import datetime, timedelta
+import copy
+import threading
+import time
+import numpy as np
+from sqlalchemy import func
+from app import db
+from app.models import Campaign, RevenueEvent, RevenueModelVersion
+from app.services.revenue_model import (
+    DEFAULT_PARAMETERS, SPOTIFY_SHARE, SPOTIFY_RATE, APPLE_SHARE, APPLE_RATE, OTHER_SHARE, OTHER_RATE, YOUTUBE_SHARE,
+    REEL_RATE, MONETIZATION_RATE, normalize_inputs, scenario_arrays, simulate_revenue, cpm_tier,
+)
+
+WINDOW = timedelta(days=90)
+
+MIN_CAMPAIGNS = 5
+FIT_ROUNDS = 3
+
+# Fitted values are clipped into these ranges
+MULTIPLIER_RANGE = (0.1, 10.0)
+CPM_RANGE = (5.0, 1000.0)
+
+# ₹ per paid stream outside YouTube
+NON_YOUTUBE_RATE = SPOTIFY_SHARE * SPOTIFY_RATE + APPLE_SHARE * APPLE_RATE + OTHER_SHARE * OTHER_RATE
+
+POLL_SECONDS = 30
+
+_lock = threading.Lock()
+_active = (0, DEFAULT_PARAMETERS)
+_checked_at = None  # time.monotonic() of the last look at the active version
+
+
+def active_version():
+    """The active RevenueModelVersion, or None for the built-in defaults"""
+    return RevenueModelVersion.query.filter_by(is_active=True).order_by(RevenueModelVersion.id.desc()).first()
+
+
+def current_parameters():
+    """(version, parameter table) the revenue model should use right now"""
+    global _active, _checked_at
+    if _checked_at is not None and time.monotonic() - _checked_at < POLL_SECONDS:
+        return _active
+
+    with _lock:
+        if _checked_at is None or time.monotonic() - _checked_at >= POLL_SECONDS:
+            version = db.session.query(func.max(RevenueModelVersion.id)).filter(
+                RevenueModelVersion.is_active.is_(True)).scalar() or 0
+            if version != _active[0]:
+                params = DEFAULT_PARAMETERS if not version else db.session.get(RevenueModelVersion, version).parameters
+                _active = (version, params)
+            _checked_at = time.monotonic()
+    return _active
+
+
+def _refresh():
+    """Make this worker re-read the active version on its next prediction"""
+    global _checked_at
+    _checked_at = None
+
+
+def activate_version(version):
+    """Activate a stored version (0 = built-in defaults). Doesn't commit."""
+    row = None
+    if version:
+        row = db.session.get(RevenueModelVersion, version)
+        if row is None:
+            raise ValueError(f'No revenue model version {version}')
+
+    RevenueModelVersion.query.filter(RevenueModelVersion.is_active.is_(True)).update(
+        {'is_active': False}, synchronize_session=False)
+    if row is not None:
+        row.is_active = True
+        row.activated_at = datetime.utcnow()
+    _refresh()
+    return row
+
+
+def _observations(now):
+    """Campaign inputs and realized 3 month revenue (YouTube, everything else, any untagged)"""
+    campaigns = db.session.query(
+        Campaign.id, Campaign.genre, Campaign.marketing_budget, Campaign.music_video_budget,
+        func.coalesce(Campaign.release_date, Campaign.campaign_start_date, Campaign.start_date, Campaign.created_at),
+    ).filter(Campaign.marketing_budget > 0).order_by(Campaign.id).all()
+    campaigns = [c for c in campaigns if c[4] + WINDOW <= now]
+    if not campaigns:
+        return [], None
+
+    ids = np.array([c[0] for c in campaigns])
+    anchors = np.array([c[4] for c in campaigns], dtype='datetime64[us]')
+
+    events = db.session.query(
+        RevenueEvent.campaign_id, RevenueEvent.source, RevenueEvent.amount, RevenueEvent.created_at,
+    ).join(Campaign, Campaign.id == RevenueEvent.campaign_id).filter(Campaign.marketing_budget > 0).all()
+    if not events:
+        return [], None
+
+    campaign_ids = np.array([e[0] for e in events])
+    source = np.array([(e[1] or 'manual').lower() for e in events])
+    amount = np.array([e[2] or 0.0 for e in events], dtype=float)
+    created = np.array([e[3] for e in events], dtype='datetime64[us]')
+
+    idx = np.minimum(np.searchsorted(ids, campaign_ids), len(ids) - 1)
+    known = ids[idx] == campaign_ids
+    inside = known & (created >= anchors[idx]) & (created < anchors[idx] + np.timedelta64(WINDOW))
+    idx, source, amount = idx[inside], source[inside], amount[inside]
+
+    n = len(ids)
+    revenue = {
+        'youtube': np.bincount(idx, weights=np.where(source == 'youtube', amount, 0.0), minlength=n),
+        'total': np.bincount(idx, weights=amount, minlength=n),
+        'untagged': np.bincount(idx, weights=(source == 'manual').astype(float), minlength=n) > 0,
+        'events': np.bincount(idx, minlength=n),
+    }
+
+    keep = revenue['events'] > 0
+    inputs = [normalize_inputs({
+        'genre': c[1] or 'pop', 'marketing_budget': c[2], 'video_budget': c[3] or 0,
+    }) for c, k in zip(campaigns, keep) if k]
+    return inputs, {field: values[keep] for field, values in revenue.items()}
+
+
+def _rmse(inputs, realized, params):
+    expected = simulate_revenue(scenario_arrays(inputs, params=params), None, params=params)['gross_revenue_3m']
+    return float(np.sqrt(np.mean((expected - realized) ** 2)))
+
+
+def _lstsq_by_group(group, x, y, count):
+    """Per-group coefficient of y ~ x[group] (NaN for groups without MIN_CAMPAIGNS rows)"""
+    design = np.zeros((len(x), count))
+    design[np.arange(len(x)), group] = x
+    coefficients = np.linalg.lstsq(design, y, rcond=None)[0]
+    coefficients[np.bincount(group, minlength=count) < MIN_CAMPAIGNS] = np.nan
+    return coefficients
+
+
+def fit_parameters(inputs, realized, prior):
+    """Parameter table fitted to realized revenue, starting from `prior`"""
+    params = copy.deepcopy(prior)
+    columns = scenario_arrays(inputs, params=params)
+    expected = simulate_revenue(columns, None, params=params)
+    marketing_effectiveness = params['marketing_effectiveness']
+
+    followers, duration, viral = columns['artist_followers'], columns['campaign_duration'], columns['viral_mult']
+    paid_unit = (columns['marketing_budget'] * np.minimum(2.0, 1 + followers / 10000)
+                 * (1 + columns['video_budget'] / 20000) * viral)  # paid streams per unit of E x genre
+    reels_unit = columns['video_budget'] / 100 * viral * REEL_RATE
+    organic_spotify = followers * 3 * duration * SPOTIFY_RATE
+    youtube_unit = MONETIZATION_RATE / 1000 * columns['genre_cpm_boost'] * columns['viral_cpm_boost']
+    organic_youtube = followers * 5 * duration * youtube_unit
+    fixed = organic_spotify + expected['merch_revenue'] + expected['sync_revenue'] + expected['show_revenue']
+
+    genres = sorted({s['genre'] for s in inputs})
+    genre = np.searchsorted(genres, [s['genre'] for s in inputs])
+    prior_multiplier = np.array([params['genre_multipliers'].get(g, 1.0) for g in genres])
+    multiplier = prior_multiplier.copy()
+
+    tiers = params['cpm_tiers']
+    tier = cpm_tier(columns['marketing_budget'], tiers)
+    cpm = np.array([value for _, value in tiers], dtype=float)
+
+    untagged = realized['untagged']
+    youtube_reported = ~untagged & (realized['youtube'] > 0)
+    for _ in range(FIT_ROUNDS):
+        # 1. genre multipliers
+        campaign_cpm = cpm[tier]
+        x = marketing_effectiveness * paid_unit * NON_YOUTUBE_RATE + reels_unit
+        y = realized['total'] - realized['youtube'] - fixed
+        x = np.where(untagged, x + marketing_effectiveness * paid_unit * YOUTUBE_SHARE * youtube_unit * campaign_cpm, x)
+        y = np.where(untagged, realized['total'] - fixed - organic_youtube * campaign_cpm, y)
+        fitted = _lstsq_by_group(genre, x, y, len(genres))
+        multiplier = np.where(np.isnan(fitted), multiplier, np.clip(fitted, *MULTIPLIER_RANGE))
+
+        # 2. CPM tiers, from campaigns that reported YouTube revenue
+        views = marketing_effectiveness * multiplier[genre] * paid_unit * YOUTUBE_SHARE
+        x = views * youtube_unit + organic_youtube
+        fitted = _lstsq_by_group(tier[youtube_reported], x[youtube_reported], realized['youtube'][youtube_reported],
+                                 len(tiers))
+        cpm = np.where(np.isnan(fitted), cpm, np.clip(fitted, *CPM_RANGE))
+
+    # Streams per rupee takes the average level of the fitted genres. Every
+    # other genre's multiplier is divided by the same scale, so its
+    # predictions (E x genre) stay where the prior had them.
+    fitted_genres = np.bincount(genre, minlength=len(genres)) >= MIN_CAMPAIGNS
+    if fitted_genres.any():
+        weights = np.bincount(genre, minlength=len(genres))[fitted_genres]
+        scale = float(np.average(multiplier[fitted_genres] / prior_multiplier[fitted_genres], weights=weights))
+        params['marketing_effectiveness'] = marketing_effectiveness * scale
+        fitted = dict(zip(np.array(genres)[fitted_genres].tolist(), multiplier[fitted_genres]))
+        for g in set(params['genre_multipliers']) | set(genres):
+            value = fitted.get(g, params['genre_multipliers'].get(g, 1.0))
+            params['genre_multipliers'][str(g)] = round(float(value / scale), 4)
+    params['marketing_effectiveness'] = round(float(params['marketing_effectiveness']), 4)
+    params['cpm_tiers'] = [[threshold, round(float(value), 4)] for (threshold, _), value in zip(tiers, cpm)]
+    return params
+
+
+def calibrate_model(activate=True, now=None):
+    """
+    Fit a new parameter table from the current active one and store it as a
+    new version. With activate=True it's activated if it fits realized revenue
+    no worse than the active table. Doesn't commit.
+    """
+    inputs, realized = _observations(now or datetime.utcnow())
+    if len(inputs) < MIN_CAMPAIGNS:
+        raise ValueError(f'Need at least {MIN_CAMPAIGNS} campaigns with 3 months of revenue, found {len(inputs)}')
+
+    current = active_version()
+    prior = current.parameters if current is not None else DEFAULT_PARAMETERS
+    params = fit_parameters(inputs, realized, prior)
+
+    version = RevenueModelVersion(
+        parameters=params,
+        campaigns_used=len(inputs),
+        rmse_before=_rmse(inputs, realized['total'], prior),
+        rmse_after=_rmse(inputs, realized['total'], params),
+    )
+    db.session.add(version)
+    db.session.flush()
+    if activate and version.rmse_after <= version.rmse_before:
+        activate_version(version.id)
+    return version
@@ -0,0 +1,140 @@
+"""
+Investor portfolio.
+
+Per-campaign totals come from the materialized portfolio_positions table
+(see app/services/positions.py), so a portfolio read is:
+
+    1. wallet totals
+    2. positions for the investor (index range scan) JOIN campaigns LEFT JOIN artists,
+       with the expected return computed from the campaign's current forecast
+    3. the 10 most recent wallet transactions
+
+investor_earnings() is polled by the earnings widget: completed and pending
+revenue shares come from one SUM(CASE ...) over the investor's wallet row
+and the covering ix_wallet_transactions_wallet_type_status_amount index.
+"""
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Campaign, PortfolioPosition, User, Wallet, WalletTransaction
+from app.services.dialect import month_of
+from app.services.ledger import REVENUE_TYPES
+from app.services.positions import expected_return
+
+RECENT_TRANSACTIONS = 10
+
+EARNINGS_BREAKDOWNS = ('campaign', 'month')
+
+
+def investor_portfolio(investor_id):
+    """Wallet, per-campaign positions with earnings / ROI, and recent activity"""
+    wallet = db.session.execute(
+        select(Wallet.id, Wallet.balance, Wallet.total_deposited, Wallet.total_invested, Wallet.total_earnings)
+        .where(Wallet.user_id == investor_id)
+    ).first()
+
+    artist = aliased(User)
+    positions = db.session.execute(
+        select(
+            PortfolioPosition, Campaign.title, Campaign.artwork_url, Campaign.artwork_variants,
+            Campaign.funding_status,
+            expected_return(PortfolioPosition.partitions_owned).label('expected_return_3m'),
+            artist.name.label('artist_name'),
+        )
+        .join(Campaign, Campaign.id == PortfolioPosition.campaign_id)
+        .outerjoin(artist, artist.id == Campaign.artist_id)
+        .where(PortfolioPosition.investor_id == investor_id)
+        .order_by(PortfolioPosition.first_invested_at)
+    ).all()
+
+    holdings_detail = []
+    total_expected_returns = 0
+    for row in positions:
+        position = row.PortfolioPosition
+        total_expected_returns += row.expected_return_3m
+        holdings_detail.append({
+            # Positions are unique per (investor, campaign), like holdings
+            'holding_id': position.id,
+            'campaign_id': position.campaign_id,
+            'campaign_title': row.title,
+            'campaign_artwork_url': row.artwork_url,
+            'campaign_artwork_variants': row.artwork_variants,
+            'artist_name': row.artist_name or 'Unknown',
+            'partitions_owned': position.partitions_owned,
+            'investment_amount': position.invested_amount,
+            'actual_earnings': position.realized_earnings,
+            'expected_return_3m': row.expected_return_3m,
+            'roi_percentage': position.roi_pct,
+            'campaign_status': row.funding_status,
+            'date_invested': position.first_invested_at.isoformat() if position.first_invested_at else None,
+        })
+
+    recent_transactions = []
+    if wallet:
+        recent_transactions = [tx.to_dict() for tx in WalletTransaction.query.filter_by(
+            wallet_id=wallet.id
+        ).order_by(WalletTransaction.created_at.desc()).limit(RECENT_TRANSACTIONS)]
+
+    balance = wallet.balance if wallet else 0
+    total_deposited = wallet.total_deposited if wallet else 0
+    total_invested = wallet.total_invested if wallet else 0
+    total_earnings = wallet.total_earnings if wallet else 0
+
+    return {
+        'investor_id': investor_id,
+        'wallet': {
+            'balance': balance,
+            'total_deposited': total_deposited,
+            'total_invested': total_invested,
+            'total_earnings': total_earnings,
+        },
+        'portfolio': {
+            'total_invested': total_invested,
+            'total_earnings': total_earnings,
+            'current_value': total_invested + total_earnings,
+            'overall_roi': (total_earnings / total_invested) * 100 if total_invested > 0 else 0,
+            'number_of_campaigns': len(positions),
+            'expected_returns_3m': total_expected_returns,
+        },
+        'holdings': holdings_detail,
+        'recent_transactions': recent_transactions,
+    }
+
+
+def _earnings_sum(status):
+    return func.coalesce(func.sum(case((WalletTransaction.status == status, WalletTransaction.amount), else_=0.0)), 0.0)
+
+
+def investor_earnings(investor_id, breakdown=None):
+    """
+    Completed ('actual') and pending revenue-share earnings in one query.
+    With breakdown='campaign' / 'month' the same query is grouped, and
+    the per-group rows are returned alongside the totals.
+    """
+    columns = [_earnings_sum('completed').label('actual'), _earnings_sum('pending').label('pending')]
+    query = select(*columns).join(Wallet, Wallet.id == WalletTransaction.wallet_id).where(
+        Wallet.user_id == investor_id,
+        WalletTransaction.transaction_type.in_(REVENUE_TYPES),
+        WalletTransaction.status.in_(('completed', 'pending')),
+    )
+
+    if breakdown is None:
+        row = db.session.execute(query).one()
+        return {'actual_earnings': float(row.actual), 'pending_earnings': float(row.pending)}
+
+    if breakdown == 'campaign':
+        key, name = WalletTransaction.campaign_id, 'campaign_id'
+    else:
+        key, name = month_of(WalletTransaction.created_at), 'month'
+    rows = db.session.execute(
+        query.add_columns(key.label('key')).group_by(key).order_by(key)
+    ).all()
+    return {
+        'actual_earnings': float(sum(r.actual for r in rows)),
+        'pending_earnings': float(sum(r.pending for r in rows)),
+        'breakdown': [{
+            name: r.key,
+            'actual_earnings': float(r.actual),
+            'pending_earnings': float(r.pending),
+        } for r in rows],
+    }
@@ -0,0 +1,195 @@
+"""
+Materialized portfolio positions.
+
+portfolio_positions holds one row per (investor, campaign) with the totals
+the dashboard shows, so reading a portfolio is a range scan on
+investor_id instead of a recomputation over partitions / transactions.
+
+Rows are maintained in the same transaction as the event that changes them:
+
+    record_purchase   wallet investment + direct partition purchase
+    record_earnings   revenue distribution
+
+rebuild_positions recomputes rows from the raw tables (`flask rebuild-positions`)
+and check_positions reports rows that drifted (`flask check-positions`).
+None of these commit - the caller owns the transaction.
+
+Ownership and the expected 3 month return depend on the campaign's current
+forecast, so they aren't stored: ownership_share / revenue_share /
+expected_return are the one definition, as SQL expressions over Campaign,
+for every query that reports them (portfolio, holdings, bulk report).
+"""
+from datetime import datetime
+from sqlalchemy import select, delete, func, case, and_, literal
+from app import db
+from app.models import Campaign, Partition, Wallet, WalletTransaction, InvestorHolding, PortfolioPosition
+from app.services.dialect import insert_for
+from app.services.ledger import REVENUE_TYPES
+
+FIELDS = ('partitions_owned', 'invested_amount', 'realized_earnings', 'roi_pct')
+
+# Differences below this are float noise, not drift
+TOLERANCE = 0.01
+
+
+def ownership_share(partitions_owned, total_partitions=Campaign.total_partitions):
+    """Fraction of the campaign's partition supply; 0 for campaigns without one"""
+    return case((total_partitions > 0, partitions_owned * 1.0 / total_partitions), else_=0.0)
+
+
+def revenue_share(partitions_owned):
+    """Fraction of the campaign's revenue paid to the holder of `partitions_owned`"""
+    return ownership_share(partitions_owned) * func.coalesce(Campaign.revenue_share_pct, 0.0) / 100.0
+
+
+def expected_return(partitions_owned):
+    """Investor's cut of the campaign's 3 month revenue forecast"""
+    return revenue_share(partitions_owned) * func.coalesce(Campaign.expected_revenue_3m, 0.0)
+
+
+def _roi(earnings, invested):
+    return case((invested > 0, earnings * 100.0 / invested), else_=0.0)
+
+
+def record_purchase(investor_id, campaign, partitions, amount, now=None):
+    """Add a purchase of `partitions` for `amount` to the investor's position (one upsert)."""
+    now = now or datetime.utcnow()
+    table = PortfolioPosition.__table__
+
+    stmt = insert_for(PortfolioPosition).values(
+        investor_id=investor_id,
+        campaign_id=campaign.id,
+        partitions_owned=partitions,
+        invested_amount=amount,
+        realized_earnings=0.0,
+        roi_pct=0.0,
+        first_invested_at=now,
+        updated_at=now,
+    )
+    partitions_owned = table.c.partitions_owned + stmt.excluded.partitions_owned
+    invested = table.c.invested_amount + stmt.excluded.invested_amount
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=['investor_id', 'campaign_id'],
+        set_={
+            'partitions_owned': partitions_owned,
+            'invested_amount': invested,
+            'roi_pct': _roi(table.c.realized_earnings, invested),
+            'updated_at': stmt.excluded.updated_at,
+        },
+    ))
+
+
+def record_earnings(campaign_id, shares, now=None):
+    """Add realized earnings {investor_id: amount} from a distribution (one batched upsert)."""
+    if not shares:
+        return
+    now = now or datetime.utcnow()
+    table = PortfolioPosition.__table__
+
+    stmt = insert_for(PortfolioPosition)
+    earnings = table.c.realized_earnings + stmt.excluded.realized_earnings
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['investor_id', 'campaign_id'],
+        set_={
+            'realized_earnings': earnings,
+            'roi_pct': _roi(earnings, table.c.invested_amount),
+            'updated_at': stmt.excluded.updated_at,
+        },
+    )
+    db.session.execute(stmt, [{
+        'investor_id': int(investor_id), 'campaign_id': campaign_id,
+        'partitions_owned': 0, 'invested_amount': 0.0, 'realized_earnings': amount,
+        'roi_pct': 0.0, 'first_invested_at': None, 'updated_at': now,
+    } for investor_id, amount in shares.items()])
+
+
+def _source_positions(investor_id=None):
+    """Positions recomputed from holdings, partitions and revenue-share ledger rows"""
+    invested = select(
+        Partition.buyer_id.label('investor_id'), Partition.campaign_id,
+        func.sum(Partition.amount_paid).label('amount'),
+    ).group_by(Partition.buyer_id, Partition.campaign_id)
+    earned = select(
+        Wallet.user_id.label('investor_id'), WalletTransaction.campaign_id,
+        func.sum(WalletTransaction.amount).label('amount'),
+    ).join(Wallet, Wallet.id == WalletTransaction.wallet_id).where(
+        WalletTransaction.transaction_type.in_(REVENUE_TYPES),
+        WalletTransaction.status == 'completed',
+        WalletTransaction.campaign_id.isnot(None),
+    ).group_by(Wallet.user_id, WalletTransaction.campaign_id)
+    holdings = select(InvestorHolding)
+
+    if investor_id is not None:
+        invested = invested.where(Partition.buyer_id == investor_id)
+        earned = earned.where(Wallet.user_id == investor_id)
+        holdings = holdings.where(InvestorHolding.investor_id == investor_id)
+
+    invested, earned, holding = invested.subquery(), earned.subquery(), holdings.subquery()
+    invested_amount = func.coalesce(invested.c.amount, 0.0)
+    realized = func.coalesce(earned.c.amount, 0.0)
+
+    return (
+        select(
+            holding.c.investor_id,
+            holding.c.campaign_id,
+            holding.c.partitions_owned,
+            invested_amount.label('invested_amount'),
+            realized.label('realized_earnings'),
+            _roi(realized, invested_amount).label('roi_pct'),
+            holding.c.created_at.label('first_invested_at'),
+            literal(datetime.utcnow()).label('updated_at'),
+        )
+        .join(Campaign, Campaign.id == holding.c.campaign_id)
+        .outerjoin(invested, and_(invested.c.investor_id == holding.c.investor_id,
+                                  invested.c.campaign_id == holding.c.campaign_id))
+        .outerjoin(earned, and_(earned.c.investor_id == holding.c.investor_id,
+                                earned.c.campaign_id == holding.c.campaign_id))
+    )
+
+
+def rebuild_positions(investor_id=None):
+    """Recompute positions (all, or one investor's) with one DELETE + INSERT ... SELECT. Returns the row count."""
+    clear = delete(PortfolioPosition)
+    if investor_id is not None:
+        clear = clear.where(PortfolioPosition.investor_id == investor_id)
+    db.session.execute(clear)
+
+    result = db.session.execute(
+        PortfolioPosition.__table__.insert().from_select(
+            ['investor_id', 'campaign_id', *FIELDS, 'first_invested_at', 'updated_at'],
+            _source_positions(investor_id),
+        )
+    )
+    return result.rowcount
+
+
+def check_positions(investor_id=None):
+    """
+    Compare stored positions with freshly computed ones.
+    Returns a list of {investor_id, campaign_id, field, expected, actual};
+    field is 'missing' / 'unexpected' when a whole row is absent / extra.
+    """
+    expected = {(r.investor_id, r.campaign_id): r for r in db.session.execute(_source_positions(investor_id))}
+
+    stored_query = select(PortfolioPosition.investor_id, PortfolioPosition.campaign_id,
+                          *[getattr(PortfolioPosition, f) for f in FIELDS])
+    if investor_id is not None:
+        stored_query = stored_query.where(PortfolioPosition.investor_id == investor_id)
+    stored = {(r.investor_id, r.campaign_id): r for r in db.session.execute(stored_query)}
+
+    problems = []
+    for key in expected.keys() | stored.keys():
+        want, have = expected.get(key), stored.get(key)
+        if want is None or have is None:
+            problems.append({
+                'investor_id': key[0], 'campaign_id': key[1],
+                'field': 'missing' if have is None else 'unexpected', 'expected': None, 'actual': None,
+            })
+            continue
+        for field in FIELDS:
+            if abs((getattr(want, field) or 0) - (getattr(have, field) or 0)) > TOLERANCE:
+                problems.append({
+                    'investor_id': key[0], 'campaign_id': key[1], 'field': field,
+                    'expected': getattr(want, field), 'actual': getattr(have, field),
+                })
+    return problems
@@ -0,0 +1,99 @@
+"""
+Cache in front of /predict-revenue.
+
+Inputs are normalized and bucketed (budgets to BUDGET_STEP, followers to
+FOLLOWER_STEP) and the model is evaluated on the bucketed inputs, with its
+random draws seeded from the cache key. So a key always maps to the same
+prediction - in every worker, cached or not - and a cached body is exactly
+what a recomputation would return. The inputs echoed back in the body
+(budgets, followers, revenue share) are the caller's, not the bucketed
+ones. The key includes the revenue model
+version (app/services/model_calibration.py), so activating a new parameter
+table makes every older entry a miss.
+
+Each worker keeps an in-process LRU. With PREDICTION_CACHE_URL set
+(redis://...) workers also share entries through Redis, so a prediction
+computed by one worker is a hit on the others. Without the redis package
+installed that's logged and the workers only use their own LRU.
+"""
+import zlib
+import numpy as np
+from app.services.cache import LRUCache, shared_cache
+from app.services.model_calibration import current_parameters
+from app.services.revenue_model import normalize_inputs, predict, prediction_response, GRID_FIELDS
+
+BUDGET_STEP = 100     # ₹
+FOLLOWER_STEP = 100
+
+TTL_SECONDS = 3600
+
+_local = LRUCache(maxsize=4096, ttl=TTL_SECONDS)
+
+
+def bucket_inputs(inputs):
+    """Normalized inputs rounded to the cache buckets"""
+    return {
+        **inputs,
+        'marketing_budget': float(round(inputs['marketing_budget'] / BUDGET_STEP) * BUDGET_STEP),
+        'video_budget': float(round(inputs['video_budget'] / BUDGET_STEP) * BUDGET_STEP),
+        'artist_followers': int(round(inputs['artist_followers'] / FOLLOWER_STEP) * FOLLOWER_STEP),
+        'revenue_share_pct': round(inputs['revenue_share_pct'], 1),
+    }
+
+
+def cache_key(inputs, version=0):
+    return (version,) + tuple(inputs[field] for field in GRID_FIELDS)
+
+
+def seed_for(key):
+    return zlib.crc32(repr(key).encode())
+
+
+def _shared_cache():
+    return shared_cache('PREDICTION_CACHE_URL', 'prediction', TTL_SECONDS)
+
+
+def _with_inputs(body, inputs):
+    """Copy of a cached body echoing `inputs` instead of the bucketed ones it was computed from"""
+    return {
+        **body,
+        'investor_returns': {**body['investor_returns'], 'pool_percentage': inputs['revenue_share_pct']},
+        'investment': {**body['investment'], 'marketing': inputs['marketing_budget'],
+                       'video': inputs['video_budget']},
+        'metadata': {**body['metadata'], 'artist_followers': inputs['artist_followers']},
+    }
+
+
+def cached_prediction(data):
+    """(response body, cache hit) for a /predict-revenue request body. Don't mutate the body."""
+    version, params = current_parameters()
+    requested = normalize_inputs(data)
+    inputs = bucket_inputs(requested)
+    key = cache_key(inputs, version)
+    shared = _shared_cache()
+
+    body = _local.get(key)
+    if body is None and shared is not None:
+        body = shared.get(key)
+        if body is not None:
+            _local.set(key, body)
+    if body is not None:
+        return _with_inputs(body, requested), True
+
+    seed = seed_for(key)
+    body = prediction_response(inputs, *predict([inputs], np.random.default_rng(seed), params))
+    body['metadata'].update(seed=seed, model_version=version)
+    _local.set(key, body)
+    if shared is not None:
+        shared.set(key, body)
+    return _with_inputs(body, requested), False
+
+
+def cache_stats():
+    shared = _shared_cache()
+    return {
+        'local': _local.stats(),
+        'shared': shared.stats() if shared is not None else None,
+        'budget_step': BUDGET_STEP,
+        'follower_step': FOLLOWER_STEP,
+    }
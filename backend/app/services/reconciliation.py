@@ -0,0 +1,276 @@
+"""
+Wallet reconciliation.
+
+Recomputes every wallet's balance / totals from the WalletTransaction ledger
+and records wallets whose stored numbers have drifted.
+
+Incremental scheme
+------------------
+Ledger rows are mostly append-only, but a few change their effect after
+insert (pending deposit -> completed/failed). Every row below the watermark
+is folded once into wallet_ledger_checkpoints. The watermark is the lower of
+
+- one past the newest row older than SETTLE_LAG: rows from transactions
+  still in flight may commit out of id order and must not be skipped
+- the oldest unsettled row younger than STALE_PENDING
+
+An unsettled row older than STALE_PENDING (a deposit whose payment never
+came back) doesn't hold the watermark back. It is left out of the fold and
+its id kept in the run's open_tx_ids; later runs fold it once it settles.
+Each run then only aggregates
+
+    open rows that have settled      -> added to the checkpoints
+    [old watermark, new watermark)   -> added to the checkpoints
+    [new watermark, end)             -> the live tail, recomputed every run
+
+with one GROUP BY each. The first run (or --full) starts from watermark 0.
+The diff against the wallets table is done on NumPy arrays.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import event, func, case, and_, or_, select, delete
+from sqlalchemy.orm import Session
+from app import db
+from app.models import (
+    Wallet, WalletTransaction, WalletLedgerCheckpoint, WalletReconciliationRun, WalletDiscrepancy
+)
+from app.services.dialect import insert_for
+
+FIELDS = ('balance', 'total_deposited', 'total_withdrawn', 'total_invested', 'total_earnings')
+
+# How each transaction type moves each wallet field (+1 / -1).
+# 'purchase' and 'artist_revenue' are paid outside the wallet and move nothing.
+LEDGER_EFFECTS = {
+    'deposit': {'balance': 1, 'total_deposited': 1},
+    'withdraw': {'balance': -1, 'total_withdrawn': 1},
+    'artist_withdrawal': {'balance': -1, 'total_withdrawn': 1},
+    'withdrawal_refund': {'balance': 1, 'total_withdrawn': -1},
+    'investment': {'balance': -1, 'total_invested': 1},
+    'artist_fee': {'balance': 1, 'total_earnings': 1},
+    'payout': {'balance': 1, 'total_earnings': 1},
+}
+
+# Differences below this are float noise, not drift
+TOLERANCE = 0.01
+
+# Rows younger than this stay in the live tail
+SETTLE_LAG = timedelta(minutes=5)
+
+# Unsettled rows older than this stop holding the watermark back (see open_tx_ids)
+STALE_PENDING = timedelta(hours=1)
+
+UPSERT_CHUNK = 2000
+
+
+def counts_toward_wallet():
+    """
+    Completed rows move money. An artist withdrawal is deducted when it is
+    requested, whatever the review says - a rejection is a separate
+    'withdrawal_refund' row - so its status changes never change its effect.
+    """
+    return or_(
+        WalletTransaction.status == 'completed',
+        and_(WalletTransaction.transaction_type == 'artist_withdrawal',
+             WalletTransaction.status.in_(('pending', 'rejected'))),
+    )
+
+
+def _counts(tx):
+    """counts_toward_wallet() for a WalletTransaction object"""
+    status = tx.status or 'completed'  # Column default, not applied until the INSERT
+    return status == 'completed' or (tx.transaction_type == 'artist_withdrawal' and status in ('pending', 'rejected'))
+
+
+@event.listens_for(Session, 'before_flush')
+def _stamp_settled_at(session, flush_context, instances):
+    """
+    WalletTransaction.settled_at = when the row started counting toward the
+    wallet: on insert for most rows, when it completes for a pending one.
+    Core INSERTs set it themselves. The daily rollups bucket on it.
+    """
+    now = datetime.utcnow()
+    for obj in session.new:
+        if isinstance(obj, WalletTransaction) and obj.settled_at is None and _counts(obj):
+            obj.settled_at = obj.created_at or now
+    for obj in session.dirty:
+        if isinstance(obj, WalletTransaction) and obj.settled_at is None and _counts(obj):
+            obj.settled_at = now
+
+
+def unsettled():
+    """Rows whose effect can still change: pending ones, except artist withdrawals"""
+    return and_(WalletTransaction.status == 'pending', WalletTransaction.transaction_type != 'artist_withdrawal')
+
+
+def ledger_field_sum(field):
+    whens = []
+    for sign in (1, -1):
+        types = [t for t, effects in LEDGER_EFFECTS.items() if effects.get(field) == sign]
+        if types:
+            whens.append((
+                WalletTransaction.transaction_type.in_(types),
+                WalletTransaction.amount if sign == 1 else -WalletTransaction.amount,
+            ))
+    return func.coalesce(func.sum(case(*whens, else_=0.0)), 0.0).label(field)
+
+
+def _aggregate_ledger(*conditions):
+    """One GROUP BY wallet_id over the ledger rows matching `conditions`."""
+    query = select(
+        WalletTransaction.wallet_id,
+        func.count().label('rows'),
+        *[ledger_field_sum(f) for f in FIELDS],
+    ).where(counts_toward_wallet(), *conditions)
+    return db.session.execute(query.group_by(WalletTransaction.wallet_id)).all()
+
+
+def _next_watermark(id_from, now):
+    """
+    One past the newest row older than SETTLE_LAG, but no further than the
+    oldest unsettled row younger than STALE_PENDING (see module docstring).
+    """
+    newest = db.session.execute(
+        select(func.max(WalletTransaction.id)).where(
+            WalletTransaction.id >= id_from, WalletTransaction.created_at <= now - SETTLE_LAG
+        )
+    ).scalar()
+    oldest_pending = db.session.execute(
+        select(func.min(WalletTransaction.id)).where(
+            WalletTransaction.id >= id_from, unsettled(), WalletTransaction.created_at > now - STALE_PENDING
+        )
+    ).scalar()
+    watermark = (newest or 0) + 1
+    if oldest_pending is not None:
+        watermark = min(oldest_pending, watermark)
+    return max(id_from, watermark)
+
+
+def _ids(*conditions):
+    return set(db.session.execute(select(WalletTransaction.id).where(*conditions)).scalars())
+
+
+def _fold_into_checkpoints(rows):
+    table = WalletLedgerCheckpoint.__table__
+    params = [{'wallet_id': r.wallet_id, **{f: getattr(r, f) for f in FIELDS}} for r in rows]
+    stmt = insert_for(WalletLedgerCheckpoint)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['wallet_id'],
+        set_={f: table.c[f] + stmt.excluded[f] for f in FIELDS},
+    )
+    for start in range(0, len(params), UPSERT_CHUNK):
+        db.session.execute(stmt, params[start:start + UPSERT_CHUNK])
+
+
+def _to_matrix(wallet_ids, rows):
+    """Align rows (by wallet id) onto the sorted wallet_ids array -> (n_wallets, n_fields)."""
+    matrix = np.zeros((len(wallet_ids), len(FIELDS)))
+    if not rows:
+        return matrix
+    ids = np.fromiter((r.wallet_id for r in rows), dtype=np.int64, count=len(rows))
+    values = np.array([[getattr(r, f) for f in FIELDS] for r in rows], dtype=float)
+    pos = np.searchsorted(wallet_ids, ids)
+    known = (pos < len(wallet_ids)) & (wallet_ids[np.minimum(pos, len(wallet_ids) - 1)] == ids)
+    np.add.at(matrix, pos[known], values[known])
+    return matrix
+
+
+def reconcile_wallets(full=False):
+    """
+    Run one reconciliation pass and commit it.
+    Returns the WalletReconciliationRun.
+    """
+    last_run = WalletReconciliationRun.query.filter_by(status='completed').order_by(
+        WalletReconciliationRun.id.desc()
+    ).first()
+    full = full or last_run is None
+
+    run = WalletReconciliationRun(mode='full' if full else 'incremental', status='running')
+    db.session.add(run)
+    db.session.flush()
+
+    if full:
+        db.session.execute(delete(WalletLedgerCheckpoint))
+        old_watermark, open_ids = 0, set()
+    else:
+        old_watermark, open_ids = last_run.watermark_tx_id or 0, set(last_run.open_tx_ids or ())
+
+    # 1. Fold open rows that have settled since the last run
+    settled = []
+    if open_ids:
+        still_open = _ids(WalletTransaction.id.in_(open_ids), unsettled())
+        settled = _aggregate_ledger(WalletTransaction.id.in_(open_ids - still_open))
+        _fold_into_checkpoints(settled)
+        open_ids = still_open
+
+    # 2. Fold the rows the watermark passes; unsettled ones stay open
+    new_watermark = _next_watermark(old_watermark, run.started_at)
+    if new_watermark > old_watermark:
+        passed = (WalletTransaction.id >= old_watermark, WalletTransaction.id < new_watermark)
+        passed_rows = _aggregate_ledger(*passed, ~unsettled())
+        _fold_into_checkpoints(passed_rows)
+        settled += passed_rows
+        open_ids |= _ids(*passed, unsettled())
+
+    # 3. Live tail (open rows are pending, so they count for nothing yet)
+    tail = _aggregate_ledger(WalletTransaction.id >= new_watermark)
+
+    # 4. Diff expected vs stored, vectorized
+    wallets = db.session.execute(
+        select(Wallet.id, Wallet.user_id, *[getattr(Wallet, f) for f in FIELDS]).order_by(Wallet.id)
+    ).all()
+    checkpoints = db.session.execute(
+        select(WalletLedgerCheckpoint.wallet_id, *[getattr(WalletLedgerCheckpoint, f) for f in FIELDS])
+    ).all()
+
+    wallet_ids = np.array([w.id for w in wallets], dtype=np.int64)
+    actual = np.array([[getattr(w, f) for f in FIELDS] for w in wallets], dtype=float).reshape(-1, len(FIELDS))
+    expected = _to_matrix(wallet_ids, checkpoints) + _to_matrix(wallet_ids, tail)
+
+    difference = actual - expected
+    wallet_idx, field_idx = np.nonzero(np.abs(difference) > TOLERANCE)
+
+    discrepancies = [{
+        'run_id': run.id,
+        'wallet_id': int(wallet_ids[w]),
+        'user_id': wallets[w].user_id,
+        'field': FIELDS[f],
+        'expected': float(expected[w, f]),
+        'actual': float(actual[w, f]),
+        'difference': float(difference[w, f]),
+    } for w, f in zip(wallet_idx, field_idx)]
+    if discrepancies:
+        db.session.execute(WalletDiscrepancy.__table__.insert(), discrepancies)
+
+    run.watermark_tx_id = new_watermark
+    run.open_tx_ids = sorted(open_ids)
+    run.ledger_rows_scanned = sum(r.rows for r in settled) + sum(r.rows for r in tail)
+    run.wallets_checked = len(wallets)
+    run.discrepancy_count = len(discrepancies)
+    run.status = 'completed'
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+    return run
+
+
+def reconciliation_summary(run, limit=100):
+    """Totals per field + the largest discrepancies of a run"""
+    by_field = db.session.execute(
+        select(
+            WalletDiscrepancy.field,
+            func.count().label('wallets'),
+            func.sum(func.abs(WalletDiscrepancy.difference)).label('absolute_drift'),
+        ).where(WalletDiscrepancy.run_id == run.id).group_by(WalletDiscrepancy.field)
+    ).all()
+
+    largest = WalletDiscrepancy.query.filter_by(run_id=run.id).order_by(
+        func.abs(WalletDiscrepancy.difference).desc()
+    ).limit(limit).all()
+
+    return {
+        'run': run.to_dict(),
+        'by_field': {
+            row.field: {'wallets': row.wallets, 'absolute_drift': round(row.absolute_drift, 2)}
+            for row in by_field
+        },
+        'largest_discrepancies': [d.to_dict() for d in largest],
+    }
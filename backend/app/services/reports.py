@@ -0,0 +1,223 @@
+"""
+Bulk portfolio report for admin / compliance.
+
+`flask portfolio-report` computes every investor's portfolio in one job
+instead of one HTTP call per investor:
+
+- the parent streams investor ids (keyset order) and cuts them into
+  id ranges of `chunk_size` investors
+- each range is computed in a worker process with its own DB connection:
+  5 range-bounded queries (wallets, holdings x campaigns with their
+  expected return, partitions, revenue shares), then NumPy for the
+  per-investor sums
+- the parent streams each chunk's columns into portfolio_report_rows, or
+  into a .parquet (needs pyarrow) / .csv file
+"""
+from concurrent.futures import ProcessPoolExecutor
+import csv
+from datetime import datetime
+import numpy as np
+from sqlalchemy import create_engine, select, func, case
+from app import db
+from app.models import (
+    User, Wallet, WalletTransaction, InvestorHolding, Campaign, Partition, PortfolioReportRun, PortfolioReportRow
+)
+from app.services.ledger import REVENUE_TYPES
+from app.services.positions import expected_return
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional - only needed for .parquet output
+    pyarrow = None
+
+REPORT_COLUMNS = (
+    'balance', 'total_deposited', 'total_invested', 'total_earnings', 'positions', 'invested_amount',
+    'realized_earnings', 'pending_earnings', 'expected_return_3m', 'roi_pct',
+)
+
+CHUNK_SIZE = 5000
+
+# Per-process engine, created by _init_worker
+_engine = None
+
+
+def _init_worker(database_url):
+    global _engine
+    _engine = create_engine(database_url)
+
+
+def _scatter(ids, keys, values):
+    """Sum `values` (by `keys`) onto the positions of the sorted `ids` array"""
+    out = np.zeros(len(ids))
+    if len(keys):
+        np.add.at(out, np.searchsorted(ids, np.asarray(keys)), np.asarray(values, dtype=float))
+    return out
+
+
+def compute_chunk(bounds):
+    """Portfolio columns for every investor with lo <= id <= hi. Runs in a worker process."""
+    lo, hi = bounds
+    with _engine.connect() as conn:
+        ids = np.array(conn.execute(
+            select(User.id).where(User.id.between(lo, hi), User.role == 'investor').order_by(User.id)
+        ).scalars().all(), dtype=np.int64)
+        if not len(ids):
+            return {'investor_id': [], **{c: [] for c in REPORT_COLUMNS}}
+
+        wallets = conn.execute(
+            select(Wallet.user_id, Wallet.balance, Wallet.total_deposited, Wallet.total_invested,
+                   Wallet.total_earnings)
+            .where(Wallet.user_id.between(lo, hi))
+        ).all()
+        holdings = conn.execute(
+            select(InvestorHolding.investor_id, expected_return(InvestorHolding.partitions_owned))
+            .join(Campaign, Campaign.id == InvestorHolding.campaign_id)
+            .where(InvestorHolding.investor_id.between(lo, hi))
+        ).all()
+        invested = conn.execute(
+            select(Partition.buyer_id, func.sum(Partition.amount_paid))
+            .where(Partition.buyer_id.between(lo, hi))
+            .group_by(Partition.buyer_id)
+        ).all()
+        earnings = conn.execute(
+            select(
+                Wallet.user_id,
+                func.sum(case((WalletTransaction.status == 'completed', WalletTransaction.amount), else_=0.0)),
+                func.sum(case((WalletTransaction.status == 'pending', WalletTransaction.amount), else_=0.0)),
+            )
+            .join(Wallet, Wallet.id == WalletTransaction.wallet_id)
+            .where(Wallet.user_id.between(lo, hi), WalletTransaction.transaction_type.in_(REVENUE_TYPES),
+                   WalletTransaction.status.in_(('completed', 'pending')))
+            .group_by(Wallet.user_id)
+        ).all()
+
+    # Rows for non-investors in the id range are dropped by the isin masks
+    columns = {'investor_id': ids.tolist()}
+
+    w = np.array(wallets, dtype=float).reshape(-1, 5)
+    w = w[np.isin(w[:, 0], ids)]
+    for i, name in enumerate(('balance', 'total_deposited', 'total_invested', 'total_earnings'), start=1):
+        columns[name] = _scatter(ids, w[:, 0].astype(np.int64), w[:, i])
+
+    h = np.array(holdings, dtype=float).reshape(-1, 2)
+    h = h[np.isin(h[:, 0], ids)]
+    columns['positions'] = _scatter(ids, h[:, 0].astype(np.int64), np.ones(len(h))).astype(np.int64)
+    columns['expected_return_3m'] = _scatter(ids, h[:, 0].astype(np.int64), h[:, 1])
+
+    p = np.array(invested, dtype=float).reshape(-1, 2)
+    p = p[np.isin(p[:, 0], ids)]
+    columns['invested_amount'] = _scatter(ids, p[:, 0].astype(np.int64), p[:, 1])
+
+    e = np.array(earnings, dtype=float).reshape(-1, 3)
+    e = e[np.isin(e[:, 0], ids)]
+    columns['realized_earnings'] = _scatter(ids, e[:, 0].astype(np.int64), e[:, 1])
+    columns['pending_earnings'] = _scatter(ids, e[:, 0].astype(np.int64), e[:, 2])
+
+    invested_amount = columns['invested_amount']
+    columns['roi_pct'] = np.divide(columns['realized_earnings'] * 100, invested_amount,
+                                   out=np.zeros(len(ids)), where=invested_amount > 0)
+
+    return {name: np.asarray(values).tolist() for name, values in columns.items()}
+
+
+def _investor_ranges(chunk_size):
+    """(first_id, last_id) for consecutive chunks of investors, streamed in id order"""
+    result = db.session.execute(
+        select(User.id).where(User.role == 'investor').order_by(User.id).execution_options(yield_per=chunk_size)
+    )
+    for ids in result.scalars().partitions(chunk_size):
+        yield ids[0], ids[-1]
+
+
+class _TableSink:
+    def __init__(self, run):
+        self.run = run
+
+    def write(self, columns):
+        n = len(columns['investor_id'])
+        rows = [{'run_id': self.run.id, **{k: v[i] for k, v in columns.items()}} for i in range(n)]
+        if rows:
+            db.session.execute(PortfolioReportRow.__table__.insert(), rows)
+            db.session.commit()
+
+    def close(self):
+        pass
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, columns):
+        batch = pyarrow.table(columns)
+        if self.writer is None:
+            self.writer = pyarrow.parquet.ParquetWriter(self.path, batch.schema)
+        self.writer.write_table(batch)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(('investor_id', *REPORT_COLUMNS))
+
+    def write(self, columns):
+        self.writer.writerows(zip(columns['investor_id'], *(columns[c] for c in REPORT_COLUMNS)))
+
+    def close(self):
+        self.file.close()
+
+
+def build_portfolio_report(workers=None, chunk_size=CHUNK_SIZE, output=None):
+    """
+    Compute every investor's portfolio and store it in the report table,
+    or in `output` (.parquet / .csv). workers=0 computes in-process.
+    Returns the PortfolioReportRun.
+    """
+    if output and not output.endswith(('.parquet', '.csv')):
+        raise ValueError('output must be a .parquet or .csv file')
+    if output and output.endswith('.parquet') and pyarrow is None:
+        raise RuntimeError('pyarrow is required for .parquet output (pip install pyarrow)')
+
+    run = PortfolioReportRun(output_path=output)
+    db.session.add(run)
+    db.session.commit()
+
+    if output is None:
+        sink = _TableSink(run)
+    elif output.endswith('.parquet'):
+        sink = _ParquetSink(output)
+    else:
+        sink = _CsvSink(output)
+
+    database_url = db.engine.url.render_as_string(hide_password=False)
+    # Only the bounds are kept, so the id cursor is closed before sinks commit
+    ranges = list(_investor_ranges(chunk_size))
+    try:
+        if workers == 0:
+            _init_worker(database_url)
+            for columns in map(compute_chunk, ranges):
+                sink.write(columns)
+                run.investor_count += len(columns['investor_id'])
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(database_url,)) as pool:
+                for columns in pool.map(compute_chunk, ranges):
+                    sink.write(columns)
+                    run.investor_count += len(columns['investor_id'])
+        run.status = 'completed'
+    except Exception:
+        db.session.rollback()
+        run.status = 'failed'
+        raise
+    finally:
+        sink.close()
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+    return run
@@ -0,0 +1,362 @@
+"""
+Campaign revenue model, vectorized over scenarios.
+
+The model behind /predict-revenue (conservative Indian music market
+estimates). Inputs are turned into column arrays - one entry per scenario -
+so a single call evaluates one prediction, a grid of what-ifs
+(grid_scenarios, for /predict-revenue/batch), or thousands of Monte Carlo
+samples of the same campaign (scenario_arrays(..., repeat=n)).
+
+Random elements are drawn from the `rng` passed in (a seeded
+np.random.Generator), never from global state, so a seed reproduces a
+prediction exactly. With rng=None they take their expected values instead
+(the budget optimizer compares splits on expected revenue):
+
+    reels / shorts uses   uniform +-20%
+    merch sales           uniform +-20%
+    sync licensing        Bernoulli deal x random deal size
+    stream volume         log-normal, sigma from the confidence score
+                          (only when volatility=True - a prediction keeps
+                          streams deterministic)
+
+The fitted constants - genre multipliers, streams per rupee and the CPM
+tiers - come from a parameter table (`params`, DEFAULT_PARAMETERS when not
+given). Calibrated tables are fitted to realized revenue and versioned by
+app/services/model_calibration.py; this module never touches the database.
+"""
+import itertools
+import math
+import numpy as np
+
+GENRE_MULTIPLIERS = {
+    'dhh': 1.4,      # DHH is hot right now
+    'hip-hop': 1.4,
+    'rap': 1.4,
+    'indie': 1.1,
+    'pop': 1.2,
+    'indie pop': 1.25,
+    'electronic': 0.9,
+    'rock': 0.85,
+    'classical': 0.7,
+    'bollywood': 1.5,
+    'punjabi': 1.45,
+}
+
+VIRAL_MULTIPLIERS = {
+    'low': 0.7,
+    'medium': 1.0,
+    'high': 1.5,
+    'viral': 2.5,  # "Fatega" factor
+}
+
+# Some genres travel better internationally; viral videos get better ad placements
+GENRE_CPM_BOOST = {'dhh': 1.1, 'hip-hop': 1.1, 'rap': 1.1, 'bollywood': 1.15, 'punjabi': 1.15}
+VIRAL_CPM_BOOST = {'viral': 1.2, 'high': 1.1}
+
+# Extra sync deal chance (viral songs get noticed) and merch boost
+SYNC_VIRAL_BOOST = {'viral': 0.03, 'high': 0.01}
+MERCH_VIRAL_BOOST = {'viral': 1.5}
+
+# 3m -> 6m growth momentum; 6m -> 12m is steady state
+GROWTH_6M = {'high': 2.2}
+GROWTH_6M_DEFAULT = 1.8
+GROWTH_12M = 1.8
+
+MARKETING_EFFECTIVENESS = 25  # streams per rupee spent
+
+# Platform split of paid streams (Spotify + YouTube dominate in India)
+YOUTUBE_SHARE, SPOTIFY_SHARE, OTHER_SHARE, APPLE_SHARE = 0.50, 0.40, 0.08, 0.02
+
+# ₹ per stream / use
+SPOTIFY_RATE = 0.046
+APPLE_RATE = 0.25
+OTHER_RATE = 0.03   # JioSaavn, Gaana, Wynk average
+REEL_RATE = 0.05
+
+INDIAN_CPM = 60
+GLOBAL_CPM = 120
+# Higher budget = better targeting = more global audience mix: (min marketing budget, global share)
+GLOBAL_MIX_TIERS = ((30000, 0.30), (15000, 0.15), (0, 0.05))
+MONETIZATION_RATE = 0.85  # Share of YouTube views with ads
+
+# Small indie sync deals (need a good video and marketing) / big-budget luck
+SYNC_INDIE_AMOUNTS = (2000, 3000, 5000, 8000)
+SYNC_BIG_BUDGET_AMOUNTS = (5000, 10000, 15000)
+SYNC_BIG_BUDGET_PROBABILITY = 0.10
+
+MERCH_PRICE = 800
+MERCH_CAP = 50
+
+MIN_INVESTMENT = 1000
+
+# The calibratable constants. cpm_tiers: [min marketing budget, ₹ CPM before boosts], highest first
+DEFAULT_PARAMETERS = {
+    'genre_multipliers': dict(GENRE_MULTIPLIERS),
+    'marketing_effectiveness': float(MARKETING_EFFECTIVENESS),
+    'cpm_tiers': [[threshold, INDIAN_CPM * (1 - mix) + GLOBAL_CPM * mix] for threshold, mix in GLOBAL_MIX_TIERS],
+}
+
+# Batch / grid predictions
+MAX_SCENARIOS = 10000
+GRID_FIELDS = ('genre', 'marketing_budget', 'video_budget', 'artist_followers', 'campaign_duration',
+               'viral_factor', 'revenue_share_pct')
+PROJECTION_FIELDS = ('gross_revenue_3m', 'net_revenue_3m', 'gross_revenue_6m', 'gross_revenue_12m',
+                     'roi_percentage', 'investor_share_3m', 'breakeven_streams', 'confidence_score')
+
+
+def normalize_inputs(data):
+    """Model inputs with the endpoint's defaults applied. ValueError / TypeError on bad values."""
+    viral_factor = data.get('viral_factor', 'medium')
+    if not isinstance(viral_factor, str) or viral_factor not in VIRAL_MULTIPLIERS:
+        raise ValueError(f"viral_factor must be one of: {', '.join(VIRAL_MULTIPLIERS)}")
+    return {
+        'genre': str(data.get('genre', 'pop')).lower(),
+        'marketing_budget': float(data.get('marketing_budget', 10000)),
+        'video_budget': float(data.get('video_budget', 10000)),
+        'artist_followers': int(data.get('artist_followers', 5000)),
+        'campaign_duration': int(data.get('campaign_duration', 3)),  # months
+        'viral_factor': viral_factor,
+        'revenue_share_pct': max(0.0, min(float(data.get('revenue_share_pct', 40)), 100.0)),
+    }
+
+
+def grid_scenarios(base, axes):
+    """
+    Normalized inputs for every combination of `axes` ({field: [values]}),
+    other fields from `base`. Row-major: the last axis varies fastest.
+    """
+    names = list(axes)
+    unknown = [name for name in names if name not in GRID_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown grid field(s): {', '.join(unknown)}")
+    if any(not isinstance(axes[name], list) or not axes[name] for name in names):
+        raise ValueError('Every grid field needs a non-empty list of values')
+    if math.prod(len(axes[name]) for name in names) > MAX_SCENARIOS:
+        raise ValueError(f'At most {MAX_SCENARIOS} scenarios per request')
+    return [normalize_inputs({**base, **dict(zip(names, combo))})
+            for combo in itertools.product(*(axes[name] for name in names))]
+
+
+def scenario_arrays(scenarios, repeat=1, params=None):
+    """Column arrays for a list of normalized inputs, each scenario repeated `repeat` times"""
+    def column(values, dtype=float):
+        return np.repeat(np.array(values, dtype=dtype), repeat)
+
+    genre_multipliers = (params or DEFAULT_PARAMETERS)['genre_multipliers']
+    genres = [s['genre'] for s in scenarios]
+    virals = [s['viral_factor'] for s in scenarios]
+    return {
+        'marketing_budget': column([s['marketing_budget'] for s in scenarios]),
+        'video_budget': column([s['video_budget'] for s in scenarios]),
+        'artist_followers': column([s['artist_followers'] for s in scenarios]),
+        'campaign_duration': column([s['campaign_duration'] for s in scenarios]),
+        'revenue_share_pct': column([s['revenue_share_pct'] for s in scenarios]),
+        'genre_factor': column([genre_multipliers.get(g, 1.0) for g in genres]),
+        'genre_cpm_boost': column([GENRE_CPM_BOOST.get(g, 1.0) for g in genres]),
+        'viral_mult': column([VIRAL_MULTIPLIERS.get(v, 1.0) for v in virals]),
+        'viral_cpm_boost': column([VIRAL_CPM_BOOST.get(v, 1.0) for v in virals]),
+        'sync_viral_boost': column([SYNC_VIRAL_BOOST.get(v, 0.0) for v in virals]),
+        'merch_viral_boost': column([MERCH_VIRAL_BOOST.get(v, 1.0) for v in virals]),
+        'growth_6m': column([GROWTH_6M.get(v, GROWTH_6M_DEFAULT) for v in virals]),
+    }
+
+
+def confidence_score(columns):
+    """65-95: more budget / followers = more confidence in the estimate"""
+    return np.minimum(95, 65
+                      + np.minimum(15, columns['marketing_budget'] / 1000)
+                      + np.minimum(10, columns['video_budget'] / 1000)
+                      + np.minimum(10, columns['artist_followers'] / 2000))
+
+
+def cpm_tier(marketing_budget, tiers):
+    """Index into `tiers` (highest threshold first) for each marketing budget"""
+    thresholds = np.array([threshold for threshold, _ in tiers], dtype=float)
+    return np.minimum((marketing_budget[:, None] < thresholds).sum(axis=1), len(tiers) - 1)
+
+
+def _effective_cpm(columns, params):
+    tiers = params['cpm_tiers']
+    cpm = np.array([value for _, value in tiers], dtype=float)[cpm_tier(columns['marketing_budget'], tiers)]
+    return cpm * columns['genre_cpm_boost'] * columns['viral_cpm_boost']
+
+
+def _sync_revenue(columns, rng):
+    """Sync licensing is very rare for indie artists - a lottery per scenario"""
+    marketing_budget, video_budget = columns['marketing_budget'], columns['video_budget']
+    n = len(marketing_budget)
+
+    indie = (marketing_budget >= 20000) & (video_budget >= 15000)
+    big_budget = ~indie & (marketing_budget >= 50000)
+    probability = np.where(
+        indie,
+        0.02 + np.where(columns['artist_followers'] > 50000, 0.01, 0.0) + columns['sync_viral_boost'],
+        np.where(big_budget, SYNC_BIG_BUDGET_PROBABILITY, 0.0),
+    )
+
+    if rng is None:
+        mean_amount = np.where(indie, np.mean(SYNC_INDIE_AMOUNTS), np.mean(SYNC_BIG_BUDGET_AMOUNTS))
+        return probability, probability * mean_amount
+
+    deals = (rng.random(n) < probability).astype(np.int64)
+    amounts = np.where(indie, rng.choice(SYNC_INDIE_AMOUNTS, size=n), rng.choice(SYNC_BIG_BUDGET_AMOUNTS, size=n))
+    return deals, deals * amounts.astype(float)
+
+
+def _noise(rng, n):
+    """+-20% uniform noise (1.0 in expectation)"""
+    return np.ones(n) if rng is None else rng.uniform(0.8, 1.2, size=n)
+
+
+def simulate_revenue(columns, rng, volatility=False, params=None):
+    """3 month revenue for every scenario in `columns`. Returns a dict of arrays."""
+    params = params or DEFAULT_PARAMETERS
+    marketing_budget, video_budget = columns['marketing_budget'], columns['video_budget']
+    followers, duration = columns['artist_followers'], columns['campaign_duration']
+    genre_factor, viral_mult = columns['genre_factor'], columns['viral_mult']
+    n = len(marketing_budget)
+
+    follower_boost = np.minimum(2.0, 1 + followers / 10000)
+    video_quality_boost = 1 + video_budget / 20000
+    base = marketing_budget * params['marketing_effectiveness'] * genre_factor * follower_boost * video_quality_boost * viral_mult
+    if volatility and rng is not None:
+        # Median-preserving log-normal noise; sigma 0.05 (confident) .. 0.35
+        sigma = (100 - confidence_score(columns)) / 100
+        base = base * rng.lognormal(0.0, sigma)
+
+    # Paid streams split across platforms, plus organic plays from followers
+    youtube_views = (base * YOUTUBE_SHARE).astype(np.int64) + (followers * 5 * duration).astype(np.int64)
+    spotify_streams = (base * SPOTIFY_SHARE).astype(np.int64) + (followers * 3 * duration).astype(np.int64)
+    other_streams = (base * OTHER_SHARE).astype(np.int64)
+    apple_streams = (base * APPLE_SHARE).astype(np.int64)
+
+    reel_base = (video_budget / 100) * genre_factor * viral_mult
+    reels_uses = (reel_base * _noise(rng, n)).astype(np.int64)
+
+    merch_base = np.floor(followers / 10000 * 2)
+    merch_sales = np.clip((merch_base * columns['merch_viral_boost'] * _noise(rng, n)).astype(np.int64),
+                          0, MERCH_CAP)
+
+    sync_deals, sync_revenue = _sync_revenue(columns, rng)
+
+    # One live show a month once the artist has a following
+    show_revenue = np.where(followers > 30000, duration * (5000 + followers / 10), 0.0)
+
+    spotify_revenue = spotify_streams * SPOTIFY_RATE
+    apple_revenue = apple_streams * APPLE_RATE
+    youtube_revenue = (youtube_views * MONETIZATION_RATE / 1000) * _effective_cpm(columns, params)
+    other_revenue = other_streams * OTHER_RATE
+    reels_revenue = reels_uses * REEL_RATE
+    merch_revenue = merch_sales * float(MERCH_PRICE)
+
+    total_streaming = spotify_revenue + apple_revenue + youtube_revenue + other_revenue
+    total_additional = reels_revenue + sync_revenue + merch_revenue + show_revenue
+
+    return {
+        'spotify_streams': spotify_streams, 'spotify_revenue': spotify_revenue,
+        'apple_streams': apple_streams, 'apple_revenue': apple_revenue,
+        'youtube_views': youtube_views, 'youtube_revenue': youtube_revenue,
+        'other_streams': other_streams, 'other_revenue': other_revenue,
+        'reels_uses': reels_uses, 'reels_revenue': reels_revenue,
+        'sync_deals': sync_deals, 'sync_revenue': sync_revenue,
+        'merch_sales': merch_sales, 'merch_revenue': merch_revenue,
+        'show_revenue': show_revenue,
+        'total_streaming': total_streaming,
+        'total_additional': total_additional,
+        'gross_revenue_3m': total_streaming + total_additional,
+    }
+
+
+def project(columns, revenue):
+    """6 / 12 month projections, ROI and break-even for simulated 3 month `revenue`"""
+    gross_3m = revenue['gross_revenue_3m']
+    total_investment = columns['marketing_budget'] + columns['video_budget']
+    gross_6m = gross_3m * columns['growth_6m']
+    gross_12m = gross_6m * GROWTH_12M
+    net_3m = gross_3m - total_investment
+
+    total_streams = (revenue['spotify_streams'] + revenue['apple_streams']
+                     + revenue['youtube_views'] + revenue['other_streams'])
+    revenue_per_stream = np.divide(gross_3m, total_streams, out=np.full(len(gross_3m), 0.05),
+                                   where=total_streams > 0)
+    breakeven = np.divide(total_investment, revenue_per_stream, out=np.zeros(len(gross_3m)),
+                          where=revenue_per_stream > 0)
+
+    pool = columns['revenue_share_pct'] / 100.0
+    return {
+        'gross_revenue_3m': gross_3m,
+        'net_revenue_3m': net_3m,
+        'gross_revenue_6m': gross_6m,
+        'gross_revenue_12m': gross_12m,
+        'roi_percentage': np.divide(net_3m, total_investment, out=np.zeros(len(gross_3m)),
+                                    where=total_investment > 0) * 100,
+        'breakeven_streams': breakeven.astype(np.int64),
+        'confidence_score': confidence_score(columns),
+        'total_streams_3m': total_streams,
+        'total_investment': total_investment,
+        'investor_share_3m': gross_3m * pool,
+        'investor_share_6m': gross_6m * pool,
+        'investor_share_12m': gross_12m * pool,
+    }
+
+
+def predict(scenarios, rng, params=None):
+    """Simulated revenue and projections for a list of normalized inputs, as column arrays"""
+    columns = scenario_arrays(scenarios, params=params)
+    revenue = simulate_revenue(columns, rng, params=params)
+    return columns, revenue, project(columns, revenue)
+
+
+def prediction_response(inputs, columns, revenue, projection, i=0):
+    """The /predict-revenue body for scenario `i`"""
+    r = {k: v[i].item() for k, v in revenue.items()}
+    p = {k: v[i].item() for k, v in projection.items()}
+    return {
+        'success': True,
+        'prediction': {
+            'gross_revenue_3m': round(p['gross_revenue_3m'], 2),
+            'net_revenue_3m': round(p['net_revenue_3m'], 2),
+            'gross_revenue_6m': round(p['gross_revenue_6m'], 2),
+            'gross_revenue_12m': round(p['gross_revenue_12m'], 2),
+            'roi_percentage': round(p['roi_percentage'], 2),
+            'breakeven_streams': p['breakeven_streams'],
+            'confidence_score': round(p['confidence_score'], 1),
+            'total_streams_3m': p['total_streams_3m']
+        },
+        'breakdown': {
+            'streaming': {
+                'spotify': {'streams': r['spotify_streams'], 'revenue': round(r['spotify_revenue'], 2)},
+                'apple_music': {'streams': r['apple_streams'], 'revenue': round(r['apple_revenue'], 2)},
+                'youtube': {'views': r['youtube_views'], 'revenue': round(r['youtube_revenue'], 2)},
+                'other_platforms': {'streams': r['other_streams'], 'revenue': round(r['other_revenue'], 2)},
+                'total': round(r['total_streaming'], 2)
+            },
+            'additional': {
+                'reels_shorts': {'uses': r['reels_uses'], 'revenue': round(r['reels_revenue'], 2)},
+                'sync_licensing': {'deals': r['sync_deals'], 'revenue': round(r['sync_revenue'], 2)},
+                'merchandise': {'sales': r['merch_sales'], 'revenue': round(r['merch_revenue'], 2)},
+                'live_shows': {'revenue': round(r['show_revenue'], 2)},
+                'total': round(r['total_additional'], 2)
+            }
+        },
+        'investor_returns': {
+            'pool_percentage': inputs['revenue_share_pct'],  # Already a percentage (0-100)
+            'investor_share_3m': round(p['investor_share_3m'], 2),
+            'investor_share_6m': round(p['investor_share_6m'], 2),
+            'investor_share_12m': round(p['investor_share_12m'], 2),
+            'min_investment': MIN_INVESTMENT,
+            'max_investment': p['total_investment']
+        },
+        'investment': {
+            'marketing': inputs['marketing_budget'],
+            'video': inputs['video_budget'],
+            'total': p['total_investment']
+        },
+        'metadata': {
+            'genre': inputs['genre'],
+            'genre_factor': columns['genre_factor'][i].item(),
+            'viral_factor': inputs['viral_factor'],
+            'duration_months': inputs['campaign_duration'],
+            'artist_followers': inputs['artist_followers'],
+        }
+    }
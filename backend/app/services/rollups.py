@@ -0,0 +1,205 @@
+"""
+Daily portfolio rollups.
+
+`flask rollup-portfolios` runs nightly and writes each investor's
+end-of-day totals (invested, earnings, balance, number of positions) into
+portfolio_daily_rollups, one UTC day at a time, picking up after the last
+rolled-up day. Rows are sparse - only investors whose totals changed that
+day get a row - so each day costs:
+
+    1. ledger deltas for the day, GROUP BY user (wallet_transactions)
+    2. new holdings for the day, GROUP BY investor
+    3. the previous rollup row of every investor that changed
+    4. one batched upsert
+
+Ledger rows count on the day they started counting toward the wallet
+(settled_at), not the day they were created: a deposit still pending when
+its creation day was rolled up counts on the day it completed, so the
+series keeps matching the wallets instead of drifting away from them.
+
+portfolio_history() reads an investor's rows back and downsamples them to
+day / week / month buckets, carrying the last known totals forward.
+"""
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import select, func, and_
+from app import db
+from app.models import WalletTransaction, Wallet, InvestorHolding, PortfolioDailyRollup, PortfolioRollupRun
+from app.services.dialect import insert_for
+from app.services.reconciliation import ledger_field_sum, counts_toward_wallet, SETTLE_LAG
+
+# Rollup column -> wallet field it tracks
+LEDGER_FIELDS = {'invested': 'total_invested', 'earnings': 'total_earnings', 'balance': 'balance'}
+
+BUCKETS = ('day', 'week', 'month')
+
+# Most points a single history request may return
+MAX_POINTS = 1000
+
+LOOKUP_CHUNK = 1000
+
+
+def _ledger_deltas(start, end):
+    rows = db.session.execute(
+        select(Wallet.user_id, *[ledger_field_sum(f) for f in LEDGER_FIELDS.values()])
+        .select_from(WalletTransaction)
+        .join(Wallet, Wallet.id == WalletTransaction.wallet_id)
+        .where(WalletTransaction.settled_at >= start, WalletTransaction.settled_at < end, counts_toward_wallet())
+        .group_by(Wallet.user_id)
+    ).all()
+    return {r.user_id: {col: getattr(r, field) for col, field in LEDGER_FIELDS.items()} for r in rows}
+
+
+def _new_positions(start, end):
+    return dict(db.session.execute(
+        select(InvestorHolding.investor_id, func.count())
+        .where(InvestorHolding.created_at >= start, InvestorHolding.created_at < end)
+        .group_by(InvestorHolding.investor_id)
+    ).all())
+
+
+def _previous_rows(investor_ids, day):
+    """Latest rollup row before `day` for each investor"""
+    previous = {}
+    investor_ids = list(investor_ids)
+    for i in range(0, len(investor_ids), LOOKUP_CHUNK):
+        latest = (
+            select(PortfolioDailyRollup.investor_id, func.max(PortfolioDailyRollup.day).label('day'))
+            .where(PortfolioDailyRollup.investor_id.in_(investor_ids[i:i + LOOKUP_CHUNK]),
+                   PortfolioDailyRollup.day < day)
+            .group_by(PortfolioDailyRollup.investor_id)
+            .subquery()
+        )
+        for row in db.session.execute(
+            select(PortfolioDailyRollup).join(latest, and_(
+                PortfolioDailyRollup.investor_id == latest.c.investor_id,
+                PortfolioDailyRollup.day == latest.c.day,
+            ))
+        ).scalars():
+            previous[row.investor_id] = row
+    return previous
+
+
+def rollup_day(day):
+    """Write the end-of-`day` rows of every investor whose totals changed. Does NOT commit."""
+    run = PortfolioRollupRun(day=day)
+    db.session.add(run)
+
+    start = datetime.combine(day, time.min)
+    end = start + timedelta(days=1)
+    deltas = _ledger_deltas(start, end)
+    new_positions = _new_positions(start, end)
+    changed = deltas.keys() | new_positions.keys()
+    previous = _previous_rows(changed, day)
+
+    rows = []
+    for investor_id in changed:
+        prev = previous.get(investor_id)
+        delta = deltas.get(investor_id, {})
+        row = {'investor_id': investor_id, 'day': day}
+        for col in LEDGER_FIELDS:
+            row[col] = (getattr(prev, col) if prev else 0.0) + delta.get(col, 0.0)
+        row['positions'] = (prev.positions if prev else 0) + new_positions.get(investor_id, 0)
+        rows.append(row)
+
+    if rows:
+        stmt = insert_for(PortfolioDailyRollup)
+        # Re-running a day overwrites its rows with the same values
+        db.session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=['investor_id', 'day'],
+                set_={col: stmt.excluded[col] for col in (*LEDGER_FIELDS, 'positions')},
+            ),
+            rows,
+        )
+
+    run.investors_updated = len(rows)
+    run.finished_at = datetime.utcnow()
+    return run
+
+
+def rollup_portfolios(until=None):
+    """
+    Roll up every day after the last rolled-up one, through `until`
+    (default: the last day that ended more than SETTLE_LAG ago).
+    Commits after each day, so an interrupted backfill resumes where it stopped.
+    Returns the runs.
+    """
+    until = until or (datetime.utcnow() - SETTLE_LAG).date() - timedelta(days=1)
+
+    last_day = db.session.execute(select(func.max(PortfolioRollupRun.day))).scalar()
+    if last_day is not None:
+        day = last_day + timedelta(days=1)
+    else:
+        first = db.session.execute(
+            select(func.min(WalletTransaction.created_at)).union_all(select(func.min(InvestorHolding.created_at)))
+        ).scalars().all()
+        first = [f for f in first if f is not None]
+        if not first:
+            return []
+        day = min(first).date()
+
+    runs = []
+    while day <= until:
+        runs.append(rollup_day(day))
+        db.session.commit()
+        day += timedelta(days=1)
+    return runs
+
+
+def bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start, bucket):
+    if bucket == 'week':
+        return start + timedelta(days=7)
+    if bucket == 'month':
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+
+def bucket_starts(start, end, bucket):
+    """Start dates of every bucket overlapping [start, end]"""
+    starts = []
+    current = bucket_start(start, bucket)
+    while current <= end:
+        starts.append(current)
+        current = _next_bucket(current, bucket)
+    return starts
+
+
+def portfolio_history(investor_id, start, end, bucket='day'):
+    """
+    End-of-bucket totals for each bucket between `start` and `end`.
+    Each point is the last rollup at or before the end of its bucket
+    (clamped to `end`), so quiet periods carry the previous totals forward.
+    """
+    baseline = db.session.execute(
+        select(PortfolioDailyRollup)
+        .where(PortfolioDailyRollup.investor_id == investor_id, PortfolioDailyRollup.day < start)
+        .order_by(PortfolioDailyRollup.day.desc())
+        .limit(1)
+    ).scalars().first()
+    rows = db.session.execute(
+        select(PortfolioDailyRollup)
+        .where(PortfolioDailyRollup.investor_id == investor_id,
+               PortfolioDailyRollup.day >= start, PortfolioDailyRollup.day <= end)
+        .order_by(PortfolioDailyRollup.day)
+    ).scalars().all()
+
+    points = []
+    current = baseline
+    i = 0
+    for bucket_from in bucket_starts(start, end, bucket):
+        bucket_to = min(_next_bucket(bucket_from, bucket) - timedelta(days=1), end)
+        while i < len(rows) and rows[i].day <= bucket_to:
+            current = rows[i]
+            i += 1
+        point = current.to_dict() if current else {'invested': 0.0, 'earnings': 0.0, 'balance': 0.0, 'positions': 0}
+        point['day'] = bucket_from.isoformat()
+        points.append(point)
+    return points
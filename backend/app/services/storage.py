@@ -0,0 +1,237 @@
+"""
+Where media bytes live.
+
+The media store (app/services/media_store.py) keeps blobs under keys like
+media/<aa>/<sha256>.<ext> in one of two backends, picked by MEDIA_STORAGE:
+
+- LocalStorage ('local'): files under UPLOAD_FOLDER. Fine for one node,
+  or several sharing a volume.
+- S3Storage ('s3'): an S3-compatible bucket - AWS, or MinIO / any stand-in
+  at S3_ENDPOINT_URL - so every node sees the same media. Needs boto3.
+  Browsers download from the bucket through presigned (or
+  MEDIA_PUBLIC_BASE_URL) URLs, and can upload straight into it with
+  presigned multipart-upload part URLs (app/services/uploads.py), so
+  media bytes don't go through the app workers.
+
+Both have the same interface; only S3Storage can presign (`direct`).
+Objects are written with `Cache-Control: immutable` - a key's content
+never changes.
+"""
+import base64
+from datetime import datetime, timezone
+import mimetypes
+import os
+from flask import current_app
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # optional - only needed for MEDIA_STORAGE = 's3'
+    boto3 = None
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _content_type(key):
+    return mimetypes.guess_type(key)[0] or 'application/octet-stream'
+
+
+class LocalStorage:
+    """Keys are paths under `root`"""
+
+    direct = False
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def put_file(self, key, local_path):
+        """Move `local_path` (same filesystem) to `key`"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(local_path, path)
+
+    def move(self, src_key, dst_key):
+        self.put_file(dst_key, self.path(src_key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def list(self, prefix):
+        """(key, size, last modified - naive UTC) of every file under `prefix`"""
+        for dirpath, _, filenames in os.walk(self.path(prefix)):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, '/')
+                yield key, stat.st_size, datetime.utcfromtimestamp(stat.st_mtime)
+
+    def local_copy(self, key, work_dir):
+        """A local path with the content of `key` (here, the file itself)"""
+        return self.path(key)
+
+    def download_url(self, key):
+        return None  # Served by the app (app/routes/media.py)
+
+
+class S3Storage:
+    """Keys are object keys in `bucket`, under an optional prefix"""
+
+    direct = True
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None, access_key=None, secret_key=None,
+                 url_ttl=3600, public_base_url=None, part_size=8 * 1024 * 1024):
+        if boto3 is None:
+            raise RuntimeError('boto3 is required for MEDIA_STORAGE = "s3" (pip install boto3)')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.url_ttl = url_ttl
+        self.public_base_url = public_base_url.rstrip('/') if public_base_url else None
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=region,
+            aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+            # MinIO and most stand-ins only do path-style addressing
+            config=BotoConfig(signature_version='s3v4', s3={'addressing_style': 'path' if endpoint_url else 'auto'}),
+        )
+        # Files bigger than a part go up as multipart uploads, parts in parallel
+        self.transfer = TransferConfig(multipart_threshold=part_size, multipart_chunksize=part_size)
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def _object_args(self, key):
+        return {'ContentType': _content_type(key), 'CacheControl': IMMUTABLE_CACHE_CONTROL}
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+        return True
+
+    def put_file(self, key, local_path):
+        """Upload `local_path` to `key` and delete the local file"""
+        self.client.upload_file(local_path, self.bucket, self._key(key),
+                                ExtraArgs=self._object_args(key), Config=self.transfer)
+        os.remove(local_path)
+
+    def move(self, src_key, dst_key):
+        """Server-side copy (multipart for big objects), then delete the source"""
+        self.client.copy({'Bucket': self.bucket, 'Key': self._key(src_key)}, self.bucket, self._key(dst_key),
+                         ExtraArgs={**self._object_args(dst_key), 'MetadataDirective': 'REPLACE'},
+                         Config=self.transfer)
+        self.delete(src_key)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+
+    def list(self, prefix):
+        """(key, size, last modified - naive UTC) of every object under `prefix`"""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get('Contents', []):
+                modified = obj['LastModified'].astimezone(timezone.utc).replace(tzinfo=None)
+                yield obj['Key'][len(self.prefix):], obj['Size'], modified
+
+    def local_copy(self, key, work_dir):
+        """Download `key` into `work_dir` and return the path"""
+        os.makedirs(work_dir, exist_ok=True)
+        path = os.path.join(work_dir, 'source-' + key.rsplit('/', 1)[-1])
+        self.client.download_file(self.bucket, self._key(key), path, Config=self.transfer)
+        return path
+
+    def download_url(self, key):
+        if self.public_base_url:
+            return f'{self.public_base_url}/{self._key(key)}'
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self._key(key)}, ExpiresIn=self.url_ttl)
+
+    # --- Direct multipart uploads (browser -> bucket) ---
+
+    def create_multipart(self, key):
+        """Start a multipart upload to `key`. Returns its upload id."""
+        return self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=self._key(key), ChecksumAlgorithm='SHA256', **self._object_args(key),
+        )['UploadId']
+
+    def part_url(self, key, upload_id, part_number, sha256):
+        """
+        Presigned PUT for one part. The part's hex SHA-256 is signed into the
+        request, so the bucket rejects a part whose bytes don't match.
+        Returns (url, headers the client must send).
+        """
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url('upload_part', Params={
+            'Bucket': self.bucket, 'Key': self._key(key), 'UploadId': upload_id,
+            'PartNumber': part_number, 'ChecksumSHA256': checksum,
+        }, ExpiresIn=self.url_ttl)
+        return url, {'x-amz-checksum-sha256': checksum}
+
+    def list_parts(self, key, upload_id):
+        """[{'PartNumber', 'ETag', 'Size', 'ChecksumSHA256'}] received so far, None if the upload is gone"""
+        parts = []
+        paginator = self.client.get_paginator('list_parts')
+        try:
+            for page in paginator.paginate(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id):
+                parts.extend(page.get('Parts', []))
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'NoSuchUpload':
+                return None
+            raise
+        return parts
+
+    def complete_multipart(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=self._key(key), UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': p['PartNumber'], 'ETag': p['ETag'],
+                 **({'ChecksumSHA256': p['ChecksumSHA256']} if p.get('ChecksumSHA256') else {})}
+                for p in parts
+            ]},
+        )
+
+    def abort_multipart(self, key, upload_id):
+        try:
+            self.client.abort_multipart_upload(Bucket=self.bucket, Key=self._key(key), UploadId=upload_id)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchUpload':
+                raise
+
+
+def get_storage():
+    """The app's storage backend (MEDIA_STORAGE), created on first use"""
+    storage = current_app.extensions.get('media_storage')
+    if storage is None:
+        config = current_app.config
+        if config.get('MEDIA_STORAGE', 'local') == 's3':
+            storage = S3Storage(
+                config['S3_BUCKET'], prefix=config.get('S3_PREFIX', ''), endpoint_url=config.get('S3_ENDPOINT_URL'),
+                region=config.get('S3_REGION'), access_key=config.get('S3_ACCESS_KEY_ID'),
+                secret_key=config.get('S3_SECRET_ACCESS_KEY'), url_ttl=config.get('MEDIA_URL_TTL_SECONDS', 3600),
+                public_base_url=config.get('MEDIA_PUBLIC_BASE_URL'), part_size=config['UPLOAD_CHUNK_SIZE'],
+            )
+        else:
+            storage = LocalStorage(config['UPLOAD_FOLDER'])
+        current_app.extensions['media_storage'] = storage
+    return storage
@@ -0,0 +1,442 @@
+"""
+Resumable chunked uploads for artwork, audio previews and profile images.
+
+    POST   /api/uploads                 create a session (kind, target, name, size)
+    PUT    /api/uploads/<id>            one chunk: Content-Range + X-Chunk-SHA256
+    POST   /api/uploads/<id>/parts      presigned part URLs (direct uploads)
+    GET    /api/uploads/<id>            offset / parts to resume from
+    POST   /api/uploads/<id>/complete   verify, store and attach to the campaign / profile
+                                        (direct uploads: assemble, the media worker does the rest)
+    DELETE /api/uploads/<id>            abort
+
+Chunks go in order: each one must start at the session's offset and is
+streamed from the request straight into the session's file under
+UPLOAD_FOLDER/.incoming, BLOCK_SIZE bytes at a time, hashing as it goes. A
+chunk whose length or SHA-256 doesn't match is cut off again, so the file
+on disk is always the verified prefix the offset says it is. Resending a
+chunk that already landed (the response got lost) is a no-op. A completed
+upload moves into the content-addressed media store
+(app/services/media_store.py).
+
+With object storage (MEDIA_STORAGE = 's3') a session can be `direct`: it
+is a multipart upload into the bucket, at incoming/<id>, and the browser
+PUTs each UPLOAD_CHUNK_SIZE part to a presigned URL with the part's
+SHA-256 signed in, so the bucket rejects corrupted parts and the app
+never handles the bytes. Completing it only assembles the parts
+(status 'assembled'); repeating that after a lost response or a killed
+worker finds the assembled object and carries on. `flask media-worker`
+then hashes the object (the bucket can't give a whole-file SHA-256 of a
+multipart upload), moves it to its content address and attaches it -
+process_direct_uploads, which commits - off the request and its lock. A
+whole-file checksum mismatch reopens the session on a fresh multipart
+upload, with `error` saying why, so the client can send the parts again.
+
+One request writes to a session at a time (upload_lock, an exclusive
+flock on the session's file - or, for direct sessions, the session row
+locked by a conditional UPDATE); the caller commits before releasing it,
+so the offset and the file move together. Sessions nobody touches for
+UPLOAD_SESSION_TTL_SECONDS are removed by `flask sweep-uploads`.
+
+Apart from process_direct_uploads nothing here commits - the caller owns
+the transaction.
+"""
+from contextlib import contextmanager, closing
+from datetime import datetime, timedelta
+import hashlib
+import math
+import os
+import re
+import secrets
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import Campaign, User, UploadSession
+from app.services.media_store import store_file, store_object
+from app.services.media_jobs import attach_upload
+from app.services.storage import get_storage
+
+try:
+    import fcntl
+except ImportError:  # Windows dev server - one process, nothing to lock against
+    fcntl = None
+
+BLOCK_SIZE = 64 * 1024
+OBJECT_READ_SIZE = 1024 * 1024  # Reading a direct upload back from the bucket
+MAX_PRESIGNED_PARTS = 100  # Per /parts request
+VERIFY_BATCH_SIZE = 4
+# A 'verifying' session whose worker died (or failed) is claimed again after this
+VERIFY_TIMEOUT = timedelta(minutes=10)
+
+SHA256_HEX = re.compile(r'^[0-9a-fA-F]{64}$')
+
+# kind -> allowed extensions (config key) and the model field that points at the file
+UPLOAD_KINDS = {
+    'artwork': {'extensions': 'ALLOWED_IMAGE_EXTENSIONS', 'field': 'artwork_url'},
+    'audio': {'extensions': 'ALLOWED_AUDIO_EXTENSIONS', 'field': 'audio_preview_url'},
+    'profile_image': {'extensions': 'ALLOWED_IMAGE_EXTENSIONS', 'field': 'profile_image_url'},
+}
+
+
+class UploadError(Exception):
+    """Raised when an upload request can't be accepted"""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _incoming_path(session):
+    return os.path.join(current_app.config['UPLOAD_FOLDER'], '.incoming', session.id)
+
+
+def _staging_key(session):
+    return f'incoming/{session.id}'
+
+
+def _part_size():
+    return current_app.config['UPLOAD_CHUNK_SIZE']
+
+
+def _part_count(session):
+    return math.ceil(session.total_size / _part_size())
+
+
+def _part_length(session, number):
+    return min(_part_size(), session.total_size - (number - 1) * _part_size())
+
+
+def _ttl():
+    return timedelta(seconds=current_app.config.get('UPLOAD_SESSION_TTL_SECONDS', 24 * 3600))
+
+
+def upload_target(kind, target_id, user):
+    """The campaign / user an upload of `kind` attaches to. Raises UploadError."""
+    if kind == 'profile_image':
+        if user.role != 'artist' or target_id != user.id:
+            raise UploadError('Not an artist account', 403)
+        return user
+
+    campaign = db.session.get(Campaign, target_id)
+    if campaign is None:
+        raise UploadError('Campaign not found', 404)
+    if campaign.artist_id != user.id:
+        raise UploadError('Unauthorized', 403)
+    return campaign
+
+
+def create_session(user, kind, target_id, filename, size, sha256=None, direct=False):
+    """
+    Open an upload session and its (empty) file - or with direct=True, its
+    multipart upload in the bucket. Raises UploadError.
+    """
+    if kind not in UPLOAD_KINDS:
+        raise UploadError(f"kind must be one of: {', '.join(UPLOAD_KINDS)}")
+    spec = UPLOAD_KINDS[kind]
+    upload_target(kind, target_id, user)
+
+    filename = secure_filename(filename or '')
+    allowed = current_app.config.get(spec['extensions'], set())
+    if '.' not in filename or filename.rsplit('.', 1)[1].lower() not in allowed:
+        raise UploadError(f"Invalid file type. Allowed: {', '.join(sorted(allowed)).upper()}")
+
+    max_size = current_app.config['UPLOAD_MAX_SIZES'][kind]
+    if not isinstance(size, int) or size <= 0:
+        raise UploadError('size must be a positive integer (bytes)')
+    if size > max_size:
+        raise UploadError(f'File too large (max {max_size // (1024 * 1024)} MB)', 413)
+    if sha256 is not None and (not isinstance(sha256, str) or not SHA256_HEX.match(sha256)):
+        raise UploadError('sha256 must be a hex SHA-256 digest')
+    storage = get_storage()
+    if direct and not storage.direct:
+        raise UploadError('Direct uploads need object storage (MEDIA_STORAGE = "s3")')
+
+    session = UploadSession(
+        id=secrets.token_hex(16), user_id=user.id, kind=kind, target_id=target_id, filename=filename,
+        total_size=size, received=0, sha256=sha256.lower() if sha256 else None,
+        expires_at=datetime.utcnow() + _ttl(),
+    )
+    if direct:
+        session.storage_upload_id = storage.create_multipart(_staging_key(session))
+    else:
+        path = _incoming_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+    db.session.add(session)
+    return session
+
+
+@contextmanager
+def upload_lock(session):
+    """
+    Exclusive access to an open session's file for the duration of one
+    request: yields the file, opened r+b (None for a direct upload), with
+    `session` refreshed from the database. Commit before leaving the block.
+    """
+    if session.status != 'open':
+        raise UploadError(f'Upload is {session.status}', 409)
+    if session.storage_upload_id is not None:
+        # No file here: the UPDATE holds the row lock until the caller commits
+        claimed = db.session.execute(
+            update(UploadSession).where(UploadSession.id == session.id, UploadSession.status == 'open')
+            .values(expires_at=datetime.utcnow() + _ttl()).execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.refresh(session)
+        if not claimed:
+            raise UploadError(f'Upload is {session.status}', 409)
+        yield None
+        return
+
+    try:
+        f = open(_incoming_path(session), 'r+b')
+    except FileNotFoundError:
+        raise UploadError('Upload data is gone - start a new upload', 410)
+
+    with f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise UploadError('Another request is writing to this upload', 409)
+        db.session.refresh(session)
+        if session.status != 'open':
+            raise UploadError(f'Upload is {session.status}', 409)
+        yield f
+
+
+def write_chunk(session, f, start, length, stream, checksum):
+    """
+    Append the `length` byte chunk at `start` from `stream` to the locked
+    file `f`, checking it against the hex SHA-256 `checksum`. Returns False
+    when the chunk had already been received. Raises UploadError.
+    """
+    if session.storage_upload_id is not None:
+        raise UploadError('Parts of a direct upload go to their presigned URLs', 409)
+    if start + length <= session.received and start < session.received:
+        return False
+    if start != session.received:
+        raise UploadError(f'Expected a chunk starting at byte {session.received}', 409)
+    if length <= 0 or length > current_app.config['UPLOAD_CHUNK_SIZE']:
+        raise UploadError(f"Chunks must be 1 .. {current_app.config['UPLOAD_CHUNK_SIZE']} bytes")
+    if start + length > session.total_size:
+        raise UploadError('Chunk runs past the end of the file')
+    if not checksum:
+        raise UploadError('X-Chunk-SHA256 header is required')
+
+    digest = hashlib.sha256()
+    f.seek(start)
+    f.truncate()
+    remaining = length
+    while remaining:
+        block = stream.read(min(BLOCK_SIZE, remaining))
+        if not block:
+            break
+        f.write(block)
+        digest.update(block)
+        remaining -= len(block)
+
+    if remaining or digest.hexdigest() != checksum.lower():
+        f.truncate(start)
+        raise UploadError('Chunk is incomplete' if remaining else 'Chunk checksum mismatch', 422)
+
+    f.flush()
+    os.fsync(f.fileno())
+    session.received = start + length
+    session.expires_at = datetime.utcnow() + _ttl()
+    return True
+
+
+def _file_sha256(f):
+    digest = hashlib.sha256()
+    f.seek(0)
+    for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def presign_parts(session, parts):
+    """
+    Upload URLs for parts [{'part_number', 'sha256'}] of a direct upload:
+    [{'part_number', 'size', 'url', 'headers'}]. Raises UploadError.
+    """
+    if session.storage_upload_id is None:
+        raise UploadError('Not a direct upload - PUT the chunks here', 409)
+    if session.status != 'open':
+        raise UploadError(f'Upload is {session.status}', 409)
+    if not isinstance(parts, list) or not 0 < len(parts) <= MAX_PRESIGNED_PARTS:
+        raise UploadError(f'parts must be a list of 1 .. {MAX_PRESIGNED_PARTS} parts')
+
+    count = _part_count(session)
+    storage = get_storage()
+    urls = []
+    for part in parts:
+        number = part.get('part_number') if isinstance(part, dict) else None
+        checksum = part.get('sha256') if isinstance(part, dict) else None
+        if not isinstance(number, int) or not 1 <= number <= count:
+            raise UploadError(f'part_number must be 1 .. {count}')
+        if not isinstance(checksum, str) or not SHA256_HEX.match(checksum):
+            raise UploadError('Every part needs its hex sha256')
+        url, headers = storage.part_url(_staging_key(session), session.storage_upload_id, number, checksum.lower())
+        urls.append({'part_number': number, 'size': _part_length(session, number), 'url': url, 'headers': headers})
+    return urls
+
+
+def received_parts(session):
+    """[{'part_number', 'size'}] of a direct upload that the bucket has so far"""
+    parts = get_storage().list_parts(_staging_key(session), session.storage_upload_id) or []
+    return [{'part_number': p['PartNumber'], 'size': p['Size']} for p in parts]
+
+
+def _assemble_direct(session):
+    """Complete a direct upload's multipart upload into its staging object. Safe to repeat."""
+    storage, key = get_storage(), _staging_key(session)
+    parts = storage.list_parts(key, session.storage_upload_id)
+    if parts is None:
+        # Completed by an earlier request that didn't get to commit - or aborted
+        if storage.exists(key):
+            return
+        raise UploadError('Upload data is gone - start a new upload', 410)
+    numbers = [p['PartNumber'] for p in parts]
+    if numbers != list(range(1, _part_count(session) + 1)) or any(
+            p['Size'] != _part_length(session, p['PartNumber']) for p in parts):
+        received = sum(p['Size'] for p in parts)
+        raise UploadError(f'Upload incomplete: {received} of {session.total_size} bytes', 409)
+    storage.complete_multipart(key, session.storage_upload_id, parts)
+
+
+def _object_sha256(key):
+    digest, size = hashlib.sha256(), 0
+    with closing(get_storage().open(key)) as f:
+        for block in iter(lambda: f.read(OBJECT_READ_SIZE), b''):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def _attach(session, target, blob):
+    url = attach_upload(target, UPLOAD_KINDS[session.kind]['field'], blob)
+    session.status = 'completed'
+    session.received = session.total_size
+    session.media_url = url
+    session.error = None
+    return url
+
+
+def finalize_session(session, f):
+    """
+    Check the complete file (size and, if given, whole-file SHA-256), move it
+    into the media store and point the campaign / profile at it. Returns the
+    media URL - or None for a direct upload, which is only assembled here
+    and left to the media worker (process_direct_uploads). Raises UploadError.
+    """
+    user = db.session.get(User, session.user_id)
+    target = upload_target(session.kind, session.target_id, user)
+
+    if session.storage_upload_id is not None:
+        _assemble_direct(session)
+        session.status = 'assembled'
+        session.error = None
+        session.expires_at = datetime.utcnow() + _ttl()
+        return None
+
+    if session.received != session.total_size:
+        raise UploadError(f'Upload incomplete: {session.received} of {session.total_size} bytes', 409)
+    sha256 = _file_sha256(f)
+    if session.sha256 is not None and sha256 != session.sha256:
+        raise UploadError('File checksum mismatch', 422)
+    return _attach(session, target, store_file(_incoming_path(session), session.filename, sha256))
+
+
+def _claim_direct_uploads(limit, now):
+    """Mark up to `limit` assembled (or abandoned) direct uploads as verifying and return them"""
+    abandoned = and_(UploadSession.status == 'verifying', UploadSession.updated_at < now - VERIFY_TIMEOUT)
+    claimable = or_(UploadSession.status == 'assembled', abandoned)
+    ids = [session_id for (session_id,) in
+           db.session.query(UploadSession.id).filter(claimable).order_by(UploadSession.updated_at).limit(limit)]
+    if not ids:
+        return []
+    # Re-checked in the UPDATE: another worker may have claimed some of them since
+    claimed = db.session.execute(
+        update(UploadSession).where(UploadSession.id.in_(ids), claimable).values(status='verifying', updated_at=now)
+        .returning(UploadSession.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.session.expire_all()
+    return UploadSession.query.filter(UploadSession.id.in_(claimed)).all()
+
+
+def _verify_direct(session):
+    """Hash an assembled direct upload and attach it - or reopen the session if it isn't the file announced"""
+    user = db.session.get(User, session.user_id)
+    target = upload_target(session.kind, session.target_id, user)
+    key = _staging_key(session)
+
+    sha256, size = _object_sha256(key)
+    if size != session.total_size or (session.sha256 is not None and sha256 != session.sha256):
+        storage = get_storage()
+        storage.delete(key)
+        session.storage_upload_id = storage.create_multipart(key)
+        session.status = 'open'
+        session.error = 'File checksum mismatch - upload the parts again'
+        session.expires_at = datetime.utcnow() + _ttl()
+        return None
+    return _attach(session, target, store_object(key, sha256, size, session.filename))
+
+
+def process_direct_uploads(limit=VERIFY_BATCH_SIZE, now=None):
+    """
+    The media worker's half of completing direct uploads: claim assembled
+    sessions, then verify and attach each one, committing as it goes.
+    Returns how many were claimed.
+    """
+    sessions = _claim_direct_uploads(limit, now or datetime.utcnow())
+    db.session.commit()
+
+    for session in sessions:
+        try:
+            _verify_direct(session)
+        except UploadError as e:
+            # The campaign / profile is gone or changed hands: nothing to attach to
+            db.session.rollback()
+            _discard(session, 'failed')
+            session.error = e.message
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Verifying upload %s failed', session.id)
+            # Stays 'verifying': claimed again after VERIFY_TIMEOUT, until sweep-uploads expires it
+            session.error = str(e)[:1000]
+            session.updated_at = datetime.utcnow()
+        db.session.commit()
+    return len(sessions)
+
+
+def _discard(session, status):
+    session.status = status
+    if session.storage_upload_id is not None:
+        storage = get_storage()
+        storage.abort_multipart(_staging_key(session), session.storage_upload_id)
+        # Already assembled (abort is then a NoSuchUpload no-op)
+        storage.delete(_staging_key(session))
+        return
+    try:
+        os.remove(_incoming_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def abort_session(session):
+    """Give up on an open upload and delete what was received"""
+    if session.status != 'open':
+        raise UploadError(f'Upload is {session.status}', 409)
+    _discard(session, 'aborted')
+
+
+def sweep_expired_uploads(now=None):
+    """Expire open (or never verified) sessions past their TTL and delete their data. Returns how many."""
+    sessions = UploadSession.query.filter(
+        UploadSession.status.in_(('open', 'assembled', 'verifying')),
+        UploadSession.expires_at < (now or datetime.utcnow()),
+    ).all()
+    for session in sessions:
+        _discard(session, 'expired')
+    return len(sessions)
@@ -0,0 +1,91 @@
+"""
+Read-only, cached wallet summaries for the balance endpoint.
+
+Reads never INSERT or commit. Summaries are cached per user in Redis
+(WALLET_CACHE_URL), shared by every gunicorn worker, and dropped when a
+transaction that touched that user's wallet commits - on whichever worker:
+
+- ORM changes to Wallet rows (deposit, withdraw, payment verification,
+  payouts - all via get_or_create_wallet / wallet_for) are picked up
+  automatically on flush
+- Core UPDATEs (investments, withdrawal review...) call mark_wallet_dirty()
+
+There is no per-process fallback: a worker can't drop another worker's
+copy, and a balance must not lag a deposit. Without WALLET_CACHE_URL every
+read is one SELECT. The TTL only bounds the damage of a failed delete.
+"""
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Wallet
+from app.services.cache import shared_cache
+
+TTL_SECONDS = 30
+
+
+def _summaries():
+    return shared_cache('WALLET_CACHE_URL', 'wallet', TTL_SECONDS)
+
+_DIRTY_KEY = 'dirty_wallet_users'
+
+
+def get_wallet_summary(user_id):
+    """Wallet as a to_dict()-shaped dict. Cache hit on the hot path, one SELECT otherwise."""
+    user_id = int(user_id)
+    cache = _summaries()
+    summary = cache.get(user_id) if cache is not None else None
+    if summary is not None:
+        return summary
+
+    row = db.session.execute(
+        select(
+            Wallet.id, Wallet.balance, Wallet.total_deposited, Wallet.total_withdrawn,
+            Wallet.total_invested, Wallet.total_earnings, Wallet.created_at, Wallet.updated_at
+        ).where(Wallet.user_id == user_id)
+    ).first()
+
+    if row is None:
+        # Accounts created before wallets were made at registration
+        summary = {
+            'id': None, 'user_id': user_id, 'balance': 0.0,
+            'total_deposited': 0.0, 'total_withdrawn': 0.0,
+            'total_invested': 0.0, 'total_earnings': 0.0,
+            'created_at': None, 'updated_at': None
+        }
+    else:
+        summary = {
+            'id': row.id, 'user_id': user_id, 'balance': round(row.balance, 2),
+            'total_deposited': round(row.total_deposited, 2), 'total_withdrawn': round(row.total_withdrawn, 2),
+            'total_invested': round(row.total_invested, 2), 'total_earnings': round(row.total_earnings, 2),
+            'created_at': row.created_at.isoformat(), 'updated_at': row.updated_at.isoformat()
+        }
+
+    if cache is not None:
+        cache.set(user_id, summary)
+    return summary
+
+
+def mark_wallet_dirty(*user_ids):
+    """Drop these users' cached summaries once the current transaction commits."""
+    db.session.info.setdefault(_DIRTY_KEY, set()).update(int(u) for u in user_ids)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_wallet_changes(session, flush_context):
+    changed = [obj.user_id for obj in list(session.new) + list(session.dirty) if isinstance(obj, Wallet)]
+    if changed:
+        session.info.setdefault(_DIRTY_KEY, set()).update(int(u) for u in changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    user_ids = session.info.pop(_DIRTY_KEY, ())
+    cache = _summaries() if user_ids else None
+    if cache is not None:
+        for user_id in user_ids:
+            cache.pop(user_id)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _forget_rolled_back(session, previous_transaction):
+    session.info.pop(_DIRTY_KEY, None)
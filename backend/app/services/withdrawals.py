@@ -0,0 +1,159 @@
+"""
+Artist withdrawal review.
+
+Approve / reject work on any number of withdrawals at once with one
+set-based statement per table, instead of one request (and one commit)
+per withdrawal.
+"""
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import update, select, insert, bindparam
+from app import db
+from app.models import ArtistWithdrawal, Wallet, WalletTransaction
+from app.services.wallet_cache import mark_wallet_dirty
+
+# WalletTransaction.reference_type used to link a withdrawal to its ledger row
+WITHDRAWAL_REFERENCE_TYPE = 'artist_withdrawal'
+
+# WalletTransaction.transaction_type of the ledger row a rejection writes
+REFUND_TRANSACTION_TYPE = 'withdrawal_refund'
+
+
+def review_withdrawals(withdrawal_ids, approve):
+    """
+    Approve or reject pending withdrawals in bulk. Does NOT commit.
+
+    - artist_withdrawals: pending -> approved / rejected      (1 UPDATE)
+    - wallet_transactions: pending -> completed / rejected   (1 UPDATE,
+      + 1 SELECT / 1 batched UPDATE for pre-link rows, see _link_legacy)
+    - rejected only: refund the artists' wallets             (1 batched UPDATE)
+      and write a refund ledger row per withdrawal           (1 SELECT, 1 INSERT)
+
+    Withdrawals that aren't pending anymore are left alone.
+    Returns the ids that were actually updated.
+    """
+    if not withdrawal_ids:
+        return []
+
+    reviewed = db.session.execute(
+        update(ArtistWithdrawal)
+        .where(ArtistWithdrawal.id.in_(withdrawal_ids), ArtistWithdrawal.status == 'pending')
+        .values(status='approved' if approve else 'rejected')
+        .returning(ArtistWithdrawal.id, ArtistWithdrawal.artist_id, ArtistWithdrawal.amount,
+                   ArtistWithdrawal.created_at)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    if not reviewed:
+        return []
+
+    tx_status = 'completed' if approve else 'rejected'
+    linked = db.session.execute(
+        update(WalletTransaction)
+        .where(
+            WalletTransaction.reference_type == WITHDRAWAL_REFERENCE_TYPE,
+            WalletTransaction.reference_id.in_([str(w.id) for w in reviewed]),
+            WalletTransaction.status == 'pending',
+        )
+        .values(status=tx_status)
+        .returning(WalletTransaction.reference_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    unlinked = [w for w in reviewed if str(w.id) not in set(linked)]
+    if unlinked:
+        _link_legacy(unlinked, tx_status)
+
+    if not approve:
+        _refund(reviewed)
+
+    return [w.id for w in reviewed]
+
+
+def _link_legacy(withdrawals, tx_status):
+    """
+    Withdrawals requested before ledger rows carried reference_id have an
+    unlinked pending 'artist_withdrawal' row. Match each to the unlinked row
+    of the same artist and amount closest in time, link it and set its status.
+    """
+    artist_ids = {w.artist_id for w in withdrawals}
+    candidates = defaultdict(list)
+    for tx in db.session.execute(
+        select(WalletTransaction.id, WalletTransaction.amount, WalletTransaction.created_at, Wallet.user_id)
+        .join(Wallet, Wallet.id == WalletTransaction.wallet_id)
+        .where(
+            Wallet.user_id.in_(artist_ids),
+            WalletTransaction.transaction_type == 'artist_withdrawal',
+            WalletTransaction.reference_id.is_(None),
+            WalletTransaction.status == 'pending',
+        )
+    ):
+        candidates[tx.user_id, tx.amount].append(tx)
+
+    matches = []
+    for w in withdrawals:
+        pool = candidates.get((w.artist_id, w.amount))
+        if not pool:
+            continue
+        tx = min(pool, key=lambda t: abs((t.created_at - w.created_at).total_seconds()))
+        pool.remove(tx)
+        matches.append({'tx_id': tx.id, 'withdrawal_id': str(w.id)})
+
+    if matches:
+        table = WalletTransaction.__table__
+        db.session.execute(
+            table.update()
+            .where(table.c.id == bindparam('tx_id'))
+            .values(reference_id=bindparam('withdrawal_id'), reference_type=WITHDRAWAL_REFERENCE_TYPE,
+                    status=tx_status),
+            matches,
+        )
+
+
+def _refund(withdrawals):
+    """Give rejected withdrawals back to the artists' wallets, with a ledger row each"""
+    # The money left the wallet when the artist asked for it - give it back
+    refunds = defaultdict(float)
+    for w in withdrawals:
+        refunds[w.artist_id] += w.amount
+
+    now = datetime.utcnow()
+    table = Wallet.__table__
+    db.session.execute(
+        table.update()
+        .where(table.c.user_id == bindparam('artist_id'))
+        .values(
+            balance=table.c.balance + bindparam('refund'),
+            total_withdrawn=table.c.total_withdrawn - bindparam('refund'),
+            updated_at=now,
+        ),
+        [{'artist_id': artist_id, 'refund': amount} for artist_id, amount in refunds.items()],
+    )
+    mark_wallet_dirty(*refunds)
+
+    # Replay each artist's refunds up to the balance the UPDATE left
+    wallets = db.session.execute(
+        select(Wallet.user_id, Wallet.id, Wallet.balance).where(Wallet.user_id.in_(refunds))
+    ).all()
+    running = {w.user_id: (w.id, w.balance - refunds[w.user_id]) for w in wallets}
+    rows = []
+    for w in withdrawals:
+        if w.artist_id not in running:
+            continue
+        wallet_id, balance = running[w.artist_id]
+        running[w.artist_id] = (wallet_id, balance + w.amount)
+        rows.append({
+            'wallet_id': wallet_id,
+            'transaction_type': REFUND_TRANSACTION_TYPE,
+            'amount': w.amount,
+            'balance_before': balance,
+            'balance_after': balance + w.amount,
+            'description': 'Refund of rejected withdrawal request',
+            'reference_id': str(w.id),
+            'reference_type': WITHDRAWAL_REFERENCE_TYPE,
+            'status': 'completed',
+            'created_at': now,
+            'settled_at': now,
+        })
+    if rows:
+        db.session.execute(insert(WalletTransaction), rows)
@@ -1,6 +1,8 @@
 import os
 from datetime import timedelta
 
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
 class Config:
     # Database (SQLite - no setup needed)
     SQLALCHEMY_DATABASE_URI = 'sqlite:///fannybags.db'
@@ -21,11 +23,45 @@ class Config:
     DEBUG = True
     TESTING = False
 
-    UPLOAD_FOLDER = 'uploads'
+    # Absolute, so every process agrees on it whatever its working directory
+    UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', os.path.join(BASE_DIR, 'uploads'))
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
     ALLOWED_AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a', 'ogg'}
 
+    # Resumable chunked uploads (/api/uploads). Chunks must fit in MAX_CONTENT_LENGTH.
+    UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+    UPLOAD_MAX_SIZES = {'artwork': 50 * 1024 * 1024, 'audio': 500 * 1024 * 1024, 'profile_image': 20 * 1024 * 1024}
+    UPLOAD_SESSION_TTL_SECONDS = 24 * 3600  # Since the last chunk
+
+    # Unreferenced media blobs are kept this long before `flask gc-media` deletes them
+    MEDIA_GC_GRACE_SECONDS = 24 * 3600
+
+    # Let the front server send /uploads files (app/routes/media.py): 'x-accel' (nginx) or 'x-sendfile'
+    MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD')
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/_media/')  # nginx internal location for x-accel
+
+    # Where media is stored (app/services/storage.py): 'local' (UPLOAD_FOLDER) or 's3' (needs boto3)
+    MEDIA_STORAGE = os.environ.get('MEDIA_STORAGE', 'local')
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_PREFIX = os.environ.get('S3_PREFIX', '')
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # MinIO or another S3-compatible store; unset for AWS
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')  # Unset: boto3's usual credential chain
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    MEDIA_URL_TTL_SECONDS = 3600  # Presigned download and part upload URLs
+    MEDIA_PUBLIC_BASE_URL = os.environ.get('MEDIA_PUBLIC_BASE_URL')  # Public bucket / CDN URL instead of presigning
+
+    # Checkout holds on campaign partitions (seconds)
+    RESERVATION_TTL_SECONDS = 5 * 60
+
+    # Shared /predict-revenue cache across workers, e.g. redis://localhost:6379/0 (needs redis)
+    PREDICTION_CACHE_URL = os.environ.get('PREDICTION_CACHE_URL')
+
+    # Wallet balance cache shared by all workers, e.g. redis://localhost:6379/1 (needs redis).
+    # Unset: balances aren't cached at all
+    WALLET_CACHE_URL = os.environ.get('WALLET_CACHE_URL')
+
     RAZORPAY_KEY_ID = 'rzp_test_RmmO8FAE4F95Gk'  # Your Test Key ID
     RAZORPAY_KEY_SECRET = 'J5q7st9JfMfVwcRnzPx7ZVg3'  # Your Test Key Secret
     
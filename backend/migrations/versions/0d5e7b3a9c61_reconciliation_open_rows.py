@@ -0,0 +1,29 @@
+"""reconciliation open rows
+
+Revision ID: 0d5e7b3a9c61
+Revises: f3a8c1d7b294
+Create Date: 2026-10-20 10:03:27.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0d5e7b3a9c61'
+down_revision = 'f3a8c1d7b294'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('wallet_reconciliation_runs')]
+
+    if 'open_tx_ids' not in columns:
+        with op.batch_alter_table('wallet_reconciliation_runs', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('open_tx_ids', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('wallet_reconciliation_runs', schema=None) as batch_op:
+        batch_op.drop_column('open_tx_ids')
@@ -0,0 +1,35 @@
+"""transaction settled_at
+
+Revision ID: 2a9f6d4c8e15
+Revises: 6c1e4f8a2b97
+Create Date: 2026-10-20 12:40:09.664815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2a9f6d4c8e15'
+down_revision = '6c1e4f8a2b97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('settled_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_wallet_transactions_settled_at'), ['settled_at'], unique=False)
+
+    # Rows counting toward their wallet today: when they settled isn't known, so when they were created
+    op.execute("""
+        UPDATE wallet_transactions SET settled_at = created_at
+        WHERE status = 'completed'
+           OR (transaction_type = 'artist_withdrawal' AND status IN ('pending', 'rejected'))
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_wallet_transactions_settled_at'))
+        batch_op.drop_column('settled_at')
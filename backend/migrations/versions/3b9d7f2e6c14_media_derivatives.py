@@ -0,0 +1,61 @@
+"""media derivatives
+
+Revision ID: 3b9d7f2e6c14
+Revises: 8e4c2a7f1b63
+Create Date: 2026-10-19 21:12:40.517306
+
+Derivatives for images uploaded before this are queued by
+`flask enqueue-media-jobs`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d7f2e6c14'
+down_revision = '8e4c2a7f1b63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('artwork_variants', sa.JSON(), nullable=True))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profile_image_variants', sa.JSON(), nullable=True))
+
+    # create_all() in create_app may already have built this
+    if 'media_jobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('media_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_type', sa.String(length=30), nullable=False),
+    sa.Column('target_type', sa.String(length=20), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('field', sa.String(length=50), nullable=False),
+    sa.Column('source_sha256', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('media_jobs', schema=None) as batch_op:
+        batch_op.create_index('ix_media_jobs_status_id', ['status', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('media_jobs', schema=None) as batch_op:
+        batch_op.drop_index('ix_media_jobs_status_id')
+
+    op.drop_table('media_jobs')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('profile_image_variants')
+
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.drop_column('artwork_variants')
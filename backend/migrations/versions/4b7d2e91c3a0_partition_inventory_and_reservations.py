@@ -0,0 +1,65 @@
+"""partition inventory + reservations
+
+Revision ID: 4b7d2e91c3a0
+Revises: ee1621e7fd58
+Create Date: 2026-10-19 10:12:41.551203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2e91c3a0'
+down_revision = 'ee1621e7fd58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('partitions_remaining', sa.Integer(), nullable=True))
+
+    # Backfill: total supply minus what's already been sold
+    op.execute("""
+        UPDATE campaigns
+        SET partitions_remaining = total_partitions - COALESCE((
+            SELECT SUM(p.partitions_bought) FROM partitions p
+            WHERE p.campaign_id = campaigns.id AND p.status = 'confirmed'
+        ), 0)
+        WHERE total_partitions IS NOT NULL
+    """)
+    op.execute("UPDATE campaigns SET partitions_remaining = 0 WHERE partitions_remaining < 0")
+
+    # create_all() in create_app may already have built the table
+    if 'partition_reservations' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('partition_reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('partitions', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('partition_reservations', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_partition_reservations_campaign_id'), ['campaign_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_partition_reservations_user_id'), ['user_id'], unique=False)
+        batch_op.create_index('ix_partition_reservations_status_expires_at', ['status', 'expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('partition_reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_partition_reservations_status_expires_at')
+        batch_op.drop_index(batch_op.f('ix_partition_reservations_user_id'))
+        batch_op.drop_index(batch_op.f('ix_partition_reservations_campaign_id'))
+
+    op.drop_table('partition_reservations')
+
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        batch_op.drop_column('partitions_remaining')
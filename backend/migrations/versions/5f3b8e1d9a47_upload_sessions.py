@@ -0,0 +1,53 @@
+"""upload sessions
+
+Revision ID: 5f3b8e1d9a47
+Revises: d81a6c3f5e92
+Create Date: 2026-10-19 19:24:52.903716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f3b8e1d9a47'
+down_revision = 'd81a6c3f5e92'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built this
+    if 'upload_sessions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('total_size', sa.BigInteger(), nullable=False),
+    sa.Column('received', sa.BigInteger(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('media_url', sa.String(length=500), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_upload_sessions_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_upload_sessions_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_upload_sessions_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_status'))
+        batch_op.drop_index(batch_op.f('ix_upload_sessions_user_id'))
+
+    op.drop_table('upload_sessions')
@@ -0,0 +1,34 @@
+"""derive expected return
+
+Revision ID: 6c1e4f8a2b97
+Revises: 0d5e7b3a9c61
+Create Date: 2026-10-20 11:26:40.873195
+
+portfolio_positions.expected_return_3m went stale whenever a campaign's
+forecast changed; it is now computed from the campaign when read
+(app/services/positions.py expected_return).
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c1e4f8a2b97'
+down_revision = '0d5e7b3a9c61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('portfolio_positions')]
+
+    # Only tables built before b5e1f7c3a920 dropped it have the column
+    if 'expected_return_3m' in columns:
+        with op.batch_alter_table('portfolio_positions', schema=None) as batch_op:
+            batch_op.drop_column('expected_return_3m')
+
+
+def downgrade():
+    # Zero until `flask rebuild-positions` (of the previous release) recomputes it
+    with op.batch_alter_table('portfolio_positions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('expected_return_3m', sa.Float(), nullable=False, server_default='0'))
@@ -0,0 +1,59 @@
+"""transaction campaign fk
+
+Revision ID: 7a2c9e4b1d05
+Revises: d3e8a4f0b612
+Create Date: 2026-10-19 13:05:41.227160
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2c9e4b1d05'
+down_revision = 'd3e8a4f0b612'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 5000
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = [c['name'] for c in sa.inspect(bind).get_columns('transactions')]
+
+    if 'campaign_id' not in columns:
+        with op.batch_alter_table('transactions', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('campaign_id', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_transactions_campaign_id'), ['campaign_id'], unique=False)
+            batch_op.create_foreign_key('fk_transactions_campaign_id_campaigns', 'campaigns', ['campaign_id'], ['id'])
+
+    # Purchases and revenue shares carry the campaign in their reference:
+    # TXN_<campaign>_<user>_... and DIST_<campaign>_<investor|ARTIST>_...
+    transactions = sa.table('transactions',
+        sa.column('id', sa.Integer), sa.column('campaign_id', sa.Integer), sa.column('tx_reference', sa.String))
+    campaign_ids = {row.id for row in bind.execute(sa.text('SELECT id FROM campaigns'))}
+    rows = bind.execute(
+        sa.select(transactions.c.id, transactions.c.tx_reference).where(
+            transactions.c.campaign_id.is_(None),
+            sa.or_(transactions.c.tx_reference.like('TXN\\_%', escape='\\'),
+                   transactions.c.tx_reference.like('DIST\\_%', escape='\\')),
+        )
+    ).all()
+
+    params = []
+    for tx_id, reference in rows:
+        part = reference.split('_')[1]
+        if part.isdigit() and int(part) in campaign_ids:
+            params.append({'tx_id': tx_id, 'cid': int(part)})
+
+    stmt = transactions.update().where(transactions.c.id == sa.bindparam('tx_id')).values(campaign_id=sa.bindparam('cid'))
+    for start in range(0, len(params), BACKFILL_CHUNK):
+        bind.execute(stmt, params[start:start + BACKFILL_CHUNK])
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_transactions_campaign_id_campaigns', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_transactions_campaign_id'))
+        batch_op.drop_column('campaign_id')
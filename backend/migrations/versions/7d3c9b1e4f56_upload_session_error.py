@@ -0,0 +1,29 @@
+"""upload session error
+
+Revision ID: 7d3c9b1e4f56
+Revises: 2a9f6d4c8e15
+Create Date: 2026-10-20 13:18:52.207431
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d3c9b1e4f56'
+down_revision = '2a9f6d4c8e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('upload_sessions')]
+
+    if 'error' not in columns:
+        with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('error', sa.Text(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_column('error')
@@ -0,0 +1,43 @@
+"""media blobs
+
+Revision ID: 8e4c2a7f1b63
+Revises: 5f3b8e1d9a47
+Create Date: 2026-10-19 19:51:06.284139
+
+Existing /uploads/<folder>/<name> files are moved into the media store by
+`flask import-legacy-media`, not here - it's file work, not schema.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4c2a7f1b63'
+down_revision = '5f3b8e1d9a47'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built this
+    if 'media_blobs' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('media_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('extension', sa.String(length=10), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('unreferenced_since', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('sha256')
+    )
+    with op.batch_alter_table('media_blobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_media_blobs_unreferenced_since'), ['unreferenced_since'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('media_blobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_media_blobs_unreferenced_since'))
+
+    op.drop_table('media_blobs')
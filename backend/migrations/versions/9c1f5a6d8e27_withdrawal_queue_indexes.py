@@ -0,0 +1,33 @@
+"""withdrawal queue indexes
+
+Revision ID: 9c1f5a6d8e27
+Revises: 4b7d2e91c3a0
+Create Date: 2026-10-19 11:02:17.204418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1f5a6d8e27'
+down_revision = '4b7d2e91c3a0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built these
+    existing = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('artist_withdrawals')}
+
+    with op.batch_alter_table('artist_withdrawals', schema=None) as batch_op:
+        if 'ix_artist_withdrawals_artist_id' not in existing:
+            batch_op.create_index(batch_op.f('ix_artist_withdrawals_artist_id'), ['artist_id'], unique=False)
+        if 'ix_artist_withdrawals_status_created_at' not in existing:
+            batch_op.create_index('ix_artist_withdrawals_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artist_withdrawals', schema=None) as batch_op:
+        batch_op.drop_index('ix_artist_withdrawals_status_created_at')
+        batch_op.drop_index(batch_op.f('ix_artist_withdrawals_artist_id'))
@@ -0,0 +1,35 @@
+"""audio analysis
+
+Revision ID: a4e81c5d9f20
+Revises: 3b9d7f2e6c14
+Create Date: 2026-10-19 22:03:17.840215
+
+Audio uploaded before this is analysed after `flask enqueue-media-jobs`.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4e81c5d9f20'
+down_revision = '3b9d7f2e6c14'
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    ('audio_duration', sa.Float()),
+    ('audio_peaks_url', sa.String(length=500)),
+    ('audio_metadata', sa.JSON()),
+)
+
+
+def upgrade():
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        for name, type_ in COLUMNS:
+            batch_op.add_column(sa.Column(name, type_, nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('campaigns', schema=None) as batch_op:
+        for name, _ in reversed(COLUMNS):
+            batch_op.drop_column(name)
@@ -0,0 +1,67 @@
+"""portfolio report tables
+
+Revision ID: a83f5d1e6c24
+Revises: f1b7c4e9d2a6
+Create Date: 2026-10-19 15:40:09.172845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83f5d1e6c24'
+down_revision = 'f1b7c4e9d2a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built these
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'portfolio_report_runs' not in existing:
+        op.create_table('portfolio_report_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('investor_count', sa.Integer(), nullable=False),
+        sa.Column('output_path', sa.String(length=500), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('portfolio_report_runs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_portfolio_report_runs_started_at'), ['started_at'], unique=False)
+
+    if 'portfolio_report_rows' not in existing:
+        op.create_table('portfolio_report_rows',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('investor_id', sa.Integer(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('total_deposited', sa.Float(), nullable=False),
+        sa.Column('total_invested', sa.Float(), nullable=False),
+        sa.Column('total_earnings', sa.Float(), nullable=False),
+        sa.Column('positions', sa.Integer(), nullable=False),
+        sa.Column('invested_amount', sa.Float(), nullable=False),
+        sa.Column('realized_earnings', sa.Float(), nullable=False),
+        sa.Column('pending_earnings', sa.Float(), nullable=False),
+        sa.Column('expected_return_3m', sa.Float(), nullable=False),
+        sa.Column('roi_pct', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['investor_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['run_id'], ['portfolio_report_runs.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('portfolio_report_rows', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_portfolio_report_rows_run_id'), ['run_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_report_rows', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolio_report_rows_run_id'))
+
+    op.drop_table('portfolio_report_rows')
+    with op.batch_alter_table('portfolio_report_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolio_report_runs_started_at'))
+
+    op.drop_table('portfolio_report_runs')
@@ -0,0 +1,69 @@
+"""portfolio positions
+
+Revision ID: b5e1f7c3a920
+Revises: 7a2c9e4b1d05
+Create Date: 2026-10-19 13:48:12.604318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1f7c3a920'
+down_revision = '7a2c9e4b1d05'
+branch_labels = None
+depends_on = None
+
+# Same computation as app.services.positions.rebuild_positions
+BACKFILL = """
+INSERT INTO portfolio_positions (investor_id, campaign_id, partitions_owned, invested_amount,
+    realized_earnings, roi_pct, first_invested_at, updated_at)
+SELECT h.investor_id, h.campaign_id, h.partitions_owned,
+    COALESCE(p.amount, 0.0),
+    COALESCE(e.amount, 0.0),
+    CASE WHEN COALESCE(p.amount, 0.0) > 0 THEN COALESCE(e.amount, 0.0) * 100.0 / p.amount ELSE 0.0 END,
+    h.created_at, CURRENT_TIMESTAMP
+FROM investor_holdings h
+LEFT JOIN (SELECT buyer_id, campaign_id, SUM(amount_paid) AS amount
+           FROM partitions GROUP BY buyer_id, campaign_id) p
+    ON p.buyer_id = h.investor_id AND p.campaign_id = h.campaign_id
+LEFT JOIN (SELECT user_id, campaign_id, SUM(amount) AS amount
+           FROM transactions
+           WHERE tx_type = 'revenue_distribution' AND status = 'completed' AND campaign_id IS NOT NULL
+           GROUP BY user_id, campaign_id) e
+    ON e.user_id = h.investor_id AND e.campaign_id = h.campaign_id
+"""
+
+
+def upgrade():
+    bind = op.get_bind()
+    # create_all() in create_app may already have built this
+    if 'portfolio_positions' not in sa.inspect(bind).get_table_names():
+        op.create_table('portfolio_positions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('investor_id', sa.Integer(), nullable=False),
+        sa.Column('campaign_id', sa.Integer(), nullable=False),
+        sa.Column('partitions_owned', sa.Integer(), nullable=False),
+        sa.Column('invested_amount', sa.Float(), nullable=False),
+        sa.Column('realized_earnings', sa.Float(), nullable=False),
+        sa.Column('roi_pct', sa.Float(), nullable=False),
+        sa.Column('first_invested_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['campaign_id'], ['campaigns.id'], ),
+        sa.ForeignKeyConstraint(['investor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('investor_id', 'campaign_id', name='_position_investor_campaign_uc')
+        )
+        with op.batch_alter_table('portfolio_positions', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_portfolio_positions_campaign_id'), ['campaign_id'], unique=False)
+
+    if not bind.execute(sa.text('SELECT 1 FROM portfolio_positions LIMIT 1')).first():
+        bind.execute(sa.text(BACKFILL))
+
+
+def downgrade():
+    with op.batch_alter_table('portfolio_positions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolio_positions_campaign_id'))
+
+    op.drop_table('portfolio_positions')
@@ -0,0 +1,147 @@
+"""unified ledger
+
+Revision ID: c6e2f9a4b718
+Revises: a83f5d1e6c24
+Create Date: 2026-10-19 16:12:37.508213
+
+Folds the legacy transactions table into wallet_transactions (see
+app/services/ledger.py). Investor revenue shares already have their payout
+row and are skipped; purchases and artist shares are copied as
+'purchase' / 'artist_revenue' rows, in id chunks. The legacy table is left
+in place, no longer written.
+
+Downgrade copies purchase / artist_revenue rows that only exist in the
+ledger back into transactions; payouts made after the upgrade are not
+mirrored back.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2f9a4b718'
+down_revision = 'a83f5d1e6c24'
+branch_labels = None
+depends_on = None
+
+BACKFILL_CHUNK = 5000
+
+# Investments and revenue payouts carry the campaign in reference_id
+CAMPAIGN_BACKFILL = """
+UPDATE wallet_transactions SET campaign_id = CAST(reference_id AS INTEGER)
+WHERE id BETWEEN :lo AND :hi AND campaign_id IS NULL
+  AND reference_type IN ('campaign', 'revenue')
+  AND reference_id IN (SELECT CAST(id AS VARCHAR(20)) FROM campaigns)
+"""
+
+# Rows can only be linked to a user through their wallet
+MISSING_WALLETS = """
+INSERT INTO wallets (user_id, balance, total_deposited, total_withdrawn, total_invested, total_earnings,
+    created_at, updated_at)
+SELECT DISTINCT t.user_id, 0.0, 0.0, 0.0, 0.0, 0.0, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+FROM transactions t
+WHERE NOT EXISTS (SELECT 1 FROM wallets w WHERE w.user_id = t.user_id)
+"""
+
+# Wallet balance as of the legacy row, from the ledger (same rules as
+# app.services.reconciliation.LEDGER_EFFECTS)
+BALANCE_AT = """
+(SELECT COALESCE(SUM(CASE
+        WHEN l.transaction_type IN ('deposit', 'payout', 'artist_fee') THEN l.amount
+        WHEN l.transaction_type IN ('withdraw', 'artist_withdrawal', 'investment') THEN -l.amount
+        ELSE 0.0 END), 0.0)
+ FROM wallet_transactions l
+ WHERE l.wallet_id = w.id AND l.created_at <= t.created_at
+   AND (l.status = 'completed' OR (l.transaction_type = 'artist_withdrawal' AND l.status = 'pending')))
+"""
+
+IS_ARTIST_SHARE = "t.tx_reference LIKE 'DIST\\_%\\_ARTIST\\_%' ESCAPE '\\'"
+
+# A revenue share without a payout row (there should be none) becomes a
+# payout, so reconciliation flags the wallet that was never credited
+LEDGER_BACKFILL = f"""
+INSERT INTO wallet_transactions (wallet_id, campaign_id, transaction_type, amount, balance_before,
+    balance_after, description, reference_id, reference_type, status, tx_reference, created_at)
+SELECT w.id, t.campaign_id,
+    CASE WHEN t.tx_type = 'purchase' THEN 'purchase'
+         WHEN {IS_ARTIST_SHARE} THEN 'artist_revenue'
+         ELSE 'payout' END,
+    t.amount, {BALANCE_AT},
+    {BALANCE_AT} + CASE WHEN t.tx_type = 'revenue_distribution' AND NOT {IS_ARTIST_SHARE}
+                        THEN t.amount ELSE 0.0 END,
+    t.description,
+    CASE WHEN t.tx_type = 'purchase' THEN NULL ELSE CAST(t.campaign_id AS VARCHAR(20)) END,
+    CASE WHEN t.tx_type = 'purchase' THEN NULL ELSE 'revenue' END,
+    t.status, t.tx_reference, t.created_at
+FROM transactions t
+JOIN wallets w ON w.user_id = t.user_id
+WHERE t.id BETWEEN :lo AND :hi
+  AND NOT EXISTS (SELECT 1 FROM wallet_transactions x WHERE x.tx_reference = t.tx_reference)
+  AND NOT (t.tx_type = 'revenue_distribution' AND NOT {IS_ARTIST_SHARE} AND EXISTS (
+      SELECT 1 FROM wallet_transactions p
+      WHERE p.wallet_id = w.id AND p.transaction_type = 'payout' AND p.reference_type = 'revenue'
+        AND p.reference_id = CAST(t.campaign_id AS VARCHAR(20)) AND ABS(p.amount - t.amount) < 0.005))
+"""
+
+LEGACY_RESTORE = """
+INSERT INTO transactions (user_id, campaign_id, tx_type, amount, status, tx_reference, description, created_at)
+SELECT w.user_id, l.campaign_id,
+    CASE WHEN l.transaction_type = 'purchase' THEN 'purchase' ELSE 'revenue_distribution' END,
+    l.amount, l.status, l.tx_reference, l.description, l.created_at
+FROM wallet_transactions l
+JOIN wallets w ON w.id = l.wallet_id
+WHERE l.transaction_type IN ('purchase', 'artist_revenue')
+  AND NOT EXISTS (SELECT 1 FROM transactions t WHERE t.tx_reference = l.tx_reference)
+"""
+
+
+def _chunks(bind, table):
+    lo, hi = bind.execute(sa.text(f'SELECT MIN(id), MAX(id) FROM {table}')).one()
+    if lo is None:
+        return
+    for start in range(lo, hi + 1, BACKFILL_CHUNK):
+        yield {'lo': start, 'hi': start + BACKFILL_CHUNK - 1}
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = [c['name'] for c in inspector.get_columns('wallet_transactions')]
+    indexes = {ix['name'] for ix in inspector.get_indexes('wallet_transactions')}
+
+    # create_all() in create_app may already have added these
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        if 'campaign_id' not in columns:
+            batch_op.add_column(sa.Column('campaign_id', sa.Integer(), nullable=True))
+            batch_op.create_index(batch_op.f('ix_wallet_transactions_campaign_id'), ['campaign_id'], unique=False)
+            batch_op.create_foreign_key('fk_wallet_transactions_campaign_id_campaigns', 'campaigns',
+                                        ['campaign_id'], ['id'])
+        if 'tx_reference' not in columns:
+            batch_op.add_column(sa.Column('tx_reference', sa.String(length=255), nullable=True))
+            batch_op.create_index(batch_op.f('ix_wallet_transactions_tx_reference'), ['tx_reference'], unique=True)
+        if 'ix_wallet_transactions_wallet_type_status_amount' not in indexes:
+            batch_op.create_index('ix_wallet_transactions_wallet_type_status_amount',
+                                  ['wallet_id', 'transaction_type', 'status', 'amount'], unique=False)
+
+    for bounds in _chunks(bind, 'wallet_transactions'):
+        bind.execute(sa.text(CAMPAIGN_BACKFILL), bounds)
+
+    bind.execute(sa.text(MISSING_WALLETS))
+    for bounds in _chunks(bind, 'transactions'):
+        bind.execute(sa.text(LEDGER_BACKFILL), bounds)
+
+
+def downgrade():
+    bind = op.get_bind()
+    bind.execute(sa.text(LEGACY_RESTORE))
+    bind.execute(sa.text(
+        "DELETE FROM wallet_transactions WHERE transaction_type IN ('purchase', 'artist_revenue')"
+    ))
+
+    with op.batch_alter_table('wallet_transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_wallet_transactions_wallet_type_status_amount')
+        batch_op.drop_index(batch_op.f('ix_wallet_transactions_tx_reference'))
+        batch_op.drop_column('tx_reference')
+        batch_op.drop_constraint('fk_wallet_transactions_campaign_id_campaigns', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_wallet_transactions_campaign_id'))
+        batch_op.drop_column('campaign_id')
@@ -0,0 +1,29 @@
+"""direct uploads
+
+Revision ID: c7f3a9e2d5b8
+Revises: a4e81c5d9f20
+Create Date: 2026-10-19 23:08:52.603914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f3a9e2d5b8'
+down_revision = 'a4e81c5d9f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = [c['name'] for c in sa.inspect(op.get_bind()).get_columns('upload_sessions')]
+
+    if 'storage_upload_id' not in columns:
+        with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('storage_upload_id', sa.String(length=255), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_column('storage_upload_id')
@@ -0,0 +1,82 @@
+"""wallet reconciliation tables
+
+Revision ID: d3e8a4f0b612
+Revises: 9c1f5a6d8e27
+Create Date: 2026-10-19 12:20:05.918733
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3e8a4f0b612'
+down_revision = '9c1f5a6d8e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built these
+    existing = sa.inspect(op.get_bind()).get_table_names()
+
+    if 'wallet_ledger_checkpoints' not in existing:
+        op.create_table('wallet_ledger_checkpoints',
+        sa.Column('wallet_id', sa.Integer(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('total_deposited', sa.Float(), nullable=False),
+        sa.Column('total_withdrawn', sa.Float(), nullable=False),
+        sa.Column('total_invested', sa.Float(), nullable=False),
+        sa.Column('total_earnings', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+        sa.PrimaryKeyConstraint('wallet_id')
+        )
+
+    if 'wallet_reconciliation_runs' not in existing:
+        op.create_table('wallet_reconciliation_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('mode', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('watermark_tx_id', sa.Integer(), nullable=True),
+        sa.Column('ledger_rows_scanned', sa.Integer(), nullable=False),
+        sa.Column('wallets_checked', sa.Integer(), nullable=False),
+        sa.Column('discrepancy_count', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('wallet_reconciliation_runs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_wallet_reconciliation_runs_started_at'), ['started_at'], unique=False)
+
+    if 'wallet_discrepancies' not in existing:
+        op.create_table('wallet_discrepancies',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('wallet_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('field', sa.String(length=30), nullable=False),
+        sa.Column('expected', sa.Float(), nullable=False),
+        sa.Column('actual', sa.Float(), nullable=False),
+        sa.Column('difference', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['run_id'], ['wallet_reconciliation_runs.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['wallet_id'], ['wallets.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('wallet_discrepancies', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_wallet_discrepancies_run_id'), ['run_id'], unique=False)
+            batch_op.create_index(batch_op.f('ix_wallet_discrepancies_wallet_id'), ['wallet_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('wallet_discrepancies', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_wallet_discrepancies_wallet_id'))
+        batch_op.drop_index(batch_op.f('ix_wallet_discrepancies_run_id'))
+
+    op.drop_table('wallet_discrepancies')
+
+    with op.batch_alter_table('wallet_reconciliation_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_wallet_reconciliation_runs_started_at'))
+
+    op.drop_table('wallet_reconciliation_runs')
+    op.drop_table('wallet_ledger_checkpoints')
@@ -0,0 +1,43 @@
+"""revenue model versions
+
+Revision ID: d81a6c3f5e92
+Revises: c6e2f9a4b718
+Create Date: 2026-10-19 18:58:21.640117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81a6c3f5e92'
+down_revision = 'c6e2f9a4b718'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all() in create_app may already have built this
+    if 'revenue_model_versions' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('revenue_model_versions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('parameters', sa.JSON(), nullable=False),
+    sa.Column('campaigns_used', sa.Integer(), nullable=False),
+    sa.Column('rmse_before', sa.Float(), nullable=True),
+    sa.Column('rmse_after', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('activated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('revenue_model_versions', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_revenue_model_versions_is_active'), ['is_active'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('revenue_model_versions', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_revenue_model_versions_is_active'))
+
+    op.drop_table('revenue_model_versions')
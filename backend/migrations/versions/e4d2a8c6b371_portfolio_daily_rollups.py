@@ -0,0 +1,64 @@
+"""portfolio daily rollups
+
+Revision ID: e4d2a8c6b371
+Revises: b5e1f7c3a920
+Create Date: 2026-10-19 14:31:27.551093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4d2a8c6b371'
+down_revision = 'b5e1f7c3a920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    # create_all() in create_app may already have built these
+    existing = inspector.get_table_names()
+
+    if 'portfolio_daily_rollups' not in existing:
+        op.create_table('portfolio_daily_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('investor_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('invested', sa.Float(), nullable=False),
+        sa.Column('earnings', sa.Float(), nullable=False),
+        sa.Column('balance', sa.Float(), nullable=False),
+        sa.Column('positions', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['investor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('investor_id', 'day', name='_rollup_investor_day_uc')
+        )
+
+    if 'portfolio_rollup_runs' not in existing:
+        op.create_table('portfolio_rollup_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('investors_updated', sa.Integer(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+        with op.batch_alter_table('portfolio_rollup_runs', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_portfolio_rollup_runs_day'), ['day'], unique=False)
+
+    holding_indexes = {ix['name'] for ix in inspector.get_indexes('investor_holdings')}
+    if 'ix_investor_holdings_created_at' not in holding_indexes:
+        with op.batch_alter_table('investor_holdings', schema=None) as batch_op:
+            batch_op.create_index(batch_op.f('ix_investor_holdings_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('investor_holdings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_investor_holdings_created_at'))
+
+    with op.batch_alter_table('portfolio_rollup_runs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_portfolio_rollup_runs_day'))
+
+    op.drop_table('portfolio_rollup_runs')
+    op.drop_table('portfolio_daily_rollups')
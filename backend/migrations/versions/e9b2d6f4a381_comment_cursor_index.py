@@ -0,0 +1,35 @@
+"""comment cursor index
+
+Revision ID: e9b2d6f4a381
+Revises: c7f3a9e2d5b8
+Create Date: 2026-10-19 23:41:05.127483
+
+(campaign_id, created_at, id) serves the cursor-paginated comment list and
+replaces the single-column campaign_id index.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9b2d6f4a381'
+down_revision = 'c7f3a9e2d5b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('comments')}
+
+    # create_all() in create_app may already have built this
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        if 'ix_comments_campaign_created_id' not in indexes:
+            batch_op.create_index('ix_comments_campaign_created_id', ['campaign_id', 'created_at', 'id'], unique=False)
+        if 'ix_comments_campaign_id' in indexes:
+            batch_op.drop_index('ix_comments_campaign_id')
+
+
+def downgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_campaign_id', ['campaign_id'], unique=False)
+        batch_op.drop_index('ix_comments_campaign_created_id')
@@ -0,0 +1,29 @@
+"""transaction earnings covering index
+
+Revision ID: f1b7c4e9d2a6
+Revises: e4d2a8c6b371
+Create Date: 2026-10-19 15:02:48.310562
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b7c4e9d2a6'
+down_revision = 'e4d2a8c6b371'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {ix['name'] for ix in sa.inspect(op.get_bind()).get_indexes('transactions')}
+    if 'ix_transactions_user_type_status_amount' not in indexes:
+        with op.batch_alter_table('transactions', schema=None) as batch_op:
+            batch_op.create_index('ix_transactions_user_type_status_amount',
+                                  ['user_id', 'tx_type', 'status', 'amount'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('transactions', schema=None) as batch_op:
+        batch_op.drop_index('ix_transactions_user_type_status_amount')
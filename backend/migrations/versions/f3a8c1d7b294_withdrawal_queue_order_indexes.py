@@ -0,0 +1,32 @@
+"""withdrawal queue order indexes
+
+Revision ID: f3a8c1d7b294
+Revises: e9b2d6f4a381
+Create Date: 2026-10-20 09:14:52.318406
+
+The admin queue orders by (created_at, id) with an optional status filter;
+(status, created_at) served neither the unfiltered default nor the id
+tie-break.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c1d7b294'
+down_revision = 'e9b2d6f4a381'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artist_withdrawals', schema=None) as batch_op:
+        batch_op.drop_index('ix_artist_withdrawals_status_created_at')
+        batch_op.create_index('ix_artist_withdrawals_created_at_id', ['created_at', 'id'], unique=False)
+        batch_op.create_index('ix_artist_withdrawals_status_created_at_id', ['status', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artist_withdrawals', schema=None) as batch_op:
+        batch_op.drop_index('ix_artist_withdrawals_status_created_at_id')
+        batch_op.drop_index('ix_artist_withdrawals_created_at_id')
+        batch_op.create_index('ix_artist_withdrawals_status_created_at', ['status', 'created_at'], unique=False)
@@ -5,6 +5,7 @@ import StatusBadge from '../common/StatusBadge';
 import { getCampaignStatus } from '../../utils/campaignUtils';
 import { IoShareSocial } from 'react-icons/io5'; // <-- ADDED
 import ShareModal from '../common/ShareModal'; // <-- ADDED
+import ArtworkImage from '../common/ArtworkImage';
 
 // Reusable Badge component for our cards
 const CampaignBadge = ({ text, icon, colorClass }) => (
@@ -48,14 +49,16 @@ export default function CampaignCard({ campaign, isFeatured, isTrending }) {
         {/* Album Art Container - Updated with artwork */}
         <div className="relative h-48 bg-gradient-to-r from-fb-purple to-fb-pink">
           {artworkUrl ? (
-            <img 
-              src={artworkUrl} 
+            <ArtworkImage
+              url={campaign.artwork_url}
+              variants={campaign.artwork_variants}
+              sizes="(max-width: 640px) 100vw, 400px"
               alt={campaign.title || 'Campaign'}
               className="w-full h-full object-cover"
               onError={(e) => {
                 // Fallback if image fails to load
                 e.target.style.display = 'none';
-                e.target.parentElement.querySelector('.fallback-icon').style.display = 'flex';
+                e.target.closest('.relative').querySelector('.fallback-icon').style.display = 'flex';
               }}
             />
           ) : null}
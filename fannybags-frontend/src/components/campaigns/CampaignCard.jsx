@@ -5,6 +5,7 @@ import StatusBadge from '../common/StatusBadge';
 import { getCampaignStatus } from '../../utils/campaignUtils';
 import { IoShareSocial } from 'react-icons/io5';
 import ShareModal from '../common/ShareModal';
+import ArtworkImage from '../common/ArtworkImage';
 
 const CampaignBadge = ({ text, icon, colorClass }) => (
   <div className={`absolute top-2 left-2 flex items-center gap-1.5 rounded-full ${colorClass} px-3 py-1 text-xs font-bold text-white shadow-lg`}>
@@ -55,13 +56,15 @@ export default function CampaignCard({ campaign, isFeatured, isTrending }) {
         {/* Artwork */}
         <div className="relative h-48 bg-gradient-to-br from-[#FF48B9] to-[#8B5CF6]">
           {artworkUrl ? (
-            <img 
-              src={artworkUrl} 
+            <ArtworkImage
+              url={campaign.artwork_url}
+              variants={campaign.artwork_variants}
+              sizes="(max-width: 640px) 100vw, 400px"
               alt={campaign.title || 'Campaign'}
               className="w-full h-full object-cover"
               onError={(e) => {
                 e.target.style.display = 'none';
-                e.target.parentElement.querySelector('.fallback-icon').style.display = 'flex';
+                e.target.closest('.relative').querySelector('.fallback-icon').style.display = 'flex';
               }}
             />
           ) : null}
@@ -6,6 +6,9 @@ import { useAuthStore } from '../../store/authStore';
 const CommentSection = ({ campaignId }) => {
   const { user } = useAuthStore();
   const [comments, setComments] = useState([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [newComment, setNewComment] = useState('');
   const [loading, setLoading] = useState(true);
   const [posting, setPosting] = useState(false);
@@ -16,6 +19,8 @@ const CommentSection = ({ campaignId }) => {
       setLoading(true);
       const data = await getComments(campaignId);
       setComments(data.comments || []);
+      setTotal(data.total || 0);
+      setNextCursor(data.next_cursor || null);
       setError(null);
     } catch (err) {
       console.error('Failed to fetch comments:', err);
@@ -29,6 +34,22 @@ const CommentSection = ({ campaignId }) => {
     fetchComments();
   }, [fetchComments]);
 
+  const handleLoadMore = async () => {
+    try {
+      setLoadingMore(true);
+      const data = await getComments(campaignId, nextCursor);
+      setComments([...comments, ...(data.comments || [])]);
+      setTotal(data.total || 0);
+      setNextCursor(data.next_cursor || null);
+      setError(null);
+    } catch (err) {
+      console.error('Failed to load more comments:', err);
+      setError('Failed to load comments');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handlePostComment = async (e) => {
     e.preventDefault();
     
@@ -45,6 +66,7 @@ const CommentSection = ({ campaignId }) => {
       setPosting(true);
       const response = await createComment(campaignId, newComment.trim());
       setComments([response.comment, ...comments]);
+      setTotal(total + 1);
       setNewComment('');
       setError(null);
     } catch (err) {
@@ -63,6 +85,7 @@ const CommentSection = ({ campaignId }) => {
     try {
       await deleteComment(commentId);
       setComments(comments.filter(c => c.id !== commentId));
+      setTotal(total - 1);
       setError(null);
     } catch (err) {
       console.error('Failed to delete comment:', err);
@@ -76,7 +99,7 @@ const CommentSection = ({ campaignId }) => {
       <div className="flex items-center gap-2 mb-6">
         <FiMessageCircle className="text-[#FF48B9]" size={24} />
         <h2 className="text-2xl font-bold text-white">
-          Comments ({comments.length})
+          Comments ({total})
         </h2>
       </div>
 
@@ -218,6 +241,19 @@ const CommentSection = ({ campaignId }) => {
               )}
             </div>
           ))}
+
+          {/* Load More */}
+          {nextCursor && (
+            <div className="flex justify-center">
+              <button
+                onClick={handleLoadMore}
+                disabled={loadingMore}
+                className="px-6 py-2 border border-[rgba(255,255,255,0.15)] text-gray-300 rounded-lg hover:bg-[rgba(255,255,255,0.05)] transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load more comments'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -0,0 +1,42 @@
+const BACKEND_URL = import.meta.env.VITE_BACKEND_URL || 'http://127.0.0.1:5000';
+
+// Modern formats go in <source>s, best first; the browser takes the first it supports
+const SOURCE_FORMATS = { avif: 'image/avif', webp: 'image/webp' };
+const FALLBACK_FORMATS = ['jpeg', 'png'];
+
+const srcSet = (byWidth) =>
+  Object.entries(byWidth)
+    .sort(([a], [b]) => Number(a) - Number(b))
+    .map(([width, url]) => `${BACKEND_URL}${url} ${width}w`)
+    .join(', ');
+
+// Uploaded artwork with its resized variants ({format: {width: url}}, made by the
+// media worker). The browser picks the smallest one that fits `sizes` instead of
+// downloading the original; images without variants yet use the original.
+export default function ArtworkImage({ url, variants, sizes, alt, className, onError }) {
+  const src = `${BACKEND_URL}${url}`;
+  const fallback = FALLBACK_FORMATS.find((format) => variants?.[format]);
+
+  if (!variants || !fallback) {
+    return <img src={src} alt={alt} className={className} loading="lazy" onError={onError} />;
+  }
+
+  return (
+    <picture className="contents">
+      {Object.entries(SOURCE_FORMATS)
+        .filter(([format]) => variants[format])
+        .map(([format, type]) => (
+          <source key={format} type={type} srcSet={srcSet(variants[format])} sizes={sizes} />
+        ))}
+      <img
+        src={src}
+        srcSet={srcSet(variants[fallback])}
+        sizes={sizes}
+        alt={alt}
+        className={className}
+        loading="lazy"
+        onError={onError}
+      />
+    </picture>
+  );
+}
@@ -1,5 +1,6 @@
 import { useNavigate } from 'react-router-dom';
 import { IoMusicalNotes, IoWallet, IoPieChart, IoCalendarOutline } from 'react-icons/io5';
+import ArtworkImage from '../common/ArtworkImage';
 
 export default function HoldingsCard({ holding }) {
   const navigate = useNavigate();
@@ -14,9 +15,7 @@ export default function HoldingsCard({ holding }) {
   const dateInvested = holding?.date_invested;
 
   // 🎨 Campaign artwork
-  const artworkUrl = holding?.campaign_artwork_url
-    ? `${import.meta.env.VITE_BACKEND_URL|| 'http://127.0.0.1:5000'}${holding.campaign_artwork_url}`
-    : null;
+  const hasArtwork = Boolean(holding?.campaign_artwork_url);
 
   return (
     <div
@@ -31,9 +30,11 @@ export default function HoldingsCard({ holding }) {
     >
       {/* Album Art */}
       <div className="relative aspect-square overflow-hidden bg-black/40">
-        {artworkUrl ? (
-          <img
-            src={artworkUrl}
+        {hasArtwork ? (
+          <ArtworkImage
+            url={holding.campaign_artwork_url}
+            variants={holding.campaign_artwork_variants}
+            sizes="(max-width: 640px) 100vw, 400px"
             alt={holding?.campaign_title || 'Campaign'}
             className="w-full h-full object-cover opacity-90 group-hover:scale-110 transition-transform duration-700"
           />
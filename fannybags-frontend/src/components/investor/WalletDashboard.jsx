@@ -422,7 +422,7 @@ const WalletDashboard = () => {
                         ${getTransactionColor(tx.transaction_type)}
                       `}
                     >
-                      {['deposit', 'payout'].includes(tx.transaction_type) ? '+' : '-'}
+                      {['deposit', 'payout', 'withdrawal_refund'].includes(tx.transaction_type) ? '+' : '-'}
                       ₹{tx.amount.toLocaleString()}
                     </p>
                     <p className="text-[11px] md:text-xs text-gray-400">
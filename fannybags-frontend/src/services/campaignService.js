@@ -75,6 +75,18 @@ predictRevenue: async (campaignData) => {
   return response.data;
 },
 
+// { base, grid: { field: [values] } } or { base, scenarios: [...] }
+predictRevenueBatch: async (batch) => {
+  const response = await api.post('/campaigns/predict-revenue/batch', batch);
+  return response.data;
+},
+
+// { total_budget, objective: 'roi' | 'breakeven', constraints: { field: { min, max } }, ...model inputs }
+optimizeBudget: async (request) => {
+  const response = await api.post('/campaigns/optimize-budget', request);
+  return response.data;
+},
+
 uploadArtwork: async (campaignId, formData) => {
   const response = await api.post(`/campaigns/${campaignId}/upload/artwork`, formData, {
     headers: { 'Content-Type': 'multipart/form-data' }
@@ -1,12 +1,15 @@
 import api from './api';
 
 /**
- * Fetch all comments for a campaign
+ * Fetch a page of comments for a campaign, newest first
  * @param {number} campaignId - The campaign ID
- * @returns {Promise} - Response with comments array
+ * @param {string} [cursor] - next_cursor from the previous page
+ * @returns {Promise} - Response with comments array, total and next_cursor
  */
-export const getComments = async (campaignId) => {
-  const response = await api.get(`/campaigns/${campaignId}/comments`);
+export const getComments = async (campaignId, cursor) => {
+  const response = await api.get(`/campaigns/${campaignId}/comments`, {
+    params: cursor ? { cursor } : {},
+  });
   return response.data;
 };
 
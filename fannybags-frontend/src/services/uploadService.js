@@ -0,0 +1,81 @@
+import api from './api';
+
+const sha256Hex = async (buffer) => {
+  const digest = await crypto.subtle.digest('SHA-256', buffer);
+  return Array.from(new Uint8Array(digest)).map((b) => b.toString(16).padStart(2, '0')).join('');
+};
+
+const COMPLETE_POLL_MS = 1000;
+
+export const uploadService = {
+
+  // Resumable upload: kind is 'artwork' | 'audio' | 'profile_image', targetId the campaign id.
+  // Pass a previous uploadId to resume from where the server left off. With direct: true
+  // (server uses object storage) the parts go straight to the bucket instead of through the API.
+  uploadFile: async (kind, targetId, file, { onProgress, uploadId, direct = false } = {}) => {
+    let session;
+    if (uploadId) {
+      session = (await api.get(`/uploads/${uploadId}`)).data;
+    } else {
+      session = (await api.post('/uploads', {
+        kind, target_id: targetId, filename: file.name, size: file.size, direct,
+      })).data;
+    }
+    const chunkSize = session.chunk_size || 8 * 1024 * 1024;
+
+    if (session.direct) {
+      const done = new Set((session.parts || []).map((p) => p.part_number));
+      const partCount = Math.ceil(file.size / chunkSize);
+      let sent = done.size;
+      for (let number = 1; number <= partCount; number += 1) {
+        if (!done.has(number)) {
+          const chunk = await file.slice((number - 1) * chunkSize, number * chunkSize).arrayBuffer();
+          const signed = (await api.post(`/uploads/${session.upload_id}/parts`, {
+            parts: [{ part_number: number, sha256: await sha256Hex(chunk) }],
+          })).data.parts[0];
+          // Presigned: no API auth header, the signature is in the URL
+          const response = await fetch(signed.url, { method: 'PUT', body: chunk, headers: signed.headers });
+          if (!response.ok) throw new Error(`Part ${number} failed (${response.status})`);
+          sent += 1;
+        }
+        if (onProgress) onProgress(sent / partCount, session.upload_id);
+      }
+    } else {
+      let offset = session.offset;
+      while (offset < file.size) {
+        const chunk = await file.slice(offset, offset + chunkSize).arrayBuffer();
+        const response = await api.put(`/uploads/${session.upload_id}`, chunk, {
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'Content-Range': `bytes ${offset}-${offset + chunk.byteLength - 1}/${file.size}`,
+            'X-Chunk-SHA256': await sha256Hex(chunk),
+          },
+        });
+        offset = response.data.offset;
+        if (onProgress) onProgress(offset / file.size, session.upload_id);
+      }
+    }
+
+    let result = (await api.post(`/uploads/${session.upload_id}/complete`)).data;
+    // Direct uploads are verified by the media worker: wait for it
+    while (result.status === 'assembled' || result.status === 'verifying') {
+      await new Promise((resolve) => setTimeout(resolve, COMPLETE_POLL_MS));
+      result = (await api.get(`/uploads/${session.upload_id}`)).data;
+    }
+    if (result.status !== 'completed') {
+      throw new Error(result.error || `Upload ${result.status}`);
+    }
+    return result;
+  },
+
+  getUpload: async (uploadId) => {
+    const response = await api.get(`/uploads/${uploadId}`);
+    return response.data;
+  },
+
+  cancelUpload: async (uploadId) => {
+    const response = await api.delete(`/uploads/${uploadId}`);
+    return response.data;
+  },
+
+};